@@ -0,0 +1,304 @@
+# 拍摄时间提取与时间索引
+# 只读取文件头部的元数据结构，不解码图片和视频：
+#   JPEG：APP1 段中的 EXIF；PNG：eXIf 块；TIFF：文件本身即 EXIF 结构；
+#   MP4 / MOV：moov 下 udta 中的 ©day（带时区），没有时取 mvhd 的创建时间（1904 纪元的 UTC 秒数）。
+# EXIF 优先取 DateTimeOriginal，其次 DateTimeDigitized、IFD0 的 DateTime，并合并对应的 SubSecTime 与 OffsetTime；
+# 没有时区偏移时按本机时区解释（与相机记录本地时间的习惯一致）。返回 Unix 时间戳（float），取不到时为 None。
+# 提取在探测尺寸的子进程中随 stat 一起完成（见 compare._probe_image / _probe_video）。
+
+import bisect
+import datetime
+import os
+import re
+import struct
+from array import array
+
+QUICKTIME_EXTS = {'.mp4', '.mov', '.m4v', '.3gp'}
+MAX_EXIF_BYTES = 1024 * 1024      # PNG eXIf 块的读取上限
+MAX_HEADER_SEGMENTS = 64          # JPEG / PNG 中查找元数据时最多跳过的段（块）数
+
+_TAG_DATETIME = 0x0132
+_TAG_EXIF_IFD = 0x8769
+_TAG_DATETIME_ORIGINAL = 0x9003
+_TAG_DATETIME_DIGITIZED = 0x9004
+_TAG_OFFSET_TIME = 0x9010
+_TAG_OFFSET_TIME_ORIGINAL = 0x9011
+_TAG_OFFSET_TIME_DIGITIZED = 0x9012
+_TAG_SUBSEC_TIME = 0x9290
+_TAG_SUBSEC_TIME_ORIGINAL = 0x9291
+_TAG_SUBSEC_TIME_DIGITIZED = 0x9292
+# (日期时间, 亚秒, 时区偏移)，按优先级排列
+_EXIF_CANDIDATES = (
+    (_TAG_DATETIME_ORIGINAL, _TAG_SUBSEC_TIME_ORIGINAL, _TAG_OFFSET_TIME_ORIGINAL),
+    (_TAG_DATETIME_DIGITIZED, _TAG_SUBSEC_TIME_DIGITIZED, _TAG_OFFSET_TIME_DIGITIZED),
+    (_TAG_DATETIME, _TAG_SUBSEC_TIME, _TAG_OFFSET_TIME),
+)
+_EXIF_DATETIME = re.compile(rb'(\d{4}):(\d\d):(\d\d)[ T](\d\d):(\d\d):(\d\d)')
+_OFFSET = re.compile(r'([+-])(\d\d):?(\d\d)')
+_ISO_DATETIME = re.compile(
+    r'(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.(\d+))?\s*(Z|[+-]\d\d:?\d\d)?')
+_QT_EPOCH_OFFSET = 2082844800     # 1904-01-01 到 1970-01-01 的秒数
+_ATOM = struct.Struct('>I4s')
+
+
+def _to_timestamp(year, month, day, hour, minute, second, fraction=0.0, offset=None):
+    """offset 为相对 UTC 的秒数，None 时按本机时区解释；日期无效时返回 None"""
+    try:
+        dt = datetime.datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+    if year < 1900:
+        return None
+    if offset is not None:
+        dt = dt.replace(tzinfo=datetime.timezone(datetime.timedelta(seconds=offset)))
+    try:
+        return dt.timestamp() + fraction
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _parse_offset(text):
+    match = _OFFSET.match(text.strip()) if text else None
+    if not match:
+        return None
+    sign = -1 if match.group(1) == '-' else 1
+    return sign * (int(match.group(2)) * 3600 + int(match.group(3)) * 60)
+
+
+def _exif_value(value, subsec, offset):
+    """把 EXIF 的 'YYYY:MM:DD HH:MM:SS' 与亚秒、时区字段合成为时间戳"""
+    match = _EXIF_DATETIME.match(value or b'')
+    if not match:
+        return None
+    fraction = 0.0
+    digits = (subsec or b'').strip(b'\0 ').decode('ascii', 'ignore')
+    if digits.isdigit():
+        fraction = int(digits) / 10 ** len(digits)
+    tz = _parse_offset((offset or b'').strip(b'\0 ').decode('ascii', 'ignore'))
+    return _to_timestamp(*map(int, match.groups()), fraction=fraction, offset=tz)
+
+
+class _Tiff:
+    """按需读取的 TIFF 结构（EXIF 即 TIFF 格式），read_at(偏移, 长度) 以 TIFF 头为起点，limit 为数据总长"""
+
+    def __init__(self, read_at, limit):
+        self.read_at = read_at
+        self.limit = limit
+        head = read_at(0, 8)
+        if head[:4] in (b'II*\0', b'MM\0*'):
+            self.order = '<' if head[:2] == b'II' else '>'
+            self.first_ifd = struct.unpack(self.order + 'I', head[4:8])[0]
+        else:
+            self.order = None
+
+    def entries(self, offset):
+        """返回 IFD 中 ASCII 与单值 SHORT / LONG 类型标签的 {标签: 值}"""
+        if not 0 < offset < self.limit:
+            return {}
+        raw = self.read_at(offset, 2)
+        if len(raw) < 2:
+            return {}
+        (count,) = struct.unpack(self.order + 'H', raw)
+        data = self.read_at(offset + 2, count * 12)
+        values = {}
+        for k in range(len(data) // 12):
+            tag, typ, n, inline = struct.unpack(self.order + 'HHI4s', data[k * 12:k * 12 + 12])
+            if typ == 2:  # ASCII
+                if n <= 4:
+                    values[tag] = inline[:n]
+                else:
+                    (pos,) = struct.unpack(self.order + 'I', inline)
+                    if pos + n <= self.limit:
+                        values[tag] = self.read_at(pos, min(n, 64))
+            elif typ in (3, 4) and n == 1:  # SHORT / LONG
+                fmt = 'H' if typ == 3 else 'I'
+                values[tag] = struct.unpack(self.order + fmt, inline[:struct.calcsize(fmt)])[0]
+        return values
+
+    def capture_time(self):
+        if self.order is None:
+            return None
+        ifd0 = self.entries(self.first_ifd)
+        tags = dict(ifd0)
+        exif_ifd = ifd0.get(_TAG_EXIF_IFD)
+        if isinstance(exif_ifd, int):
+            tags.update(self.entries(exif_ifd))
+        for value_tag, subsec_tag, offset_tag in _EXIF_CANDIDATES:
+            value = tags.get(value_tag)
+            if isinstance(value, bytes):
+                taken = _exif_value(value, tags.get(subsec_tag), tags.get(offset_tag))
+                if taken is not None:
+                    return taken
+        return None
+
+
+def _bytes_tiff(data):
+    return _Tiff(lambda offset, n: data[offset:offset + n], len(data))
+
+
+def _jpeg_exif(f):
+    """从 SOI 之后逐段查找 Exif APP1，遇到 SOS（图像数据开始）即停止"""
+    if f.read(2) != b'\xff\xd8':
+        return None
+    for _ in range(MAX_HEADER_SEGMENTS):
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return None
+        marker, length = head[1], struct.unpack('>H', head[2:])[0]
+        if marker == 0xDA or length < 2:
+            return None
+        if marker == 0xE1:
+            data = f.read(length - 2)
+            if data[:6] == b'Exif\0\0':
+                return _bytes_tiff(data[6:]).capture_time()
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def _png_exif(f):
+    """逐块查找 eXIf，读到 IDAT 或 IEND 即停止（规范要求 eXIf 位于 IDAT 之前）"""
+    if f.read(8) != b'\x89PNG\r\n\x1a\n':
+        return None
+    for _ in range(MAX_HEADER_SEGMENTS):
+        head = f.read(8)
+        if len(head) < 8:
+            return None
+        length, chunk_type = _ATOM.unpack(head)
+        if chunk_type in (b'IDAT', b'IEND'):
+            return None
+        if chunk_type == b'eXIf':
+            data = f.read(min(length, MAX_EXIF_BYTES))
+            return _bytes_tiff(data).capture_time()
+        f.seek(length + 4, os.SEEK_CUR)
+    return None
+
+
+def _tiff_exif(f):
+    """TIFF 文件本身即 TIFF 结构，IFD 可能位于图像数据之后，按偏移随机读取"""
+    def read_at(offset, n):
+        f.seek(offset)
+        return f.read(n)
+    f.seek(0, os.SEEK_END)
+    return _Tiff(read_at, f.tell()).capture_time()
+
+
+def _atoms(f, start, end):
+    """遍历 [start, end) 范围内的 QuickTime atom，产出 (类型, 数据起点, 数据终点)"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        size, kind = _ATOM.unpack(head)
+        header = 8
+        if size == 1:  # 64 位长度
+            ext = f.read(8)
+            if len(ext) < 8:
+                return
+            size = struct.unpack('>Q', ext)[0]
+            header = 16
+        elif size == 0:  # 延伸到文件（容器）末尾
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _qt_day(f, start, end):
+    """
+    udta 中的 ©day，文本为 ISO 8601 日期时间。QuickTime 风格直接位于 udta 下（2 字节长度 + 2 字节语言码 + 文本），
+    iTunes 风格位于 udta/meta/ilst 下（文本在 data 子 atom 中），两者都按正则在内容中查找。
+    """
+    for kind, data_start, data_end in _atoms(f, start, end):
+        if kind in (b'meta', b'ilst'):
+            # meta 是 full atom，子 atom 前有 4 字节版本与标志
+            taken = _qt_day(f, data_start + 4 if kind == b'meta' else data_start, data_end)
+            if taken is not None:
+                return taken
+            continue
+        if kind != b'\xa9day':
+            continue
+        f.seek(data_start)
+        raw = f.read(min(data_end - data_start, 256))
+        text = raw[4:].decode('utf-8', 'ignore') if len(raw) > 4 else ''
+        match = _ISO_DATETIME.search(text)
+        if not match:
+            return None
+        groups = match.groups()
+        fraction = float('0.' + groups[6]) if groups[6] else 0.0
+        zone = groups[7]
+        tz = 0 if zone == 'Z' else _parse_offset(zone)
+        return _to_timestamp(*map(int, groups[:6]), fraction=fraction, offset=tz)
+    return None
+
+
+def _quicktime(f):
+    f.seek(0, os.SEEK_END)
+    file_end = f.tell()
+    for kind, start, end in _atoms(f, 0, file_end):
+        if kind != b'moov':
+            continue
+        created = None
+        for child, child_start, child_end in _atoms(f, start, end):
+            if child == b'udta':
+                taken = _qt_day(f, child_start, child_end)
+                if taken is not None:
+                    return taken
+            elif child == b'mvhd':
+                f.seek(child_start)
+                raw = f.read(12)
+                if len(raw) == 12:
+                    seconds = struct.unpack('>Q', raw[4:12])[0] if raw[0] == 1 else struct.unpack('>I', raw[4:8])[0]
+                    if seconds > _QT_EPOCH_OFFSET:  # 0 表示未设置，1970 年以前视为无效
+                        created = float(seconds - _QT_EPOCH_OFFSET)
+        return created
+    return None
+
+
+_READERS = {'.jpg': _jpeg_exif, '.jpeg': _jpeg_exif, '.png': _png_exif, '.tiff': _tiff_exif, '.tif': _tiff_exif}
+_READERS.update(dict.fromkeys(QUICKTIME_EXTS, _quicktime))
+CAPTURE_TIME_EXTS = frozenset(_READERS)
+
+
+def capture_time(path):
+    """返回文件的拍摄时间（Unix 时间戳），格式不支持或没有记录时返回 None；不支持的扩展名不打开文件，不抛出异常"""
+    reader = _READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return reader(f)
+    except (OSError, struct.error, ValueError, OverflowError):
+        return None
+
+
+class TimeIndex:
+    """
+    按拍摄时间排序的索引：时间列为 array('d')，条目（路径或文件信息）与之按同一顺序存放，
+    供时间线视图和后续阶段按时间范围取文件；没有拍摄时间的文件不进入索引。
+    """
+    __slots__ = ('times', 'items')
+
+    def __init__(self, pairs=()):
+        ordered = sorted(pairs, key=lambda pair: pair[0])
+        self.times = array('d', (t for t, _ in ordered))
+        self.items = [item for _, item in ordered]
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        return zip(self.times, self.items)
+
+    def between(self, start=None, end=None):
+        """拍摄时间在 [start, end) 内的 (时间, 条目)，按时间升序；None 表示不限"""
+        lo = 0 if start is None else bisect.bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect.bisect_left(self.times, end)
+        return [(self.times[k], self.items[k]) for k in range(lo, hi)]
+
+    def span(self):
+        """(最早, 最晚) 拍摄时间，索引为空时为 None"""
+        return (self.times[0], self.times[-1]) if self.times else None
@@ -1,27 +1,40 @@
 from translations import tr, get_language
-from PIL import Image, UnidentifiedImageError
-from multiprocessing import Pool, cpu_count
+from structured_report import ReportWriter, report_paths, render_text_report, read_report
+from file_ops import TRASH_DIR_NAME, TargetNames
+from stage_stats import StageStats, cpu_seconds
+from payload_hash import PAYLOAD_METHOD, payload_digest
+from capture_time import capture_time, TimeIndex
 import signal
 import sys
 import os
 import re
 import time
 import shutil
-import psutil
 import hashlib
+import struct
 import logging
+from array import array
+from itertools import chain, groupby
 from pathlib import Path
 
-# 日志配置
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler('photo_tool.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 导入本模块没有副作用：PIL、multiprocessing 在首次使用时才导入，
+# 日志与信号处理由入口（main.py / GUI）调用 setup_logging / install_signal_handlers 配置。
 logger = logging.getLogger(__name__)
+LOG_FILE = 'photo_tool.log'
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.avif'}
+VIDEO_EXTS = {'.mp4', '.mov'}
+
+def setup_logging(log_file=LOG_FILE, level=logging.INFO):
+    """日志配置：写入 log_file（为 None 时不写文件）并输出到控制台"""
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=handlers
+    )
+LANG = get_language()  # 报告语言，由入口（main.py / GUI）设置
 # LANG = 'zh'
 # TEXTS = {
 #     'zh': {
@@ -147,9 +160,19 @@ def get_optimal_chunk_size(file_size):
     else:  # >= 100MB
         return 1048576  # 1MB
     
-def get_image_hash(image_path, method='md5', max_size=500*1024*1024):
+def get_image_hash(image_path, method='md5', max_size=500*1024*1024, chunk_size=None):
+    """
+    计算文件哈希，返回十六进制字符串（仅用于报告等对外输出）
+    """
+    digest = get_image_digest(image_path, method, max_size, chunk_size)
+    return digest.hex() if digest is not None else None
+
+def get_image_digest(image_path, method='md5', max_size=500*1024*1024, chunk_size=None):
     """
     改进的哈希计算函数，优化大文件处理
+    返回原始摘要字节（md5 为 16 字节），内部比对一律使用字节形式
+    chunk_size 为 None 时按文件大小取 get_optimal_chunk_size 的读块大小
+    method 为 'payload' 时 JPEG / PNG 只哈希图像数据、忽略元数据（见 payload_hash.py），其他格式仍按 md5 字节哈希
     """
     try:
         normalized_path = normalize_path(image_path)
@@ -167,8 +190,14 @@ def get_image_hash(image_path, method='md5', max_size=500*1024*1024):
             logger.warning(f"文件过大，跳过哈希计算: {image_path} ({file_size/1024/1024:.1f}MB)")
             return None
         
+        if method == PAYLOAD_METHOD:
+            digest = payload_digest(normalized_path)
+            if digest is not None:
+                return digest
+        
         # 根据文件大小选择最优块大小
-        chunk_size = get_optimal_chunk_size(file_size)
+        if not chunk_size:
+            chunk_size = get_optimal_chunk_size(file_size)
         
         # 选择哈希算法
         if method == 'md5':
@@ -194,7 +223,7 @@ def get_image_hash(image_path, method='md5', max_size=500*1024*1024):
                     logger.info(f"大文件采用部分哈希: {image_path}")
                     break
         
-        return hash_func.hexdigest()
+        return hash_func.digest()
         
     except (IOError, OSError) as e:
         logger.error(f"读取文件失败: {image_path}, 错误: {e}")
@@ -207,6 +236,7 @@ def get_image_hash(image_path, method='md5', max_size=500*1024*1024):
         return None
 def get_image_size(image_path):
     """优化的图片尺寸获取函数，处理大文件"""
+    from PIL import Image, UnidentifiedImageError
     try:
         normalized_path = normalize_path(image_path)
         
@@ -345,9 +375,12 @@ def safe_multiprocess_operation(func, items, max_workers=None):
     """
     if not items:
         return []
+    from multiprocessing import Pool, cpu_count
     
     if max_workers is None:
         max_workers = min(cpu_count(), len(items), 8)  # 限制最大进程数避免资源过度消耗
+    else:
+        max_workers = max(1, min(max_workers, len(items)))
     
     # 如果任务数量很少，直接单进程处理
     if len(items) < max_workers * 2:
@@ -462,45 +495,189 @@ def safe_file_size(path):
             return 0
 def safe_walk_directory(folder):
     """安全的目录遍历，处理Unicode文件名"""
-    files_found = []
+    return list(iter_walk_directory(folder))
+
+def iter_walk_directory(folder):
+    """同 safe_walk_directory，但逐个产出路径，不在内存中保存完整列表（供外部排序模式使用）"""
     folder = normalize_path(folder)
     try:
         for root, dirs, files in os.walk(folder):
+            # 跳过删除操作产生的回收目录
+            dirs[:] = [d for d in dirs if d != TRASH_DIR_NAME]
             # 处理文件名编码问题
             for file in files:
                 try:
                     file_path = os.path.join(root, file)
                     # 验证路径是否可用
                     if safe_file_exists(file_path):
-                        files_found.append(normalize_path(file_path))
+                        yield normalize_path(file_path)
                 except (UnicodeError, OSError) as e:
                     logger.warning(f"跳过有问题的文件: {file}, 错误: {e}")
                     continue
     except (OSError, UnicodeError) as e:
         logger.error(f"遍历目录失败: {folder}, 错误: {e}")
-    
-    return files_found
 
 # 添加信号处理器来优雅地处理中断
 def signal_handler(signum, frame):
     logger.info("接收到中断信号，正在清理资源...")
     sys.exit(0)
 
-# 在模块加载时注册信号处理器
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def install_signal_handlers():
+    """注册 SIGINT / SIGTERM 处理器，由入口调用"""
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
 
-def collect_images(folder, exts=None):
+class PathTable:
     """
-    递归收集文件夹下所有图片文件路径、大小、尺寸。
-    返回：[{path, size, shape}...]
+    路径驻留表：目录字符串只保存一份，每个文件只记录 (目录号, 文件名)。
+    行号即路径索引，按下标取值时再拼接出完整路径。
+    """
+    __slots__ = ('dirs', '_dir_ids', 'dir_of', 'names')
+
+    def __init__(self):
+        self.dirs = []
+        self._dir_ids = {}
+        self.dir_of = array('l')
+        self.names = []
+
+    def append(self, path):
+        directory, name = os.path.split(path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self.dirs)
+            self._dir_ids[directory] = dir_id
+            self.dirs.append(directory)
+        self.dir_of.append(dir_id)
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def __getitem__(self, i):
+        return os.path.join(self.dirs[self.dir_of[i]], self.names[i])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self.names)):
+            yield self[i]
+
+class ImageTable:
+    """
+    紧凑的列式图片元数据表，替代每个文件一个 dict 的表示。
+    数值列使用定长 array 存储，哈希列为定长字节，路径存于 PathTable，行号即路径索引。
+    百万级文件时内存占用约为 dict 表示的几分之一。
+    """
+    __slots__ = ('paths', 'sizes', 'mtimes', 'takens', 'widths', 'heights',
+                 'hashes', 'hash_width', 'has_hash', 'corrupt')
+
+    def __init__(self, hash_width=32):
+        self.paths = PathTable()
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.takens = array('d')    # 拍摄时间，0 表示没有记录
+        self.widths = array('l')    # 0 表示无法读取尺寸
+        self.heights = array('l')
+        self.hash_width = hash_width
+        self.hashes = bytearray()
+        self.has_hash = bytearray()
+        self.corrupt = bytearray()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def append(self, path, size, mtime, shape, taken=None):
+        self.paths.append(path)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.takens.append(taken or 0.0)
+        w, h = shape if shape else (0, 0)
+        self.widths.append(w)
+        self.heights.append(h)
+        self.hashes.extend(bytes(self.hash_width))
+        self.has_hash.append(0)
+        self.corrupt.append(0)
+
+    def shape(self, i):
+        w = self.widths[i]
+        return (w, self.heights[i]) if w else None
+
+    def taken(self, i):
+        return self.takens[i] or None
+
+    def set_hash(self, i, digest):
+        """写入第 i 行的哈希（原始字节），None 表示哈希失败"""
+        if digest is None:
+            self.has_hash[i] = 0
+            return
+        w = self.hash_width
+        self.hashes[i * w:(i + 1) * w] = digest.ljust(w, b'\0')[:w]
+        self.has_hash[i] = 1
+
+    def hash_key(self, i):
+        w = self.hash_width
+        return bytes(self.hashes[i * w:(i + 1) * w])
+
+    def get_hash(self, i, digest_size):
+        if not self.has_hash[i]:
+            return None
+        w = self.hash_width
+        return bytes(self.hashes[i * w:i * w + digest_size])
+
+    def group_rows(self, rows, key):
+        """
+        排序后按 key 取连续相同段（sort + unique），
+        只返回至少包含两行的分组，每组为行号列表。
+        """
+        groups = []
+        for _, run in groupby(sorted(rows, key=key), key=key):
+            run = list(run)
+            if len(run) > 1:
+                groups.append(run)
+        return groups
+
+    def record(self, i):
+        """将第 i 行转换为原有的 dict 表示（仅用于对外输出）"""
+        return {'path': self.paths[i], 'size': self.sizes[i], 'shape': self.shape(i)}
+
+    def to_dicts(self):
+        return [self.record(i) for i in range(len(self))]
+
+
+def _probe_image(image_path):
+    """子进程中一次性获取文件大小、修改时间、图片尺寸和拍摄时间（EXIF 只读文件头部，见 capture_time.py）"""
+    try:
+        st = os.stat(normalize_path(image_path))
+    except (OSError, UnicodeError, TypeError):
+        return 0, 0.0, None, None
+    return st.st_size, st.st_mtime, get_image_size(image_path), capture_time(image_path)
+
+def _probe_video(video_path):
+    """子进程中获取视频的大小、修改时间和拍摄时间（QuickTime 头部），无法 stat 时返回 None"""
+    try:
+        st = os.stat(video_path)
+    except OSError as e:
+        logger.warning(f"无法读取视频文件信息: {video_path}, 错误: {e}")
+        return None
+    return st.st_size, st.st_mtime, capture_time(video_path)
+
+
+def collect_image_table(folder, exts=None, hash_width=32, stats=None, jobs=None, files=None):
+    """
+    递归收集文件夹下所有图片，返回 ImageTable。
     使用改进的多进程处理来收集图片
     使用安全路径处理的图片收集函数
+    stats 为 StageStats 时记录 walk（目录遍历）和 stat_probe（stat 与尺寸探测，同一批子进程完成）两个阶段。
+    jobs 为尺寸探测的进程数，None 时由 safe_multiprocess_operation 按 CPU 数决定。
+    files 为已确定的文件列表（例如分片扫描只处理本分片的目录），给出时不再遍历 folder。
     """
     if exts is None:
-        exts = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.avif'}
+        exts = IMAGE_EXTS
+    if stats is None:
+        stats = StageStats()
     # 使用安全的目录遍历
-    all_files = safe_walk_directory(folder)
+    with stats.stage('walk') as rec:
+        all_files = safe_walk_directory(folder) if files is None else files
+        rec['files'] += len(all_files)
     # 过滤图片文件
     image_files = []
     for file_path in all_files:
@@ -515,43 +692,55 @@ def collect_images(folder, exts=None):
     logger.info(f"共发现图片文件 {len(image_files)} 张")
 
     # 使用安全的多进程操作
-    sizes = safe_multiprocess_operation(get_image_size, image_files)
+    with stats.stage('stat_probe', files=len(image_files)):
+        probes = safe_multiprocess_operation(_probe_image, image_files, max_workers=jobs)
     
-    image_meta = []
-    for path, shape in zip(image_files, sizes):
+    table = ImageTable(hash_width)
+    for path, probe in zip(image_files, probes):
         try:
-            size = safe_file_size(path)
+            if not probe:
+                continue
+            size, mtime, shape, taken = probe
             if size > 0:  # 只包含有效大小的文件
-                image_meta.append({'path': path, 'size': size, 'shape': shape})
+                table.append(path, size, mtime, shape, taken)
         except Exception as e:
             logger.warning(f"处理图片元数据失败: {path}, 错误: {e}")
             continue
     
-    logger.info(f"成功读取元数据图片数: {len(image_meta)}")
-    return image_meta
+    logger.info(f"成功读取元数据图片数: {len(table)}")
+    return table
+
+def collect_images(folder, exts=None):
+    """
+    递归收集文件夹下所有图片文件路径、大小、尺寸。
+    返回：[{path, size, shape}...]
+    """
+    return collect_image_table(folder, exts).to_dicts()
 
-def collect_videos(folder, exts=None):
+def collect_videos(folder, exts=None, jobs=None, files=None):
     """
-    递归收集文件夹下所有视频文件路径、大小、文件名。
-    返回：[{path, size, name}...]
+    递归收集文件夹下所有视频文件路径、大小、修改时间、文件名和拍摄时间（没有时为 None）。
+    stat 与读取拍摄时间在进程池中进行，jobs、files 同 collect_image_table。
+    返回：[{path, size, mtime, name, taken}...]
     """
     if exts is None:
-        exts = {'.mp4', '.mov'}
+        exts = VIDEO_EXTS
     video_files = []
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if os.path.splitext(file)[1].lower() in exts:
-                video_files.append(os.path.join(root, file))
+    if files is not None:
+        video_files = [path for path in files if os.path.splitext(path)[1].lower() in exts]
+    else:
+        for root, dirs, names in os.walk(folder):
+            dirs[:] = [d for d in dirs if d != TRASH_DIR_NAME]
+            for file in names:
+                if os.path.splitext(file)[1].lower() in exts:
+                    video_files.append(os.path.join(root, file))
     logger.info(f"共发现视频文件 {len(video_files)} 个")
     video_meta = []
-    for path in video_files:
-        try:
-            size = os.path.getsize(path)
-            name = os.path.basename(path)
-        except Exception as e:
-            logger.warning(f"无法读取视频文件信息: {path}, 错误: {e}")
+    for path, probe in zip(video_files, safe_multiprocess_operation(_probe_video, video_files, max_workers=jobs)):
+        if not probe:
             continue
-        video_meta.append({'path': path, 'size': size, 'name': name})
+        size, mtime, taken = probe
+        video_meta.append({'path': path, 'size': size, 'mtime': mtime, 'name': os.path.basename(path), 'taken': taken})
     logger.info(f"成功读取元数据视频数: {len(video_meta)}")
     return video_meta
 def _hash_worker(args):
@@ -566,6 +755,7 @@ def is_valid_image(image_path):
     """
     改进的图片验证方法，使用load()代替verify()
     """
+    from PIL import Image, UnidentifiedImageError
     try:
         with Image.open(image_path) as img:
             img.load()  # 使用load()代替verify()，不会破坏Image对象
@@ -579,10 +769,114 @@ def is_valid_image(image_path):
         logger.warning(f"图片验证时发生未知错误: {image_path}, 错误: {e}")
         return False
     
-def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_callback=None, progress_callback=None):
+def current_verdict(info, validate=is_valid_image):
+    """
+    返回文件当前是否损坏（True/False），文件已不存在时返回 None。
+    info 中记录的 size/mtime 与当前 stat 一致时直接沿用扫描时的结论，不再打开文件；
+    stat 变化或没有结论（旧版文本报告）时重新验证一次，并把新的 stat 与结论写回 info。
+    """
+    try:
+        st = os.stat(info['path'])
+    except OSError:
+        return None
+    if 'is_corrupt' in info and info.get('size') == st.st_size and info.get('mtime') == st.st_mtime:
+        return info['is_corrupt']
+    info['is_corrupt'] = not validate(info['path'])
+    info['size'] = st.st_size
+    info['mtime'] = st.st_mtime
+    return info['is_corrupt']
+
+def _size_sensitive(method):
+    """
+    内容相同的文件大小是否必然相同：payload 哈希忽略元数据，只差 EXIF 的重复文件大小不同，
+    此时候选分组只按尺寸、不按大小，增补模式也不能按大小跳过主文件夹图片的哈希
+    """
+    return method != PAYLOAD_METHOD
+
+def _digest_size(method):
+    """哈希算法对应的摘要字节数，未知算法按 md5 处理"""
+    return {'md5': 16, 'sha1': 20, 'sha256': 32}.get(method, 16)
+
+def _image_info(table, i, hash_method):
+    """将 ImageTable 中的一行展开为对外输出的文件信息 dict"""
+    digest = table.get_hash(i, _digest_size(hash_method))
+    return {
+        'path': table.paths[i],
+        'size': table.sizes[i],
+        'shape': table.shape(i),
+        'hash': digest.hex() if digest is not None else None,
+        'mtime': table.mtimes[i],
+        'taken': table.taken(i),
+        'is_corrupt': bool(table.corrupt[i])
+    }
+
+def group_videos(video_meta):
+    """按文件名和大小对 collect_videos 的结果分组，返回至少两个文件的组（视频文件详细信息列表）"""
+    video_group_map = {}
+    for meta in video_meta:
+        key = (meta['name'], meta['size'])
+        video_group_map.setdefault(key, []).append(meta)
+    
+    vid_groups = []
+    for group in video_group_map.values():
+        if len(group) > 1:
+            vid_groups.append([{
+                'path': meta['path'],
+                'name': meta['name'],
+                'size': meta['size'],
+                'mtime': meta['mtime'],
+                'taken': meta.get('taken'),
+                'is_corrupt': False
+            } for meta in group])
+    return vid_groups
+
+def build_time_index(table, video_meta=()):
+    """图片表与视频信息中有拍摄时间的文件按时间排序的 TimeIndex，条目为路径"""
+    pairs = [(table.takens[i], table.paths[i]) for i in range(len(table)) if table.takens[i]]
+    pairs.extend((meta['taken'], meta['path']) for meta in video_meta if meta.get('taken'))
+    return TimeIndex(pairs)
+
+def _resolve_tuning(folder, jobs, io_threads, chunk_size, log_emit, stats=None):
+    """解析 jobs / io_threads / chunk_size（可为 'auto'），有设置时在日志中说明实际取值；stats 记录调优结果的命中情况"""
+    from tuning import resolve
+    values, profile = resolve(folder, jobs, io_threads, chunk_size, stats=stats)
+    if profile is not None:
+        log_emit(tr('tuning_profile', mbps=profile['mb_per_s'], when=profile['calibrated']))
+    if any(v is not None for v in values.values()):
+        log_emit(tr('tuning_used', jobs=values['jobs'] or '-', io_threads=values['io_threads'] or '-',
+                    chunk=f"{values['chunk_size'] // 1024} KB" if values['chunk_size'] else '-'))
+    return values
+
+def _io_pool(io_threads):
+    """io_threads 大于 1 时返回哈希/验证用的线程池，否则返回 None（顺序处理）"""
+    if io_threads and io_threads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(max_workers=io_threads)
+    return None
+
+def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_callback=None, progress_callback=None, text_report=True,
+                    jobs=None, io_threads=None, chunk_size=None, memory_limit=None, spill_dir=None):
     """
     去重模式主流程：查找重复图片和视频并输出报告。
+    结构化报告（.jsonl）在发现分组时流式写入；text_report 为 True 时再由其生成文本报告。
+    jobs / io_threads / chunk_size 为尺寸探测进程数、哈希与验证线程数和哈希读块大小，
+    None 沿用默认行为，'auto' 使用按设备校准并保存的取值（见 tuning.py）。
+    memory_limit（字节）不为 None 时改用外部排序模式，中间数据写入 spill_dir 下的临时目录。
+    返回值中的 time_index 为全部图片和视频按拍摄时间排序的 TimeIndex（外部排序模式不在内存中建立，为 None），
+    每个文件信息的 taken 为拍摄时间（没有时为 None）。
     """
+    if memory_limit:
+        return _find_duplicates_external(folder, report_path, hash_method, dry_run, log_callback, progress_callback,
+                                         text_report, jobs, io_threads, chunk_size, memory_limit, spill_dir)
+    jsonl_path, text_path = report_paths(report_path)
+    # 异常退出时 ReportWriter 不写 end 记录，读取方（read_report / GUI）据此识别为不完整报告
+    with ReportWriter(jsonl_path, 'dedup', folder=folder, hash_method=hash_method, dry_run=dry_run) as report:
+        return _find_duplicates_in_memory(report, folder, hash_method, dry_run, log_callback, progress_callback,
+                                          text_report, jobs, io_threads, chunk_size, jsonl_path, text_path)
+
+def _find_duplicates_in_memory(report, folder, hash_method, dry_run, log_callback, progress_callback, text_report, jobs,
+                               io_threads, chunk_size, jsonl_path, text_path):
+    """find_duplicates 内存模式的主体，分组与结果写入已打开的 report"""
     log = []
     corrupt_files = []
     
@@ -595,25 +889,33 @@ def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_c
         if progress_callback:
             progress_callback(value)
     
+    def mark_corrupt(path):
+        corrupt_files.append(path)
+        report.write('corrupt', path=path)
+    
     if dry_run:
         log_emit(tr('dry_run'))
+    timer = StageStats()
+    with timer.stage('tuning'):
+        tuning = _resolve_tuning(folder, jobs, io_threads, chunk_size, log_emit, timer)
+    chunk_size = tuning['chunk_size']
     
-    # 收集图片信息
+    # 收集图片信息（列式表，避免每个文件一个 dict）
     log_emit(tr('scanning_images'))
-    image_meta = collect_images(folder)
-    total_images_scanned = len(image_meta)
+    table = collect_image_table(folder, hash_width=_digest_size(hash_method), stats=timer, jobs=tuning['jobs'])
+    total_images_scanned = len(table)
     log_emit(tr('images_found', count=total_images_scanned))
     progress_emit(0.1)
     
-    # 按大小和尺寸分组
-    group_map = {}
-    for meta in image_meta:
-        if meta['shape'] is None:  # 跳过无法读取尺寸的图片
-            continue
-        key = (meta['size'], meta['shape'])
-        group_map.setdefault(key, []).append(meta)
+    # 按大小和尺寸分组（跳过无法读取尺寸的图片）；payload 哈希只按尺寸
+    size_key = _size_sensitive(hash_method)
+    with timer.stage('group') as rec:
+        rows = [i for i in range(len(table)) if table.widths[i]]
+        size_groups = table.group_rows(
+            rows, key=lambda i: (table.sizes[i] if size_key else 0, table.widths[i], table.heights[i]))
+        rec['files'] += len(rows)
     
-    groups_to_process = sum(1 for files in group_map.values() if len(files) >= 2)
+    groups_to_process = len(size_groups)
     if groups_to_process > 0:
         log_emit(tr('analyzing_duplicates', count=groups_to_process))
     progress_emit(0.2)
@@ -622,56 +924,70 @@ def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_c
     img_groups = []
     processed_groups = 0
     
-    for idx, (key, files) in enumerate(group_map.items()):
-        if len(files) < 2:
-            processed_groups += 1
-            continue
-            
-        file_details = []
-        for meta in files:
+    # io_threads > 1 时哈希与验证在线程池中按候选顺序预先进行，主循环按同样顺序取结果；
+    # 此时两者无法分开计时，合并记为 hash_validate 阶段
+    pool = _io_pool(tuning['io_threads'])
+    pending = None
+    if pool is not None:
+        def hash_and_validate(i):
             try:
-                file_hash = get_image_hash(meta['path'], hash_method)
-                if file_hash is None:
-                    corrupt_files.append(meta['path'])
+                digest = get_image_digest(table.paths[i], hash_method, chunk_size=chunk_size)
+                return digest, (is_valid_image(table.paths[i]) if digest is not None else False)
+            except Exception:
+                return None, False
+        flat_rows = [i for candidates in size_groups for i in candidates]
+        pool_wall, pool_cpu = time.perf_counter(), cpu_seconds()
+        pending = pool.map(hash_and_validate, flat_rows)
+    
+    for candidates in size_groups:
+        hashed_rows = []
+        for i in candidates:
+            path = table.paths[i]
+            try:
+                if pending is not None:
+                    digest, valid = next(pending)
+                else:
+                    with timer.stage('hash', files=1, nbytes=table.sizes[i]):
+                        digest = get_image_digest(path, hash_method, chunk_size=chunk_size)
+                if digest is None:
+                    mark_corrupt(path)
                     continue
-                    
-                file_info = {
-                    'path': meta['path'],
-                    'size': meta['size'],
-                    'shape': meta['shape'],
-                    'hash': file_hash,
-                    'mtime': os.path.getmtime(meta['path']) if os.path.exists(meta['path']) else 0,
-                    'is_corrupt': False
-                }
+                table.set_hash(i, digest)
                 
                 # 使用改进的图片验证方法
-                if not is_valid_image(meta['path']):
-                    file_info['is_corrupt'] = True
-                    corrupt_files.append(meta['path'])
+                if pending is None:
+                    with timer.stage('validate', files=1, nbytes=table.sizes[i]):
+                        valid = is_valid_image(path)
+                if not valid:
+                    table.corrupt[i] = 1
+                    mark_corrupt(path)
                 
-                file_details.append(file_info)
+                hashed_rows.append(i)
                 
             except Exception as e:
-                corrupt_files.append(meta['path'])
+                mark_corrupt(path)
         
-        # 按哈希值分组
-        hash_groups = {}
-        for file_info in file_details:
-            hash_groups.setdefault(file_info['hash'], []).append(file_info)
-        
-        # 只保留有重复的组
-        for hash_val, group in hash_groups.items():
-            if len(group) > 1:
-                img_groups.append(group)
+        # 按哈希值分组，只保留有重复的组
+        for group_rows in table.group_rows(hashed_rows, key=table.hash_key):
+            group = [_image_info(table, i, hash_method) for i in group_rows]
+            img_groups.append(group)
+            with timer.stage('report', files=len(group)):
+                report.group('img', group, hash=group[0]['hash'])
         
         processed_groups += 1
-        progress = 0.2 + 0.5 * (processed_groups / len(group_map))
+        progress = 0.2 + 0.5 * (processed_groups / groups_to_process)
         # progress_emit(progress)
+    if pool is not None:
+        pool.shutdown()
+        timer.add('hash_validate', files=len(flat_rows), nbytes=sum(table.sizes[i] for i in flat_rows),
+                  wall=time.perf_counter() - pool_wall, cpu=cpu_seconds() - pool_cpu)
     
     # 🔥 在这里添加哈希冲突检测 🔥
-    if img_groups:  # 只有当有重复组时才检测
+    # payload 哈希的重复组本来就允许字节不同（只差元数据），不做按大小/字节采样的冲突检测
+    if img_groups and size_key:  # 只有当有重复组时才检测
         log_emit("正在检测潜在的哈希冲突...")
-        collision_suspects = detect_potential_hash_collision(img_groups)
+        with timer.stage('collision_check', files=sum(len(g) for g in img_groups)):
+            collision_suspects = detect_potential_hash_collision(img_groups)
         if collision_suspects:
             logger.warning(f"发现 {len(collision_suspects)} 个可疑的哈希冲突文件")
             log_emit(f"⚠️ 发现 {len(collision_suspects)} 个可疑的哈希冲突文件，建议手动检查")
@@ -680,32 +996,20 @@ def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_c
     
     # 处理视频文件
     log_emit(tr('scanning_videos'))
-    video_meta = collect_videos(folder)
+    with timer.stage('video'):
+        video_meta = collect_videos(folder, jobs=tuning['jobs'])
     total_videos_scanned = len(video_meta)
+    timer.add('video', files=total_videos_scanned)
     log_emit(tr('videos_found', count=total_videos_scanned))
-    vid_groups = []
+    vid_groups = group_videos(video_meta)
+    for video_group in vid_groups:
+        with timer.stage('report', files=len(video_group)):
+            report.group('vid', video_group)
     
-    if video_meta:
-        # 按文件名和大小分组
-        video_group_map = {}
-        for meta in video_meta:
-            key = (meta['name'], meta['size'])
-            video_group_map.setdefault(key, []).append(meta)
-        
-        for group in video_group_map.values():
-            if len(group) > 1:
-                # 构建视频文件详细信息
-                video_group = []
-                for meta in group:
-                    video_info = {
-                        'path': meta['path'],
-                        'name': meta['name'],
-                        'size': meta['size'],
-                        'mtime': os.path.getmtime(meta['path']) if os.path.exists(meta['path']) else 0,
-                        'is_corrupt': False
-                    }
-                    video_group.append(video_info)
-                vid_groups.append(video_group)
+    # 拍摄时间索引（拍摄时间已在探测阶段读取），供时间线视图和后续阶段使用
+    with timer.stage('time_index'):
+        time_index = build_time_index(table, video_meta)
+    log_emit(tr('capture_time_found', count=len(time_index), total=total_images_scanned + total_videos_scanned))
     
     progress_emit(0.9)
     
@@ -727,11 +1031,20 @@ def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_c
         ) + sum(
             sum(file_info['size'] for file_info in group[1:])
             for group in vid_groups
-        )
+        ),
+        'files_with_taken': len(time_index),
     }
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
     
-    # 写报告文件 (保持兼容性)
-    _write_dedup_report(report_path, img_groups, vid_groups, stats)
+    # 结构化报告收尾，文本报告作为可选视图由其生成
+    # 报告中的 stages 记录到收尾之前；返回的 stats 另含收尾与文本报告的写入耗时
+    with timer.stage('report'):
+        report.close(stats)
+        if text_report:
+            render_text_report(jsonl_path, text_path, lang=LANG)
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
     
     log_emit(tr('analysis_complete'))
     progress_emit(1.0)
@@ -742,26 +1055,263 @@ def find_duplicates(folder, report_path, hash_method='md5', dry_run=False, log_c
         'stats': stats,
         'log': log,
         'progress': 1.0,
-        'corrupt_files': corrupt_files
+        'corrupt_files': corrupt_files,
+        'report_file': jsonl_path,
+        'time_index': time_index
     }
 
-def supplement_duplicates(main_folder, supplement_folder, report_path, hash_method='md5', dry_run=False, log_callback=None, progress_callback=None):
+# 外部排序模式的定长记录：键字段在前（大端编码，字节序即数值序），路径号（路径文件偏移）随后
+_SIZE_RECORD = struct.Struct('>QIIQdQd')  # 分组用大小（payload 哈希时为 0）, width, height | path_id, mtime, size, taken
+_SIZE_KEY = 16
+_VIDEO_RECORD = struct.Struct('>Q16sQdd')  # size, blake2b(name) | path_id, mtime, taken
+_VIDEO_KEY = 24
+_TAIL = struct.Struct('>QdBQd')            # 哈希记录的尾部：path_id, mtime, is_corrupt, size, taken（0 表示没有拍摄时间）
+PROBE_BATCH = 20000                       # 每批送入进程池探测的路径数
+
+def _probe_spool(spool, func, jobs):
+    """把路径文件中的路径分批送入进程池探测，按写入顺序产出 (路径号, 路径, 探测结果)"""
+    batch = []
+    for item in chain(spool, [None]):
+        if item is not None:
+            batch.append(item)
+            if len(batch) < PROBE_BATCH:
+                continue
+        if not batch:
+            break
+        probes = safe_multiprocess_operation(func, [p for _, p in batch], max_workers=jobs)
+        for (path_id, path), probe in zip(batch, probes):
+            yield path_id, path, probe
+        batch = []
+
+def _find_duplicates_external(folder, report_path, hash_method, dry_run, log_callback, progress_callback,
+                              text_report, jobs, io_threads, chunk_size, memory_limit, spill_dir):
     """
-    增补模式主流程：补充图片和视频并输出报告。
-    返回dict: {
-        'added_images': List[dict],  # 需要增补的图片详细信息
-        'skipped_images': List[dict],  # 已存在的图片
-        'added_videos': List[dict],  # 需要增补的视频
-        'skipped_videos': List[dict],  # 已存在的视频
-        'target_dirs': dict,  # 目标目录
-        'stats': dict,  # 统计信息
-        'log': List[str],
-        'progress': float,
-        'corrupt_files': List[str]
+    find_duplicates 的外部排序（out-of-core）实现，分组结果与内存模式一致。
+    路径只写入磁盘上的路径文件；(大小, 尺寸, 路径号) 和 (大小, 尺寸, 哈希, 路径号) 记录
+    超过内存预算时排序写成 run 文件，归并后取连续相同段得到候选组和重复组。
+    内存占用由 memory_limit 决定（不含解释器本身及单个分组），与图库大小无关。
+    返回值结构同 find_duplicates，其中 img_groups / vid_groups 为从报告流式读取的 ReportGroups 视图。
+    """
+    jsonl_path, text_path = report_paths(report_path)
+    with ReportWriter(jsonl_path, 'dedup', folder=folder, hash_method=hash_method, dry_run=dry_run,
+                      memory_limit=memory_limit) as report:
+        return _find_duplicates_external_run(report, folder, hash_method, dry_run, log_callback, progress_callback,
+                                             text_report, jobs, io_threads, chunk_size, memory_limit, spill_dir,
+                                             jsonl_path, text_path)
+
+def _find_duplicates_external_run(report, folder, hash_method, dry_run, log_callback, progress_callback, text_report,
+                                  jobs, io_threads, chunk_size, memory_limit, spill_dir, jsonl_path, text_path):
+    """_find_duplicates_external 的主体，分组与结果写入已打开的 report"""
+    from external_sort import SpillDir, PathSpool, ExternalSorter, duplicate_runs
+    corrupt_files = []
+    log = []
+    
+    def log_emit(msg):
+        log.append(msg)
+        if log_callback:
+            log_callback(msg)
+    
+    def progress_emit(value):
+        if progress_callback:
+            progress_callback(value)
+    
+    def mark_corrupt(path):
+        corrupt_files.append(path)
+        report.write('corrupt', path=path)
+    
+    if dry_run:
+        log_emit(tr('dry_run'))
+    log_emit(tr('external_mode', mb=memory_limit / 1024 / 1024))
+    timer = StageStats()
+    with timer.stage('tuning'):
+        tuning = _resolve_tuning(folder, jobs, io_threads, chunk_size, log_emit, timer)
+    chunk_size = tuning['chunk_size']
+    hash_width = _digest_size(hash_method)
+    # 同一时刻最多有两个排序器持有缓冲（候选组归并时写入哈希记录），各占一半预算
+    size_key = _size_sensitive(hash_method)
+    budget = max(memory_limit // 2, 1024 * 1024)
+    
+    with SpillDir(spill_dir) as spill:
+        # 遍历：图片与视频路径分别写入路径文件
+        log_emit(tr('scanning_images'))
+        images = PathSpool(spill, 'img_paths')
+        videos = PathSpool(spill, 'vid_paths')
+        with timer.stage('walk') as rec:
+            for path in iter_walk_directory(folder):
+                rec['files'] += 1
+                ext = os.path.splitext(path)[1].lower()
+                if ext in IMAGE_EXTS:
+                    images.append(path)
+                elif ext in VIDEO_EXTS:
+                    videos.append(path)
+        images.finish()
+        videos.finish()
+        logger.info(f"共发现图片文件 {images.count} 张")
+        progress_emit(0.1)
+        
+        # stat 与尺寸探测：分批送入进程池，结果写入按 (大小, 尺寸) 排序的记录
+        size_sorter = ExternalSorter(_SIZE_RECORD.size, budget, spill, 'size_run')
+        total_images_scanned = 0
+        files_with_taken = 0
+        with timer.stage('stat_probe', files=images.count):
+            for path_id, _, probe in _probe_spool(images, _probe_image, tuning['jobs']):
+                if not probe or probe[0] <= 0:
+                    continue
+                total_images_scanned += 1
+                size, mtime, shape, taken = probe
+                files_with_taken += 1 if taken else 0
+                if shape:
+                    size_sorter.add(_SIZE_RECORD.pack(size if size_key else 0, shape[0], shape[1],
+                                                      path_id, mtime, size, taken or 0.0))
+        log_emit(tr('images_found', count=total_images_scanned))
+        progress_emit(0.2)
+        
+        # 归并候选组（大小与尺寸相同），逐组计算哈希并验证，结果写入按 (大小, 尺寸, 哈希) 排序的记录
+        hash_sorter = ExternalSorter(_SIZE_KEY + hash_width + _TAIL.size, budget, spill, 'hash_run')
+        pool = _io_pool(tuning['io_threads'])
+        
+        def hash_and_validate(path):
+            try:
+                digest = get_image_digest(path, hash_method, chunk_size=chunk_size)
+                return digest, (is_valid_image(path) if digest is not None else False)
+            except Exception:
+                return None, False
+        
+        hashed_files = hashed_bytes = 0
+        wall0, cpu0 = time.perf_counter(), cpu_seconds()
+        for run in duplicate_runs(size_sorter.sorted_records(), _SIZE_KEY):
+            paths = [images[_SIZE_RECORD.unpack(r)[3]] for r in run]
+            results = pool.map(hash_and_validate, paths) if pool is not None else map(hash_and_validate, paths)
+            for r, path, (digest, valid) in zip(run, paths, results):
+                _, _, _, path_id, mtime, size, taken = _SIZE_RECORD.unpack(r)
+                hashed_files += 1
+                hashed_bytes += size
+                if digest is None:
+                    mark_corrupt(path)
+                    continue
+                if not valid:
+                    mark_corrupt(path)
+                hash_sorter.add(r[:_SIZE_KEY] + digest.ljust(hash_width, b'\0')[:hash_width]
+                                + _TAIL.pack(path_id, mtime, 0 if valid else 1, size, taken))
+        if pool is not None:
+            pool.shutdown()
+        timer.add('hash_validate', files=hashed_files, nbytes=hashed_bytes,
+                  wall=time.perf_counter() - wall0, cpu=cpu_seconds() - cpu0)
+        progress_emit(0.6)
+        
+        # 归并哈希记录得到重复组，逐组写入报告并做哈希冲突检测
+        total_img_groups = total_img_files = space_saved = collision_count = 0
+        with timer.stage('group') as rec:
+            for run in duplicate_runs(hash_sorter.sorted_records(), _SIZE_KEY + hash_width):
+                group = []
+                for r in run:
+                    _, width, height = struct.unpack('>QII', r[:_SIZE_KEY])
+                    path_id, mtime, corrupt, size, taken = _TAIL.unpack(r[_SIZE_KEY + hash_width:])
+                    group.append({
+                        'path': images[path_id],
+                        'size': size,
+                        'shape': (width, height),
+                        'hash': r[_SIZE_KEY:_SIZE_KEY + hash_width].hex(),
+                        'mtime': mtime,
+                        'taken': taken or None,
+                        'is_corrupt': bool(corrupt),
+                    })
+                rec['files'] += len(group)
+                total_img_groups += 1
+                total_img_files += len(group)
+                space_saved += sum(info['size'] for info in group[1:])
+                if size_key:
+                    collision_count += len(detect_potential_hash_collision([group]))
+                report.group('img', group, hash=group[0]['hash'])
+        if collision_count:
+            logger.warning(f"发现 {collision_count} 个可疑的哈希冲突文件")
+            log_emit(f"⚠️ 发现 {collision_count} 个可疑的哈希冲突文件，建议手动检查")
+        progress_emit(0.7)
+        
+        # 视频：按 (大小, 文件名) 排序归并，文件名以定长摘要代替
+        log_emit(tr('scanning_videos'))
+        video_sorter = ExternalSorter(_VIDEO_RECORD.size, budget, spill, 'vid_run')
+        total_videos_scanned = 0
+        total_vid_groups = total_vid_files = 0
+        with timer.stage('video', files=videos.count):
+            for path_id, path, probe in _probe_spool(videos, _probe_video, tuning['jobs']):
+                if not probe:
+                    continue
+                total_videos_scanned += 1
+                size, mtime, taken = probe
+                files_with_taken += 1 if taken else 0
+                name_key = hashlib.blake2b(os.path.basename(path).encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+                video_sorter.add(_VIDEO_RECORD.pack(size, name_key, path_id, mtime, taken or 0.0))
+            for run in duplicate_runs(video_sorter.sorted_records(), _VIDEO_KEY):
+                video_group = []
+                for r in run:
+                    size, _, path_id, mtime, taken = _VIDEO_RECORD.unpack(r)
+                    path = videos[path_id]
+                    video_group.append({'path': path, 'name': os.path.basename(path), 'size': size,
+                                        'mtime': mtime, 'taken': taken or None, 'is_corrupt': False})
+                total_vid_groups += 1
+                total_vid_files += len(video_group)
+                space_saved += sum(info['size'] for info in video_group[1:])
+                report.group('vid', video_group)
+        log_emit(tr('videos_found', count=total_videos_scanned))
+        log_emit(tr('capture_time_found', count=files_with_taken, total=total_images_scanned + total_videos_scanned))
+        
+        sorters = (size_sorter, hash_sorter, video_sorter)
+        log_emit(tr('external_sort_done', runs=sum(s.spilled_runs for s in sorters),
+                    mb=sum(s.spilled_bytes for s in sorters) / 1024 / 1024))
+        images.close()
+        videos.close()
+    progress_emit(0.9)
+    
+    stats = {
+        'total_img_groups': total_img_groups,
+        'total_img_files': total_img_files,
+        'total_vid_groups': total_vid_groups,
+        'total_vid_files': total_vid_files,
+        'total_images_scanned': total_images_scanned,
+        'total_videos_scanned': total_videos_scanned,
+        'corrupt_files_count': len(corrupt_files),
+        'potential_space_saved': space_saved,
+        'files_with_taken': files_with_taken,
+        'spilled_runs': sum(s.spilled_runs for s in sorters),
+        'spilled_bytes': sum(s.spilled_bytes for s in sorters),
     }
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
+    
+    # 收尾与文本报告：文本报告由报告流式生成，分组不载入内存
+    with timer.stage('report'):
+        report.close(stats)
+        result = read_report(jsonl_path, lazy_groups=True)
+        if text_report:
+            render_text_report(result, text_path, lang=LANG)
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
+    
+    log_emit(tr('analysis_complete'))
+    progress_emit(1.0)
+    
+    return {
+        'img_groups': result['img_groups'],
+        'vid_groups': result['vid_groups'],
+        'stats': stats,
+        'log': log,
+        'progress': 1.0,
+        'corrupt_files': corrupt_files,
+        'report_file': jsonl_path,
+        'time_index': None
+    }
+
+def merge_shard_indexes(folder, index_paths, report_path, dry_run=False, log_callback=None, progress_callback=None, text_report=True):
+    """
+    合并分片扫描（shard_index.scan_shard）写出的部分索引，跨分片计算重复组并输出去重报告。
+    folder 为合并所在主机上的根目录，索引中的相对路径拼接到它之下。
+    分片扫描不做图片验证，这里只验证重复组中的文件；返回值结构同 find_duplicates。
     """
+    from shard_index import read_shard_indexes
     log = []
     corrupt_files = []
+    
     def log_emit(msg):
         log.append(msg)
         if log_callback:
@@ -771,60 +1321,182 @@ def supplement_duplicates(main_folder, supplement_folder, report_path, hash_meth
         if progress_callback:
             progress_callback(value)
     
+    timer = StageStats()
+    with timer.stage('merge_read'):
+        shards, hash_method, indexes = read_shard_indexes(index_paths)
+    root = normalize_path(folder)
+    log_emit(tr('shard_merging', count=len(indexes), root=root))
+    jsonl_path, text_path = report_paths(report_path)
+    with ReportWriter(jsonl_path, 'dedup', folder=folder, hash_method=hash_method, dry_run=dry_run,
+                      shards=shards) as report:
+        return _merge_shard_indexes_run(report, dry_run, text_report, log, corrupt_files, log_emit, progress_emit,
+                                        timer, root, jsonl_path, text_path, shards, hash_method, indexes)
+
+def _merge_shard_indexes_run(report, dry_run, text_report, log, corrupt_files, log_emit, progress_emit, timer, root,
+                             jsonl_path, text_path, shards, hash_method, indexes):
+    """merge_shard_indexes 读取并校验索引之后的主体，分组与结果写入已打开的 report"""
+    
+    def mark_corrupt(path):
+        corrupt_files.append(path)
+        report.write('corrupt', path=path)
+    
     if dry_run:
         log_emit(tr('dry_run'))
     
-    # 扫描主文件夹
-    main_meta = collect_images(main_folder)
-    progress_emit(0.2)
-    
-    # 扫描补充文件夹  
-    supplement_meta = collect_images(supplement_folder)
+    # 各分片的记录按分片号顺序合并为一个列式表
+    table = ImageTable(_digest_size(hash_method))
+    video_meta = []
+    with timer.stage('merge_read') as rec:
+        for header, files in indexes:
+            for info in files:
+                path = os.path.join(root, *info['rel'].split('/'))
+                if info['kind'] == 'vid':
+                    video_meta.append({'path': path, 'size': info['size'], 'mtime': info['mtime'],
+                                       'name': os.path.basename(path), 'taken': info.get('taken')})
+                    continue
+                if info.get('hash_failed'):
+                    mark_corrupt(path)
+                i = len(table)
+                table.append(path, info['size'], info['mtime'], info.get('shape'), info.get('taken'))
+                if info.get('hash'):
+                    table.set_hash(i, bytes.fromhex(info['hash']))
+            rec['files'] += len(files)
+    total_images_scanned = len(table)
+    log_emit(tr('images_found', count=total_images_scanned))
     progress_emit(0.3)
     
-    log_emit(tr('main_img_count', main=len(main_meta), supp=len(supplement_meta)))
+    # 按 (大小, 尺寸, 哈希) 分组，只验证重复组中的文件
+    img_groups = []
+    with timer.stage('group') as rec:
+        rows = [i for i in range(len(table)) if table.has_hash[i]]
+        size_key = _size_sensitive(hash_method)
+        hash_groups = table.group_rows(
+            rows, key=lambda i: (table.sizes[i] if size_key else 0, table.widths[i], table.heights[i], table.hash_key(i)))
+        rec['files'] += len(rows)
+    for group_rows in hash_groups:
+        for i in group_rows:
+            with timer.stage('validate', files=1, nbytes=table.sizes[i]):
+                valid = is_valid_image(table.paths[i])
+            if not valid:
+                table.corrupt[i] = 1
+                mark_corrupt(table.paths[i])
+        group = [_image_info(table, i, hash_method) for i in group_rows]
+        img_groups.append(group)
+        with timer.stage('report', files=len(group)):
+            report.group('img', group, hash=group[0]['hash'])
+    progress_emit(0.7)
     
-    # 构建主文件夹哈希集合
-    main_hashes = set()
-    for idx, meta in enumerate(main_meta):
-        try:
-            file_hash = get_image_hash(meta['path'], hash_method)
-            if file_hash:
-                main_hashes.add(file_hash)
-        except Exception as e:
-            log_emit(tr('hash_fail', path=meta['path'], err=e))
-        
-        # 🔥 优化进度更新：确保即使文件少也有进度反馈
-        if len(main_meta) > 0:
-            progress = 0.3 + 0.3 * ((idx + 1) / len(main_meta))
-            progress_emit(progress)
+    if img_groups and size_key:
+        log_emit("正在检测潜在的哈希冲突...")
+        with timer.stage('collision_check', files=sum(len(g) for g in img_groups)):
+            collision_suspects = detect_potential_hash_collision(img_groups)
+        if collision_suspects:
+            logger.warning(f"发现 {len(collision_suspects)} 个可疑的哈希冲突文件")
+            log_emit(f"⚠️ 发现 {len(collision_suspects)} 个可疑的哈希冲突文件，建议手动检查")
     
-    log_emit(tr('main_hash_done', count=len(main_hashes)))
-    progress_emit(0.6)
+    total_videos_scanned = len(video_meta)
+    log_emit(tr('videos_found', count=total_videos_scanned))
+    vid_groups = group_videos(video_meta)
+    for video_group in vid_groups:
+        with timer.stage('report', files=len(video_group)):
+            report.group('vid', video_group)
+    with timer.stage('time_index'):
+        time_index = build_time_index(table, video_meta)
+    log_emit(tr('capture_time_found', count=len(time_index), total=total_images_scanned + total_videos_scanned))
+    progress_emit(0.9)
     
-    # 处理补充文件夹的图片
-    added_images = []
-    skipped_images = []
+    stats = {
+        'total_img_groups': len(img_groups),
+        'total_img_files': sum(len(group) for group in img_groups),
+        'total_vid_groups': len(vid_groups),
+        'total_vid_files': sum(len(group) for group in vid_groups),
+        'total_images_scanned': total_images_scanned,
+        'total_videos_scanned': total_videos_scanned,
+        'corrupt_files_count': len(corrupt_files),
+        'potential_space_saved': sum(
+            sum(file_info['size'] for file_info in group[1:])
+            for group in img_groups + vid_groups
+        ),
+        'files_with_taken': len(time_index),
+        'shards': shards,
+        'shard_scans': [{'shard': header['shard'], 'host': header.get('host'),
+                         'elapsed_seconds': header.get('stats', {}).get('elapsed_seconds')}
+                        for header, _ in indexes],
+    }
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
     
-    timestamp = time.strftime('%Y%m%d_%H%M%S')
-    supplement_dir = os.path.join(main_folder, tr('supp_dir', timestamp=timestamp))
+    with timer.stage('report'):
+        report.close(stats)
+        if text_report:
+            render_text_report(jsonl_path, text_path, lang=LANG)
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
+    
+    log_emit(tr('analysis_complete'))
+    progress_emit(1.0)
+    
+    return {
+        'img_groups': img_groups,
+        'vid_groups': vid_groups,
+        'stats': stats,
+        'log': log,
+        'progress': 1.0,
+        'corrupt_files': corrupt_files,
+        'report_file': jsonl_path,
+        'time_index': time_index
+    }
+
+def _verify_corrupt(path):
+    """增补模式的快速完整性检查（PIL verify），返回是否损坏"""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        return False
+    except Exception:
+        return True
+
+def _supplement_source_images(rank, supplement_meta, supp_tuning, hash_method, supplement_dir, main_hashes, winners,
+                              added_images, skipped_images, duplicate_images, timer, report, log_emit, mark_corrupt,
+                              target_names):
+    """
+    增补模式中处理一个补充文件夹（优先级 rank，从 0 开始）的图片，结果追加到三个列表并写入报告。
+    winners 记录之前已胜出的补充文件（摘要 -> 路径），target_names 为胜出文件分配不重名的目标路径，
+    二者在各补充文件夹之间共享。
+    """
+    # io_threads > 1 时哈希与验证在线程池中进行，合并计为 hash_validate 阶段
+    pool = _io_pool(supp_tuning['io_threads'])
+    pending = None
+    if pool is not None:
+        def supp_check(path):
+            try:
+                digest = get_image_digest(path, hash_method, chunk_size=supp_tuning['chunk_size'])
+                return digest, (_verify_corrupt(path) if digest else False)
+            except Exception:
+                return None, False
+        pool_wall, pool_cpu = time.perf_counter(), cpu_seconds()
+        pending = pool.map(supp_check, supplement_meta.paths)
     
-    for idx, meta in enumerate(supplement_meta):
+    for idx in range(len(supplement_meta)):
+        meta = supplement_meta.record(idx)
         try:
-            file_hash = get_image_hash(meta['path'], hash_method)
-            if not file_hash:
+            if pending is not None:
+                digest, is_corrupt = next(pending)
+            else:
+                with timer.stage('hash', files=1, nbytes=meta['size']):
+                    digest = get_image_digest(meta['path'], hash_method, chunk_size=supp_tuning['chunk_size'])
+            if not digest:
                 log_emit(tr('supp_hash_fail', path=meta['path']))
-                corrupt_files.append(meta['path'])
+                mark_corrupt(meta['path'])
                 continue
             
             # 验证图片是否损坏
-            is_corrupt = False
-            try:
-                with Image.open(meta['path']) as img:
-                    img.verify()
-            except Exception:
-                is_corrupt = True
-                corrupt_files.append(meta['path'])
+            if pending is None:
+                with timer.stage('validate', files=1, nbytes=meta['size']):
+                    is_corrupt = _verify_corrupt(meta['path'])
+            if is_corrupt:
+                mark_corrupt(meta['path'])
             
             base_name = os.path.basename(meta['path'])
             target_path = os.path.join(supplement_dir, base_name)
@@ -834,30 +1506,186 @@ def supplement_duplicates(main_folder, supplement_folder, report_path, hash_meth
                 'target_path': target_path,
                 'size': meta['size'],
                 'shape': meta['shape'],
-                'hash': file_hash,
-                'mtime': os.path.getmtime(meta['path']) if os.path.exists(meta['path']) else 0,
-                'is_corrupt': is_corrupt
+                'hash': digest.hex(),
+                'mtime': supplement_meta.mtimes[idx],
+                'taken': supplement_meta.taken(idx),
+                'is_corrupt': is_corrupt,
+                'source': rank
             }
             
-            if file_hash in main_hashes:
+            if digest in main_hashes:
                 skipped_images.append(file_info)
                 log_emit(tr('supp_exists', path=meta['path']))
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='img', status='skipped', **file_info)
+            elif digest in winners:
+                file_info['duplicate_of'] = winners[digest]
+                duplicate_images.append(file_info)
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='img', status='duplicate', **file_info)
             else:
+                # 不同来源可能有同名文件，胜出文件的目标名在这里去重，移动时沿用
+                file_info['target_path'] = target_names.reserve(supplement_dir, base_name)
+                winners[digest] = meta['path']
                 added_images.append(file_info)
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='img', status='added', **file_info)
         
         except Exception as e:
             log_emit(tr('hash_fail', path=meta['path'], err=e))
-            corrupt_files.append(meta['path'])
+            mark_corrupt(meta['path'])
+    if pool is not None:
+        pool.shutdown()
+        timer.add('hash_validate', files=len(supplement_meta), nbytes=sum(supplement_meta.sizes),
+                  wall=time.perf_counter() - pool_wall, cpu=cpu_seconds() - pool_cpu)
+
+def supplement_duplicates(main_folder, supplement_folder, report_path, hash_method='md5', dry_run=False, log_callback=None, progress_callback=None, text_report=True,
+                          jobs=None, io_threads=None, chunk_size=None):
+    """
+    增补模式主流程：补充图片和视频并输出报告。
+    每个补充文件的判定结果流式写入结构化报告（.jsonl），文本报告为可选视图。
+    supplement_folder 可以是按优先级排列的多个补充文件夹（列表），一次扫描给出统一的增补计划：
+    主文件夹已有的文件为 skipped；补充文件夹之间（或同一文件夹内）内容相同的文件只增补优先级最高、
+    同一文件夹内最先遍历到的一份，其余为 duplicate，并以 duplicate_of 指向胜出的文件。
+    每个文件只计算一次哈希；主文件夹中只有大小与某个补充文件相同的图片才需要计算哈希。
+    jobs / io_threads / chunk_size 同 find_duplicates，'auto' 时各文件夹按各自所在设备分别取值。
+    返回dict: {
+        'added_images': List[dict],  # 需要增补的图片详细信息（含 source：补充文件夹序号）
+        'skipped_images': List[dict],  # 已存在的图片
+        'duplicate_images': List[dict],  # 与更高优先级补充文件重复的图片
+        'added_videos': List[dict],  # 需要增补的视频
+        'skipped_videos': List[dict],  # 已存在的视频
+        'duplicate_videos': List[dict],  # 与更高优先级补充文件重复的视频
+        'target_dirs': dict,  # 目标目录
+        'stats': dict,  # 统计信息
+        'log': List[str],
+        'progress': float,
+        'corrupt_files': List[str],
+        'report_file': str  # 结构化报告路径
+    }
+    """
+    sources = [supplement_folder] if isinstance(supplement_folder, str) else list(supplement_folder)
+    
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
+    supplement_dir = os.path.join(main_folder, tr('supp_dir', timestamp=timestamp))
+    mp4_dir = os.path.join(main_folder, f'MP4_{timestamp}')
+    target_dirs = {
+        'supplement_dir': supplement_dir,
+        'mp4_dir': mp4_dir
+    }
+    jsonl_path, text_path = report_paths(report_path)
+    with ReportWriter(jsonl_path, 'supplement', main_folder=main_folder,
+                      supplement_folder=supplement_folder, sources=sources, hash_method=hash_method,
+                      dry_run=dry_run, target_dirs=target_dirs) as report:
+        return _supplement_duplicates_run(report, main_folder, report_path, hash_method, dry_run, log_callback,
+                                          progress_callback, text_report, jobs, io_threads, chunk_size, sources,
+                                          supplement_dir, mp4_dir, target_dirs, jsonl_path, text_path)
+
+def _supplement_duplicates_run(report, main_folder, report_path, hash_method, dry_run, log_callback, progress_callback,
+                               text_report, jobs, io_threads, chunk_size, sources, supplement_dir, mp4_dir, target_dirs,
+                               jsonl_path, text_path):
+    """supplement_duplicates 的主体，增补计划写入已打开的 report"""
+    log = []
+    corrupt_files = []
+    
+    def log_emit(msg):
+        log.append(msg)
+        if log_callback:
+            log_callback(msg)
+    
+    def progress_emit(value):
+        if progress_callback:
+            progress_callback(value)
+    
+    def mark_corrupt(path):
+        corrupt_files.append(path)
+        report.write('corrupt', path=path)
+    
+    if dry_run:
+        log_emit(tr('dry_run'))
+    timer = StageStats()
+    with timer.stage('tuning'):
+        main_tuning = _resolve_tuning(main_folder, jobs, io_threads, chunk_size, log_emit, timer)
+        source_tunings = [_resolve_tuning(folder, jobs, io_threads, chunk_size, log_emit, timer) for folder in sources]
+    
+    # 扫描主文件夹（列式表）
+    main_meta = collect_image_table(main_folder, stats=timer, jobs=main_tuning['jobs'])
+    progress_emit(0.2)
+    
+    # 按优先级扫描各补充文件夹
+    source_metas = [collect_image_table(folder, stats=timer, jobs=tuning['jobs'])
+                    for folder, tuning in zip(sources, source_tunings)]
+    supplement_count = sum(len(meta) for meta in source_metas)
+    progress_emit(0.3)
+    
+    log_emit(tr('main_img_count', main=len(main_meta), supp=supplement_count))
+    if len(sources) > 1:
+        for rank, (folder, meta) in enumerate(zip(sources, source_metas), 1):
+            log_emit(tr('supp_source', rank=rank, folder=folder, count=len(meta)))
+    
+    # 构建主文件夹哈希集合（原始摘要字节，比十六进制字符串省一半以上内存）
+    # 内容相同的文件大小必然相同，只对大小与某个补充图片相同的主文件夹图片计算哈希（payload 哈希除外）
+    supplement_sizes = set()
+    for meta in source_metas:
+        supplement_sizes.update(meta.sizes)
+    main_rows = [i for i in range(len(main_meta))
+                 if main_meta.sizes[i] in supplement_sizes or not _size_sensitive(hash_method)]
+    main_hashes = set()
+    # io_threads > 1 时在线程池中按顺序预先计算哈希，整个循环计为 hash 阶段
+    pool = _io_pool(main_tuning['io_threads'])
+    pending = None
+    if pool is not None:
+        def main_digest(i):
+            try:
+                return get_image_digest(main_meta.paths[i], hash_method, chunk_size=main_tuning['chunk_size'])
+            except Exception:
+                return None
+        pool_wall, pool_cpu = time.perf_counter(), cpu_seconds()
+        pending = pool.map(main_digest, main_rows)
+    for n, idx in enumerate(main_rows):
+        path = main_meta.paths[idx]
+        try:
+            if pending is not None:
+                digest = next(pending)
+            else:
+                with timer.stage('hash', files=1, nbytes=main_meta.sizes[idx]):
+                    digest = get_image_digest(path, hash_method, chunk_size=main_tuning['chunk_size'])
+            if digest:
+                main_hashes.add(digest)
+        except Exception as e:
+            log_emit(tr('hash_fail', path=path, err=e))
         
-        # 🔥 优化进度更新：每个文件都更新进度
-        if len(supplement_meta) > 0:
-            progress = 0.6 + 0.15 * ((idx + 1) / len(supplement_meta))  # 给后续步骤留出进度空间
-            # progress_emit(progress)
+        # 🔥 优化进度更新：确保即使文件少也有进度反馈
+        progress = 0.3 + 0.3 * ((n + 1) / len(main_rows))
+        progress_emit(progress)
+    if pool is not None:
+        pool.shutdown()
+        timer.add('hash', files=len(main_rows), nbytes=sum(main_meta.sizes[i] for i in main_rows),
+                  wall=time.perf_counter() - pool_wall, cpu=cpu_seconds() - pool_cpu)
+    
+    log_emit(tr('main_hash_done', count=len(main_hashes)))
+    progress_emit(0.6)
+    
+    # 按优先级处理各补充文件夹的图片：已在主文件夹中为 skipped，
+    # 与之前处理过的补充文件内容相同为 duplicate，其余为 added（胜出的一份）
+    added_images = []
+    skipped_images = []
+    duplicate_images = []
+    winners = {}  # 摘要 -> 胜出的补充文件路径
+    target_names = TargetNames()
+    
+    for rank, (supplement_meta, supp_tuning) in enumerate(zip(source_metas, source_tunings)):
+        _supplement_source_images(rank, supplement_meta, supp_tuning, hash_method, supplement_dir, main_hashes,
+                                  winners, added_images, skipped_images, duplicate_images,
+                                  timer, report, log_emit, mark_corrupt, target_names)
     
     # 🔥 在这里添加增补模式的哈希冲突检测 🔥
     log_emit("正在检测补充文件的哈希冲突...")
     progress_emit(0.75)  # 补充文件处理完成
-    collision_suspects = detect_supplement_hash_collision(added_images, skipped_images, main_hashes)
+    collision_suspects = []
+    if _size_sensitive(hash_method):
+        with timer.stage('collision_check', files=len(added_images) + len(skipped_images) + len(duplicate_images)):
+            collision_suspects = detect_supplement_hash_collision(added_images, skipped_images + duplicate_images, main_hashes)
     if collision_suspects:
         logger.warning(f"在补充文件中发现 {len(collision_suspects)} 个可疑的哈希冲突文件")
         log_emit(f"⚠️ 在补充文件中发现 {len(collision_suspects)} 个可疑的哈希冲突文件，建议手动检查")
@@ -866,37 +1694,51 @@ def supplement_duplicates(main_folder, supplement_folder, report_path, hash_meth
     
     # 处理视频文件
     log_emit("正在处理视频文件...")
-    main_videos = collect_videos(main_folder)
-    supplement_videos = collect_videos(supplement_folder)
+    with timer.stage('video'):
+        main_videos = collect_videos(main_folder, jobs=main_tuning['jobs'])
+        source_videos = [collect_videos(folder, jobs=tuning['jobs']) for folder, tuning in zip(sources, source_tunings)]
+    supplement_video_count = sum(len(videos) for videos in source_videos)
+    timer.add('video', files=len(main_videos) + supplement_video_count)
     
     main_video_keys = set((v['name'], v['size']) for v in main_videos)
-    mp4_dir = os.path.join(main_folder, f'MP4_{timestamp}')
+    video_winners = {}
     
     added_videos = []
     skipped_videos = []
+    duplicate_videos = []
     
-    for meta in supplement_videos:
-        key = (meta['name'], meta['size'])
-        target_path = os.path.join(mp4_dir, meta['name'])
-        
-        video_info = {
-            'path': meta['path'],
-            'target_path': target_path,
-            'name': meta['name'],
-            'size': meta['size'],
-            'mtime': os.path.getmtime(meta['path']) if os.path.exists(meta['path']) else 0,
-            'is_corrupt': False
-        }
-        
-        if key in main_video_keys:
-            skipped_videos.append(video_info)
-            log_emit(tr('vid_supp_exists', path=meta['path']))
-        else:
-            added_videos.append(video_info)
-        # 🔥 为视频处理添加进度更新
-        if len(supplement_videos) > 0:
-            progress = 0.80 + 0.1 * ((idx + 1) / len(supplement_videos))
-            # progress_emit(progress)
+    for rank, supplement_videos in enumerate(source_videos):
+        for meta in supplement_videos:
+            key = (meta['name'], meta['size'])
+            target_path = os.path.join(mp4_dir, meta['name'])
+            
+            video_info = {
+                'path': meta['path'],
+                'target_path': target_path,
+                'name': meta['name'],
+                'size': meta['size'],
+                'mtime': meta['mtime'],
+                'taken': meta.get('taken'),
+                'is_corrupt': False,
+                'source': rank
+            }
+            
+            if key in main_video_keys:
+                skipped_videos.append(video_info)
+                log_emit(tr('vid_supp_exists', path=meta['path']))
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='vid', status='skipped', **video_info)
+            elif key in video_winners:
+                video_info['duplicate_of'] = video_winners[key]
+                duplicate_videos.append(video_info)
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='vid', status='duplicate', **video_info)
+            else:
+                video_info['target_path'] = target_names.reserve(mp4_dir, meta['name'])
+                video_winners[key] = meta['path']
+                added_videos.append(video_info)
+                with timer.stage('report', files=1):
+                    report.write('supp_file', kind='vid', status='added', **video_info)
 
     progress_emit(0.90)  # 视频处理完成
     
@@ -908,22 +1750,27 @@ def supplement_duplicates(main_folder, supplement_folder, report_path, hash_meth
 
     stats = {
         'main_scanned': len(main_meta) + len(main_videos),  # 🔥 加上视频数量
-        'supplement_scanned': len(supplement_meta) + len(supplement_videos),  # 🔥 加上视频数量
+        'supplement_scanned': supplement_count + supplement_video_count,  # 🔥 加上视频数量
         'images_to_add': len(added_images),
         'images_skipped': len(skipped_images),
+        'images_duplicate': len(duplicate_images),
         'videos_to_add': len(added_videos),
         'videos_skipped': len(skipped_videos),
+        'videos_duplicate': len(duplicate_videos),
+        'sources': len(sources),
         'total_add_size': total_add_size,
         'corrupt_files_count': len(corrupt_files)
     }
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
     
-    target_dirs = {
-        'supplement_dir': supplement_dir,
-        'mp4_dir': mp4_dir
-    }
-    
-    # 写报告文件 (保持兼容性)
-    _write_supplement_report(report_path, added_images, skipped_images, added_videos, skipped_videos, target_dirs, stats, dry_run, corrupt_files)
+    # 结构化报告收尾，文本报告作为可选视图由其生成
+    with timer.stage('report'):
+        report.close(stats)
+        if text_report:
+            render_text_report(jsonl_path, text_path, lang=LANG)
+    stats['elapsed_seconds'] = round(timer.elapsed(), 3)
+    stats['stages'] = timer.to_dict()
     
     log_emit(tr('dedup_done', path=report_path))
     progress_emit(1.0)  # 最终完成
@@ -931,75 +1778,14 @@ def supplement_duplicates(main_folder, supplement_folder, report_path, hash_meth
     return {
         'added_images': added_images,
         'skipped_images': skipped_images,
+        'duplicate_images': duplicate_images,
         'added_videos': added_videos,
         'skipped_videos': skipped_videos,
+        'duplicate_videos': duplicate_videos,
         'target_dirs': target_dirs,
         'stats': stats,
         'log': log,
         'progress': 1.0,
-        'corrupt_files': corrupt_files
+        'corrupt_files': corrupt_files,
+        'report_file': jsonl_path
     }
-
-def _write_dedup_report(report_path, img_groups, vid_groups, stats):
-    """写入去重报告文件"""
-    with open(report_path, 'w', encoding='utf-8') as f:
-        if LANG == 'zh':
-            f.write('去重图片报告\n\n')
-            f.write(f'共检测到{stats["total_img_groups"]}组重复图片，共{stats["total_img_files"]}张图片\n\n')
-        else:
-            f.write('Deduplication Report\n\n')
-            f.write(f'{stats["total_img_groups"]} duplicate image groups, {stats["total_img_files"]} images in total\n\n')
-        
-        if img_groups:
-            for group_id, group in enumerate(img_groups, 1):
-                f.write(f'重复图片组{group_id} (哈希: {group[0]["hash"]}):\n' if LANG == 'zh' else f'Duplicate Image Group {group_id} (hash: {group[0]["hash"]}):\n')
-                for file_info in group:
-                    f.write(f"    {file_info['path']}\n")
-                f.write("\n")
-        else:
-            f.write('未发现重复图片\n\n' if LANG == 'zh' else 'No duplicate images found\n\n')
-        
-        if LANG == 'zh':
-            f.write(f'共检测到{stats["total_vid_groups"]}组重复视频，共{stats["total_vid_files"]}个视频\n\n')
-        else:
-            f.write(f'{stats["total_vid_groups"]} duplicate video groups, {stats["total_vid_files"]} videos in total\n\n')
-        
-        if vid_groups:
-            for idx, group in enumerate(vid_groups, 1):
-                f.write(f'视频重复组{idx}:\n' if LANG == 'zh' else f'Duplicate Video Group {idx}:\n')
-                for file_info in group:
-                    f.write(f"    {file_info['path']}\n")
-                f.write("\n")
-        else:
-            f.write('未发现重复视频\n' if LANG == 'zh' else 'No duplicate videos found\n')
-
-def _write_supplement_report(report_path, added_images, skipped_images, added_videos, skipped_videos, target_dirs, stats, dry_run, corrupt_files=None):
-    """写入增补报告文件"""
-    with open(report_path, 'w', encoding='utf-8') as f:
-        if dry_run:
-            f.write(tr('dry_run') + '\n\n')
-        f.write(tr('supp_report') + '\n\n')
-        f.write(tr('supp_img_success', count=len(added_images), dir=target_dirs['supplement_dir']) + '\n')
-        
-        for img in added_images:
-            f.write(f"    {img['path']}\n")
-        
-        f.write(tr('supp_img_exists', count=len(skipped_images)) + '\n')
-        for img in skipped_images:
-            f.write(f"    {img['path']}\n")
-        
-        f.write(tr('supp_vid_success', count=len(added_videos), dir=target_dirs['mp4_dir']) + '\n')
-        for vid in added_videos:
-            f.write(f"    {vid['path']}\n")
-        
-        f.write(tr('supp_vid_exists', count=len(skipped_videos)) + '\n')
-        for vid in skipped_videos:
-            f.write(f"    {vid['path']}\n")
-        
-                # 🔥 添加损坏文件详细信息
-        if corrupt_files and len(corrupt_files) > 0:
-            f.write(f"\n❌ 发现 {len(corrupt_files)} 个损坏或无法处理的文件：\n")
-            f.write("=" * 60 + "\n")
-            for idx, corrupt_file in enumerate(corrupt_files, 1):
-                f.write(f"{idx:3d}. {corrupt_file}\n")
-            f.write("\n建议：请检查这些文件是否确实损坏，如果确认损坏请删除或修复。\n\n")
\ No newline at end of file
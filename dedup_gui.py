@@ -1,3 +1,6 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # 冷启动计时起点，用于测量首次绘制耗时
+
 from translations import tr, set_language, get_language, LANG
 import sys
 import os
@@ -6,37 +9,39 @@ import subprocess
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QListWidget, QListWidgetItem,
     QFileDialog, QCheckBox, QMessageBox, QScrollArea, QGroupBox, QDialog, QComboBox, QTabWidget, QLineEdit, QFrame,
-    QTextEdit, QProgressBar, QInputDialog, QMenu, QSplitter
+    QTextEdit, QProgressBar, QInputDialog, QMenu, QSplitter, QTableView, QHeaderView, QAbstractItemView,
+    QStyledItemDelegate, QStyle
+)
+from PyQt5.QtGui import QPixmap, QImage, QImageReader
+from PyQt5.QtCore import (
+    Qt, QThread, pyqtSignal, QAbstractListModel, QModelIndex, QSize, QRect, QTimer,
+    QObject, QRunnable, QThreadPool, QBuffer, QIODevice
 )
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QPalette, QColor
-from PIL import Image, UnidentifiedImageError
-Image.MAX_IMAGE_PIXELS = 1400000000  # 例如允许4.2亿像素图片
 
 import re
 import threading
 import traceback
-import importlib.util
-import tempfile
-import time
+from collections import OrderedDict
 import logging
 
 # 在文件开头添加全局变量
 FFMPEG_AVAILABLE = None
+FIRST_PAINT_TARGET = 0.5  # 秒，冷启动到窗口首次绘制的目标耗时
+PIL_MAX_IMAGE_PIXELS = 1400000000  # 例如允许4.2亿像素图片
 
-# 添加logger定义
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler('photo_tool.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 添加logger定义（日志输出由 __main__ 中的 compare.setup_logging 配置）
 logger = logging.getLogger(__name__)  # 新增logger定义
 
-from compare import find_duplicates, supplement_duplicates #, collect_images, collect_videos 这两个函数包含多进程代码，在GUI环境中会导致pickle错误
+from structured_report import read_report, report_paths, is_structured_report
+from strategies import STRATEGIES, select_keepers
+from file_ops import batch_delete, batch_move, batch_link, video_decodes
+from thumbnails import (
+    get_default_cache, exif_thumbnail, count_render,
+    GROUP_THUMB_SIZE, VIDEO_THUMB_SIZE, LIST_THUMB_SIZE, VIDEO_WORKERS
+)
+# compare 与 PIL 不在启动时导入：窗口绘制后由 StartupProbeThread 在后台预先导入，
+# 各处使用时再 import（已加载则直接取 sys.modules）。
 
 
 def check_ffmpeg_available():
@@ -54,18 +59,16 @@ def check_ffmpeg_available():
         return False
     
 
-THUMBNAIL_DIR = '.thumbnails'
-os.makedirs(THUMBNAIL_DIR, exist_ok=True)
-# 动态导入 compare.py 的 find_duplicates
-spec = importlib.util.spec_from_file_location("compare", "compare.py")
-compare = importlib.util.module_from_spec(spec)
-sys.modules["compare"] = compare
-spec.loader.exec_module(compare)
 
-def get_video_thumbnail(video_path, width=240, height=180):
-    """
-    改进的视频缩略图生成，包含ffmpeg检查
-    """
+def load_pil_image():
+    """导入 PIL.Image 并放宽像素上限（只在第一次调用时设置）"""
+    from PIL import Image
+    if Image.MAX_IMAGE_PIXELS != PIL_MAX_IMAGE_PIXELS:
+        Image.MAX_IMAGE_PIXELS = PIL_MAX_IMAGE_PIXELS
+    return Image
+
+def _video_thumbnail_bytes(video_path, size):
+    """经磁盘缓存取得视频缩略图的 JPEG 字节，ffmpeg 不可用或失败时返回 None"""
     global FFMPEG_AVAILABLE
     
     # 懒加载检查ffmpeg
@@ -74,54 +77,156 @@ def get_video_thumbnail(video_path, width=240, height=180):
         if not FFMPEG_AVAILABLE:
             logger.warning("未检测到ffmpeg，视频缩略图功能将不可用")
     
-    # 如果ffmpeg不可用，返回空的QPixmap
-    if not FFMPEG_AVAILABLE:
-        return QPixmap()
-    
-    if not os.path.exists(video_path):
-        return QPixmap()
-    
-    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-        thumb_path = tmp.name
-    
+    if not FFMPEG_AVAILABLE or not os.path.exists(video_path):
+        return None
+    return get_default_cache().get_or_create(video_path, size, 'video')
+
+
+def get_video_thumbnail(video_path, width=240, height=180):
+    """
+    视频缩略图（QPixmap），命中磁盘缓存时不启动 ffmpeg
+    """
+    pix = QPixmap()
+    data = _video_thumbnail_bytes(video_path, max(width, height))
+    if data and pix.loadFromData(data):
+        if pix.width() > width or pix.height() > height:
+            pix = pix.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return pix
+
+
+def read_scaled_image(path, max_w, max_h):
+    """
+    按目标尺寸解码图片：先读文件头得到原始尺寸，再让 QImageReader 直接输出缩放结果，
+    JPEG 会在 DCT 域降采样，不必先解码全分辨率。Qt 无法读取的格式用 PIL draft() 兜底。
+    """
+    reader = QImageReader(path)
+    src = reader.size()
+    if src.isValid() and (src.width() > max_w or src.height() > max_h):
+        reader.setScaledSize(src.scaled(max_w, max_h, Qt.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull():
+        return image
     try:
-        cmd = [
-            'ffmpeg', '-y', '-i', video_path, '-ss', '00:00:01.000', '-vframes', '1',
-            '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease', 
-            thumb_path
-        ]
-        
-        result = subprocess.run(
-            cmd, 
-            stdout=subprocess.DEVNULL, 
-            stderr=subprocess.DEVNULL, 
-            timeout=10,  # 添加10秒超时
-            check=True
-        )
-        
-        if os.path.exists(thumb_path) and os.path.getsize(thumb_path) > 0:
-            pix = QPixmap(thumb_path)
-        else:
-            pix = QPixmap()
-            
-    except subprocess.TimeoutExpired:
-        logger.warning(f"生成视频缩略图超时: {video_path}")
-        pix = QPixmap()
-    except subprocess.CalledProcessError:
-        logger.warning(f"ffmpeg处理视频失败: {video_path}")
-        pix = QPixmap()
-    except Exception as e:
-        logger.warning(f"生成视频缩略图时发生错误: {video_path}, 错误: {e}")
-        pix = QPixmap()
-    finally:
-        # 确保临时文件被删除
+        with load_pil_image().open(path) as img:
+            img.draft('RGB', (max_w, max_h))
+            img.thumbnail((max_w, max_h))
+            img = img.convert('RGBA')
+            data = img.tobytes('raw', 'RGBA')
+            return QImage(data, img.width, img.height, QImage.Format_RGBA8888).copy()
+    except Exception:
+        return QImage()
+
+
+def render_cached_jpeg(path, size):
+    """磁盘缓存未命中时的图片缩略图生成：优先取内嵌 EXIF 缩略图，否则 Qt 缩放解码后编码为 JPEG"""
+    data = exif_thumbnail(path, size)
+    if data:
+        return data
+    image = read_scaled_image(path, size, size)
+    if image.isNull():
+        return None
+    count_render('decode')
+    buf = QBuffer()
+    buf.open(QIODevice.WriteOnly)
+    image.save(buf, 'JPG', 85)
+    return bytes(buf.data())
+
+
+class _ThumbSignals(QObject):
+    done = pyqtSignal(str, int, QImage)
+
+
+class _ThumbTask(QRunnable):
+    """线程池中的单个缩略图解码任务"""
+
+    def __init__(self, path, size, kind, signals):
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.kind = kind
+        self.signals = signals
+
+    def run(self):
         try:
-            if os.path.exists(thumb_path):
-                os.remove(thumb_path)
-        except OSError:
-            pass
-    
-    return pix
+            if self.kind == 'video':
+                data = _video_thumbnail_bytes(self.path, self.size)
+            else:
+                data = get_default_cache().get_or_create(self.path, self.size, render=render_cached_jpeg)
+            image = QImage.fromData(data) if data else QImage()
+        except Exception as e:
+            logger.warning(f"生成缩略图失败: {self.path}, 错误: {e}")
+            image = QImage()
+        self.signals.done.emit(self.path, self.size, image)
+
+
+class ThumbnailService(QObject):
+    """
+    后台缩略图服务：在线程池中按目标尺寸解码，结果通过 ready 信号异步送回 GUI 线程。
+    已解码的缩略图保存在按字节数限制的内存 LRU 中；后提交的请求优先执行。
+    """
+    ready = pyqtSignal(str, int, QImage)  # path, size, image（失败时为空 QImage）
+    CACHE_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(max_threads, QThread.idealThreadCount())))
+        # 视频帧抽取使用独立的小线程池，慢速的 ffmpeg 不会占满图片解码线程
+        self.video_pool = QThreadPool(self)
+        self.video_pool.setMaxThreadCount(VIDEO_WORKERS)
+        self._signals = _ThumbSignals(self)
+        self._signals.done.connect(self._on_done)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._pending = {}  # (path, size) -> (线程池, 任务)
+        self._priority = 0
+
+    def cached(self, path, size):
+        image = self._cache.get((path, size))
+        if image is not None:
+            self._cache.move_to_end((path, size))
+        return image
+
+    def request(self, path, size, kind='image'):
+        """已缓存时直接返回 QImage，否则提交后台解码并返回 None，完成后发出 ready"""
+        image = self.cached(path, size)
+        if image is not None:
+            return image
+        key = (path, size)
+        if key not in self._pending:
+            self._priority += 1
+            pool = self.video_pool if kind == 'video' else self.pool
+            task = _ThumbTask(path, size, kind, self._signals)
+            task.setAutoDelete(False)
+            self._pending[key] = (pool, task)
+            pool.start(task, self._priority)
+        return None
+
+    def cancel_pending(self, size):
+        """丢弃某一尺寸尚未开始的解码任务（例如切换分组时），不影响其他视图的请求"""
+        for key in [k for k in self._pending if k[1] == size]:
+            pool, task = self._pending[key]
+            if pool.tryTake(task):
+                del self._pending[key]
+
+    def _on_done(self, path, size, image):
+        self._pending.pop((path, size), None)
+        if not image.isNull():
+            key = (path, size)
+            if key not in self._cache:
+                self._cache[key] = image
+                self._cache_bytes += image.byteCount()
+                while self._cache_bytes > self.CACHE_BYTES and len(self._cache) > 1:
+                    _, old = self._cache.popitem(last=False)
+                    self._cache_bytes -= old.byteCount()
+        self.ready.emit(path, size, image)
+
+
+def auto_tune_knobs(enabled):
+    """GUI 勾选自动调优时传给 find_duplicates / supplement_duplicates 的参数"""
+    if not enabled:
+        return {}
+    return {'jobs': 'auto', 'io_threads': 'auto', 'chunk_size': 'auto'}
 
 class ReportThread(QThread):
     log_signal = pyqtSignal(str)
@@ -129,9 +234,10 @@ class ReportThread(QThread):
     data_signal = pyqtSignal(object)
     error_signal = pyqtSignal(str)
 
-    def __init__(self, folder, report_path, hash_method, lang, dry_run=True, progress_callback=None):
+    def __init__(self, folder, report_path, hash_method, lang, dry_run=True, progress_callback=None, auto_tune=False):
         super().__init__()
         self.folder = folder
+        self.auto_tune = auto_tune
         self.report_path = report_path
         self.hash_method = hash_method
         self.dry_run = dry_run
@@ -142,6 +248,7 @@ class ReportThread(QThread):
     def run(self):
         try:
             import compare
+            load_pil_image()
             compare.LANG = self.lang
             self.log_signal.emit(tr('start_dedup'))
             
@@ -159,7 +266,8 @@ class ReportThread(QThread):
                 self.hash_method, 
                 dry_run=self.dry_run, 
                 log_callback=log_cb, 
-                progress_callback=prog_cb
+                progress_callback=prog_cb,
+                **auto_tune_knobs(self.auto_tune)
             )
             
             if not self._is_cancelled:
@@ -183,9 +291,10 @@ class SupplementReportThread(QThread):
     done_signal = pyqtSignal(str)
     data_signal = pyqtSignal(object)
     error_signal = pyqtSignal(str)
-    def __init__(self, main_folder, supplement_folder, report_path, hash_method, lang, dry_run=True, progress_callback=None):
+    def __init__(self, main_folder, supplement_folder, report_path, hash_method, lang, dry_run=True, progress_callback=None, auto_tune=False):
         super().__init__()
         self.main_folder = main_folder
+        self.auto_tune = auto_tune
         self.supplement_folder = supplement_folder
         self.report_path = report_path
         self.hash_method = hash_method
@@ -197,6 +306,7 @@ class SupplementReportThread(QThread):
     def run(self):
         try:
             import compare
+            load_pil_image()
             compare.LANG = self.lang
             self.log_signal.emit(tr('start_supp'))
             def log_cb(msg):
@@ -213,7 +323,8 @@ class SupplementReportThread(QThread):
                 self.hash_method, 
                 dry_run=self.dry_run, 
                 log_callback=log_cb, 
-                progress_callback=prog_cb
+                progress_callback=prog_cb,
+                **auto_tune_knobs(self.auto_tune)
             )
             if not self._is_cancelled:
                 self.data_signal.emit(result)
@@ -230,10 +341,97 @@ class SupplementReportThread(QThread):
     def cancel(self):
         self._is_cancelled = True
 
+class StartupProbeThread(QThread):
+    """窗口绘制后在后台导入 compare、PIL 并检查 ffmpeg，结果经 done_signal 回到界面线程"""
+    done_signal = pyqtSignal(object)
+
+    def run(self):
+        t0 = time.perf_counter()
+        errors = []
+        for name, load in (('compare', lambda: __import__('compare')), ('Pillow', load_pil_image)):
+            try:
+                load()
+            except Exception as e:
+                errors.append((name, str(e)))
+        self.done_signal.emit({
+            'ffmpeg': check_ffmpeg_available(),
+            'errors': errors,
+            'seconds': time.perf_counter() - t0,
+        })
+
+
+class LegacyStatsThread(QThread):
+    """
+    旧版文本报告没有验证结论，统计损坏数和可释放空间需要逐个解码图片，
+    放到后台完成后经 done_signal 送回界面线程；结论缓存在 info 中，之后浏览分组时不再重复验证
+    """
+    done_signal = pyqtSignal(object)
+
+    def __init__(self, img_details, vid_groups, parent=None):
+        super().__init__(parent)
+        self.img_details = img_details
+        self.vid_groups = vid_groups
+
+    def run(self):
+        from compare import current_verdict
+        img_del_size = 0
+        img_corrupt = 0
+        for details in self.img_details:
+            for pos, info in enumerate(details):
+                verdict = current_verdict(info)
+                if verdict is None or verdict:
+                    img_corrupt += 1
+                if verdict is not None and pos > 0:
+                    img_del_size += info['size']
+        vid_del_size = 0
+        vid_corrupt = 0
+        for g in self.vid_groups:
+            for p in g[1:]:
+                try:
+                    vid_del_size += os.path.getsize(p)
+                except Exception:
+                    pass
+            for p in g:
+                if not os.path.exists(p):
+                    vid_corrupt += 1
+        self.done_signal.emit({
+            'img_del_size': img_del_size,
+            'img_corrupt': img_corrupt,
+            'vid_del_size': vid_del_size,
+            'vid_corrupt': vid_corrupt,
+        })
+
+
+class FileOpThread(QThread):
+    """在后台执行 file_ops 中的批量操作，进度与结果通过信号送回 GUI 线程"""
+    progress_signal = pyqtSignal(int, int)
+    done_signal = pyqtSignal(object)
+    error_signal = pyqtSignal(str)
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            result = self.func(*self.args, progress_callback=self.progress_signal.emit,
+                               cancel_event=self.cancel_event, **self.kwargs)
+            self.done_signal.emit(result)
+        except Exception as e:
+            tb = traceback.format_exc()
+            self.error_signal.emit(f"Task failed: {str(e)}\n\nDetailed Error:\n{tb}")
+
+    def cancel(self):
+        self.cancel_event.set()
+
 class ClickableLabel(QLabel):
-    def __init__(self, path, parent=None):
+    def __init__(self, path, parent=None, preview=None):
         super().__init__(parent)
         self.path = path
+        self.preview = preview
         self.setCursor(Qt.PointingHandCursor)
         self.setStyleSheet('border: 2px solid #aaa; border-radius: 6px; background: #f8f8f8;')
     def enterEvent(self, event):
@@ -242,28 +440,276 @@ class ClickableLabel(QLabel):
         self.setStyleSheet('border: 2px solid #aaa; border-radius: 6px; background: #f8f8f8;')
     def mousePressEvent(self, event):
         if os.path.exists(self.path):
-            dlg = QDialog(self)
-            dlg.setWindowTitle(os.path.basename(self.path))
-            vbox = QVBoxLayout(dlg)
-            img_label = QLabel()
-            pix = QPixmap(self.path)
-            if not pix.isNull():
-                # 限制最大显示尺寸
-                screen = QApplication.primaryScreen().availableGeometry()
-                maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                pix = pix.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                img_label.setPixmap(pix)
+            (self.preview or show_image_preview)(self, self.path)
+
+
+def show_image_preview(parent, path):
+    """弹窗显示大图"""
+    dlg = QDialog(parent)
+    dlg.setWindowTitle(os.path.basename(path))
+    vbox = QVBoxLayout(dlg)
+    img_label = QLabel()
+    # 限制最大显示尺寸，按屏幕尺寸缩放读取，不解码全分辨率
+    screen = QApplication.primaryScreen().availableGeometry()
+    maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
+    pix = QPixmap.fromImage(read_scaled_image(path, maxw, maxh))
+    if not pix.isNull():
+        img_label.setPixmap(pix)
+    else:
+        img_label.setText(tr('cannot_load_image'))
+    vbox.addWidget(img_label)
+    dlg.resize( min(pix.width()+40 if not pix.isNull() else 600, 1200), min(pix.height()+80 if not pix.isNull() else 400, 900) )
+    dlg.exec_()
+
+
+def show_video_preview(parent, path):
+    """弹窗显示视频的大尺寸缩略图"""
+    dlg = QDialog(parent)
+    dlg.setWindowTitle(os.path.basename(path))
+    vbox = QVBoxLayout(dlg)
+    img_label = QLabel()
+    # 生成大尺寸缩略图
+    big_thumb = get_video_thumbnail(path, width=800, height=600)
+    if big_thumb and not big_thumb.isNull():
+        screen = QApplication.primaryScreen().availableGeometry()
+        maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
+        big_thumb = big_thumb.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        img_label.setPixmap(big_thumb)
+    else:
+        img_label.setText(tr('no_thumbnail'))
+    vbox.addWidget(img_label)
+    dlg.resize( min(big_thumb.width()+40 if big_thumb else 600, 1200), min(big_thumb.height()+80 if big_thumb else 400, 900) )
+    dlg.exec_()
+
+
+class GroupListModel(QAbstractListModel):
+    """重复组列表的数据模型：只保存分组引用，可见行的文字在绘制时才生成"""
+
+    def __init__(self, label_key, parent=None):
+        super().__init__(parent)
+        self.label_key = label_key
+        self.groups = []
+
+    def set_groups(self, groups):
+        self.beginResetModel()
+        self.groups = groups
+        self.endResetModel()
+
+    def refresh(self):
+        """组内容或语言变化后通知视图重绘"""
+        if self.groups:
+            self.dataChanged.emit(self.index(0), self.index(len(self.groups) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.groups)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            row = index.row()
+            return f"{tr(self.label_key)}{row+1} ({len(self.groups[row])})"
+        return None
+
+
+class VirtualListView(QTableView):
+    """
+    单列、无表头的 QTableView，用于百万行级别的列表。
+    QListView 在模型重置时会逐行布局（百万行需要数秒），QTableView 按固定行高只计算可见区域。
+    """
+
+    def __init__(self, row_height, parent=None):
+        super().__init__(parent)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(row_height)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+
+class GroupListView(VirtualListView):
+    """基于 GroupListModel 的分组列表，保留 QListWidget 的常用接口"""
+    currentRowChanged = pyqtSignal(int)
+
+    def __init__(self, label_key, parent=None):
+        super().__init__(QApplication.fontMetrics().height() + 8, parent)
+        self.group_model = GroupListModel(label_key, self)
+        self.setModel(self.group_model)
+        self.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self.currentRowChanged.emit(current.row()))
+
+    def set_groups(self, groups):
+        self.group_model.set_groups(groups)
+
+    def refresh(self):
+        self.group_model.refresh()
+
+    def clear(self):
+        self.group_model.set_groups([])
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.group_model.index(row))
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+
+class FileListModel(QAbstractListModel):
+    """
+    文件列表模型：每行是一个文件信息 dict。
+    缩略图只为视图实际请求的可见行向 ThumbnailService 申请，完成后异步刷新对应行。
+    """
+    StateRole = Qt.UserRole + 1
+    InfoRole = Qt.UserRole + 2
+    CACHE_LIMIT = 500
+
+    def __init__(self, service, thumb_w, thumb_h, kind='image', parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.thumb_w = thumb_w
+        self.thumb_h = thumb_h
+        self.thumb_size = max(thumb_w, thumb_h)
+        self.kind = kind
+        self.files = []
+        self._thumbs = OrderedDict()
+        self._failed = set()
+        self._waiting = {}  # path -> 等待该缩略图的行号集合
+        service.ready.connect(self._on_ready)
+
+    def set_files(self, files):
+        self.beginResetModel()
+        self.files = files
+        self._thumbs.clear()
+        self._failed.clear()
+        self._waiting.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        info = self.files[index.row()]
+        path = info['path']
+        if role == Qt.DisplayRole:
+            return path
+        if role == self.InfoRole:
+            return info
+        if role == Qt.DecorationRole:
+            pix = self._thumbs.get(path)
+            if pix is not None:
+                self._thumbs.move_to_end(path)
+                return pix
+            if not info.get('is_corrupt') and path not in self._failed:
+                image = self.service.request(path, self.thumb_size, self.kind)
+                if image is not None:
+                    return self._store(path, image)
+                self._waiting.setdefault(path, set()).add(index.row())
+            return None
+        if role == self.StateRole:
+            if info.get('is_corrupt'):
+                return 'corrupt'
+            if path in self._thumbs:
+                return 'ready'
+            return 'failed' if path in self._failed else 'loading'
+        return None
+
+    def _store(self, path, image):
+        pix = QPixmap.fromImage(image)
+        if pix.width() > self.thumb_w or pix.height() > self.thumb_h:
+            pix = pix.scaled(self.thumb_w, self.thumb_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self._thumbs[path] = pix
+        if len(self._thumbs) > self.CACHE_LIMIT:
+            self._thumbs.popitem(last=False)
+        return pix
+
+    def _on_ready(self, path, size, image):
+        if size != self.thumb_size:
+            return
+        rows = self._waiting.pop(path, None)
+        if rows is None:
+            return
+        if image.isNull():
+            self._failed.add(path)
+        else:
+            self._store(path, image)
+        for row in rows:
+            if row < len(self.files):
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx)
+
+
+class FileItemDelegate(QStyledItemDelegate):
+    """绘制文件列表行：左侧缩略图（或状态文字），右侧路径，只绘制可见行"""
+
+    def __init__(self, thumb_w, thumb_h, parent=None):
+        super().__init__(parent)
+        self.thumb_w = thumb_w
+        self.thumb_h = thumb_h
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.thumb_h + 8)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        state = index.data(FileListModel.StateRole)
+        rect = option.rect
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+        elif state == 'corrupt':
+            painter.fillRect(rect, QColor('#ffeaea'))
+        thumb_rect = QRect(rect.x() + 4, rect.y() + 4, self.thumb_w, self.thumb_h)
+        pix = index.data(Qt.DecorationRole)
+        if pix is not None:
+            x = thumb_rect.x() + (self.thumb_w - pix.width()) // 2
+            y = thumb_rect.y() + (self.thumb_h - pix.height()) // 2
+            painter.drawPixmap(x, y, pix)
+        else:
+            if state == 'corrupt':
+                painter.setPen(QColor('red'))
+                text = tr('corrupted')
+            elif state == 'failed':
+                text = tr('no_thumbnail')
             else:
-                img_label.setText('无法加载图片')
-            vbox.addWidget(img_label)
-            dlg.resize( min(pix.width()+40, 1200), min(pix.height()+80, 900) )
-            dlg.exec_()
+                text = '…'
+            painter.drawText(thumb_rect, Qt.AlignCenter, text)
+        painter.setPen(option.palette.color(
+            option.palette.HighlightedText if option.state & QStyle.State_Selected else option.palette.Text))
+        text_rect = QRect(thumb_rect.right() + 10, rect.y(), rect.width() - self.thumb_w - 18, rect.height())
+        path = index.data(Qt.DisplayRole)
+        elided = option.fontMetrics.elidedText(path, Qt.ElideMiddle, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft, elided)
+        painter.restore()
+
+
+class FileListView(VirtualListView):
+    """虚拟化的文件列表：FileListModel + FileItemDelegate，点击行弹出预览"""
+
+    def __init__(self, service, kind, thumb_w, thumb_h, on_activate, parent=None):
+        super().__init__(thumb_h + 8, parent)
+        self.file_model = FileListModel(service, thumb_w, thumb_h, kind, self)
+        self.setModel(self.file_model)
+        self.setItemDelegate(FileItemDelegate(thumb_w, thumb_h, self))
+        self.clicked.connect(lambda index: on_activate(index.data(Qt.DisplayRole)))
+
+    def set_files(self, files):
+        self.file_model.set_files(files)
+
+    def clear(self):
+        self.file_model.set_files([])
 
 class DedupGui(QWidget):
     progress_update = pyqtSignal(int)
+    first_painted = pyqtSignal(float)  # 冷启动到首次绘制的秒数
+    startup_ready = pyqtSignal(object)  # 后台依赖检查完成，参数为 StartupProbeThread 的结果
 
     def __init__(self):
         super().__init__()
+        self.first_paint_seconds = None
         self.setWindowTitle('照片去重报告处理工具')
         self.resize(1100, 750)
         self.report_path = None
@@ -279,6 +725,7 @@ class DedupGui(QWidget):
         self.supplement_vid_target_dir = None
         self._last_report_start_time = None
         self._last_report_end_time = None
+        self._legacy_stats_thread = None
         self._last_supp_main_count = None
         self._last_supp_supp_count = None
         self._last_supp_corrupt_img = 0
@@ -298,6 +745,11 @@ class DedupGui(QWidget):
         # 新增：存储文件夹信息的变量
         self.folder_info_messages = []
         
+        # 后台缩略图解码服务，分组预览和增补列表共用
+        self.thumb_service = ThumbnailService(self)
+        self.thumb_service.ready.connect(self._on_thumbnail_ready)
+        self._pending_thumb_labels = {}
+        
         self.init_ui()
 
     def init_ui(self):
@@ -322,22 +774,42 @@ class DedupGui(QWidget):
         self.btn_duplication_analysis.clicked.connect(self.btn_duplication_analysis_dialog)
         self.btn_supplement_analysis = QPushButton(tr('supplement_analysis'))
         self.btn_supplement_analysis.clicked.connect(self.supplement_analysis_dialog)
+        # 勾选后分析时按设备自动选择进程数、线程数和读块大小（见 tuning.py）
+        self.chk_auto_tune = QCheckBox(tr('auto_tune'))
+        # 勾选后 JPEG / PNG 只哈希图像数据，只改了 EXIF 等元数据的副本也算重复（见 payload_hash.py）
+        self.chk_payload_hash = QCheckBox(tr('payload_hash'))
         self.btn_load = QPushButton(tr('load_report'))
         self.btn_load.clicked.connect(self.load_report)
         self.btn_delete = QPushButton(tr('delete'))
         self.btn_delete.clicked.connect(self.delete_files)
+        self.chk_trash = QCheckBox(tr('use_trash'))
+        self.chk_trash.setChecked(True)
+        self.btn_link = QPushButton(tr('link_dups'))
+        self.btn_link.clicked.connect(self.link_files)
+        self.combo_link_mode = QComboBox()
+        self.combo_link_mode.addItems([tr('link_hard'), tr('link_reflink')])
+        self.btn_cancel_op = QPushButton(tr('cancel'))
+        self.btn_cancel_op.clicked.connect(self.cancel_file_op)
+        self.btn_cancel_op.hide()
         self.btn_select_all = QPushButton(tr('select_all'))
         self.btn_select_all.clicked.connect(self.select_all_groups)
         self.btn_unselect_all = QPushButton(tr('unselect_all'))
         self.btn_unselect_all.clicked.connect(self.unselect_all_groups)
         self.combo_strategy = QComboBox()
-        self.combo_strategy.addItems([tr('keep_first'), tr('keep_newest'), tr('keep_largest')])
+        self.combo_strategy.addItems([tr(name) for name in STRATEGIES])
+        self.preferred_folders = []
         self.combo_strategy.currentIndexChanged.connect(self.apply_strategy)
         self.batch_select_label = QLabel(tr('batch_select'))
         btn_layout.addWidget(self.btn_duplication_analysis)
         btn_layout.addWidget(self.btn_supplement_analysis)
+        btn_layout.addWidget(self.chk_auto_tune)
+        btn_layout.addWidget(self.chk_payload_hash)
         btn_layout.addWidget(self.btn_load)
         btn_layout.addWidget(self.btn_delete)
+        btn_layout.addWidget(self.chk_trash)
+        btn_layout.addWidget(self.btn_link)
+        btn_layout.addWidget(self.combo_link_mode)
+        btn_layout.addWidget(self.btn_cancel_op)
         btn_layout.addWidget(self.btn_select_all)
         btn_layout.addWidget(self.btn_unselect_all)
         btn_layout.addWidget(self.batch_select_label)
@@ -365,7 +837,7 @@ class DedupGui(QWidget):
         # 图片Tab
         img_tab = QWidget()
         img_layout = QHBoxLayout(img_tab)
-        self.group_list = QListWidget()
+        self.group_list = GroupListView('group')
         self.group_list.currentRowChanged.connect(self.on_group_changed)
         img_layout.addWidget(self.group_list, 2)
         right = QVBoxLayout()
@@ -391,7 +863,7 @@ class DedupGui(QWidget):
         # 视频Tab
         vid_tab = QWidget()
         vid_layout = QHBoxLayout(vid_tab)
-        self.vid_group_list = QListWidget()
+        self.vid_group_list = GroupListView('video_group')
         self.vid_group_list.currentRowChanged.connect(self.on_vid_group_changed)
         vid_layout.addWidget(self.vid_group_list, 2)
         vid_right = QVBoxLayout()
@@ -419,18 +891,24 @@ class DedupGui(QWidget):
         supp_layout = QVBoxLayout(self.supplement_tab)
         self.supp_img_label = QLabel()
         supp_layout.addWidget(self.supp_img_label)
-        self.supplement_img_list = QListWidget()
+        self.supplement_img_list = FileListView(
+            self.thumb_service, 'image', LIST_THUMB_SIZE, LIST_THUMB_SIZE, lambda p: show_image_preview(self, p))
         supp_layout.addWidget(self.supplement_img_list, 4)
         self.btn_move_img_supp = QPushButton(tr('move_supp_img'))
         self.btn_move_img_supp.clicked.connect(lambda: self.move_supplement_files('img'))
         supp_layout.addWidget(self.btn_move_img_supp)
         self.supp_vid_label = QLabel()
         supp_layout.addWidget(self.supp_vid_label)
-        self.supplement_vid_list = QListWidget()
+        self.supplement_vid_list = FileListView(
+            self.thumb_service, 'video', LIST_THUMB_SIZE, 60, lambda p: show_video_preview(self, p))
         supp_layout.addWidget(self.supplement_vid_list, 2)
         self.btn_move_vid_supp = QPushButton(tr('move_supp_vid'))
         self.btn_move_vid_supp.clicked.connect(lambda: self.move_supplement_files('vid'))
-        supp_layout.addWidget(self.btn_move_vid_supp)
+        self.chk_decode_videos = QCheckBox(tr('decode_check_videos'))
+        vid_move_layout = QHBoxLayout()
+        vid_move_layout.addWidget(self.btn_move_vid_supp, 1)
+        vid_move_layout.addWidget(self.chk_decode_videos)
+        supp_layout.addLayout(vid_move_layout)
         self.tabs.addTab(self.supplement_tab, tr('supp_tab'))
         upper_layout.addWidget(self.tabs)
         
@@ -452,14 +930,35 @@ class DedupGui(QWidget):
         # 将分割器添加到主布局
         main_layout.addWidget(splitter)
         
-        # 检查系统依赖
-        self.check_system_dependencies()
-           
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_seconds is None:
+            # 窗口首次绘制后才在后台导入 compare/PIL 并检查系统依赖
+            self.first_paint_seconds = time.perf_counter() - _IMPORT_STARTED
+            self.first_painted.emit(self.first_paint_seconds)
+            QTimer.singleShot(0, self._start_startup_probe)
+
+    def _start_startup_probe(self):
+        self.startup_probe = StartupProbeThread()
+        self.startup_probe.done_signal.connect(self._on_startup_probe_done)
+        self.startup_probe.start()
+
+    def _on_startup_probe_done(self, result):
+        global FFMPEG_AVAILABLE
+        FFMPEG_AVAILABLE = result['ffmpeg']
         import compare
         compare.LANG = LANG
+        for name, err in result['errors']:
+            self.log_box.append(tr('dependency_missing', name=name, err=err))
+        self.check_system_dependencies(result['ffmpeg'])
+        # 入口在 startup_ready 中配置日志，之后的日志才会写入文件
+        self.startup_ready.emit(result)
+        if self.first_paint_seconds > FIRST_PAINT_TARGET:
+            logger.warning(tr('first_paint_slow', sec=self.first_paint_seconds, target=FIRST_PAINT_TARGET))
+        logger.info(tr('first_paint', sec=self.first_paint_seconds, probe=result['seconds']))
 
-    def check_system_dependencies(self):
-        if not check_ffmpeg_available():
+    def check_system_dependencies(self, ffmpeg_ok):
+        if not ffmpeg_ok:
             print("⚠️ ffmpeg 不可用，视频缩略图功能受限")
             self.log_box.append("⚠️ 警告: 未检测到ffmpeg，视频缩略图功能将不可用")
             self.log_box.append("   建议安装ffmpeg以获得完整功能")
@@ -467,29 +966,38 @@ class DedupGui(QWidget):
            print("✅ ffmpeg 可用，视频功能正常")
  
     def apply_strategy(self):
-        strategy = self.combo_strategy.currentText()
-        for i, group in enumerate(self.img_groups):
-            if not group:
-                self.img_checked[i] = set()
-                continue
-            if strategy == tr('keep_first'):
-                self.img_checked[i] = {group[0]}
-            elif strategy == tr('keep_newest'):
-                newest = max(group, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
-                self.img_checked[i] = {newest}
-            elif strategy == tr('keep_largest'):
-                largest = max(group, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0)
-                self.img_checked[i] = {largest}
-        self.show_group(self.current_img_group)
+        """按所选策略为所有图片/视频分组选出保留文件，只使用扫描时记录的文件信息"""
+        strategy = STRATEGIES[max(self.combo_strategy.currentIndex(), 0)]
+        if strategy == 'keep_preferred_folder':
+            folder = QFileDialog.getExistingDirectory(self, tr('select_preferred_folder'),
+                                                      self.preferred_folders[0] if self.preferred_folders else '')
+            if not folder:
+                return
+            self.preferred_folders = [folder]
+            self.log_box.append(tr('preferred_folder_set', folder=folder))
+        for groups, details, checked in ((self.img_groups, self.img_group_details, self.img_checked),
+                                         (self.vid_groups, self.vid_group_details, self.vid_checked)):
+            infos = [self._group_details(details, groups, i) for i in range(len(groups))]
+            for i, keep in enumerate(select_keepers(infos, strategy, self.preferred_folders)):
+                checked[i] = {keep} if keep else set()
+        if self.img_groups:
+            self.show_group(self.current_img_group)
+        if self.vid_groups:
+            self.show_vid_group(self.current_vid_group)
 
     def load_report(self):
-        path, _ = QFileDialog.getOpenFileName(self, tr('select_report'), '', tr('text_files'))
+        path, _ = QFileDialog.getOpenFileName(self, tr('select_report'), '', tr('report_files'))
         if not path:
             return
         # 加载报告时也清除之前的结果
         self.clear_interface()
         
         self.report_path = path
+        # 优先加载结构化报告（文本报告旁边的同名 .jsonl）
+        structured = self._find_structured_report(path)
+        if structured:
+            self.load_structured_report(structured)
+            return
         # 检查是否为增补报告
         with open(path, 'r', encoding='utf-8') as f:
             first_lines = [f.readline() for _ in range(5)]
@@ -501,18 +1009,34 @@ class DedupGui(QWidget):
         self.img_groups, self.vid_groups = self.parse_report(path)
         self.img_checked = {i: {group[0]} if group else set() for i, group in enumerate(self.img_groups)}
         self.vid_checked = {i: {group[0]} if group else set() for i, group in enumerate(self.vid_groups)}
-        self.group_list.clear()
-        for i, group in enumerate(self.img_groups):
-            self.group_list.addItem(f"{tr('group')}{i+1} ({len(group)})")
+        self.group_list.set_groups(self.img_groups)
         if self.img_groups:
             self.group_list.setCurrentRow(0)
-        self.vid_group_list.clear()
-        for i, group in enumerate(self.vid_groups):
-            self.vid_group_list.addItem(f"{tr('video_group')}{i+1} ({len(group)})")
+        self.vid_group_list.set_groups(self.vid_groups)
         if self.vid_groups:
             self.vid_group_list.setCurrentRow(0)
         self.combo_strategy.setCurrentIndex(0)
         self.tabs.setCurrentIndex(0)
+        self.log_dedup_stats()
+
+    def _find_structured_report(self, path):
+        """返回 path 对应的结构化报告路径，不存在时返回 None（旧版文本报告）"""
+        if is_structured_report(path):
+            return path
+        jsonl_path, _ = report_paths(path)
+        if os.path.exists(jsonl_path) and is_structured_report(jsonl_path):
+            return jsonl_path
+        return None
+
+    def load_structured_report(self, path):
+        """直接加载结构化报告，复用分析完成时的数据处理流程，不再解析文本"""
+        result = read_report(path)
+        if not result['complete']:
+            self.log_box.append(tr('report_incomplete', path=path))
+        if result['mode'] == 'supplement':
+            self.on_supp_data(result)
+        else:
+            self.on_dedup_data(result)
 
     def parse_report(self, path):
         img_groups = []
@@ -575,43 +1099,37 @@ class DedupGui(QWidget):
         self.show_group(idx)
 
     def show_group(self, idx):
-        self.corrupt_img_files = []
         for i in reversed(range(self.img_layout.count())):
             w = self.img_layout.itemAt(i).widget()
             if w:
                 w.setParent(None)
         
+        # 切换分组时放弃上一组尚未开始的解码任务
+        self._drop_pending_thumbs(GROUP_THUMB_SIZE)
         group = self.img_groups[idx]
-        for path in group:
+        details = self._group_details(self.img_group_details, self.img_groups, idx)
+        from compare import current_verdict
+        for info in details:
+            path = info['path']
             row = QHBoxLayout()
             label = ClickableLabel(path)
-            is_corrupt = False
+            # 沿用扫描时的验证结论，只有文件在扫描后被修改过才重新验证
+            verdict = current_verdict(info)
+            is_corrupt = bool(verdict)
             
-            if os.path.exists(path):
-                # 使用改进的图片验证方法
-                try:
-                    with Image.open(path) as img:
-                        img.load()  # 使用load()代替verify()
-                        # 验证成功，显示缩略图
-                        pix = QPixmap(path)
-                        if not pix.isNull():
-                            pix = pix.scaled(320, 320, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                            label.setPixmap(pix)
-                        else:
-                            label.setText(tr('no_thumbnail'))
-                except (IOError, OSError, UnidentifiedImageError):
-                    is_corrupt = True
-                    self.corrupt_img_files.append(path)
-                    label.setText(tr('corrupted'))
-                    label.setStyleSheet('color: red; font-weight: bold;')
-                except Exception as e:
-                    logger.warning(f"验证图片时发生错误: {path}, 错误: {e}")
-                    is_corrupt = True
-                    self.corrupt_img_files.append(path)
-                    label.setText(tr('corrupted'))
-                    label.setStyleSheet('color: red; font-weight: bold;')
-            else:
+            if verdict is None:
                 label.setText(tr('file_not_found'))
+            elif is_corrupt:
+                label.setText(tr('corrupted'))
+                label.setStyleSheet('color: red; font-weight: bold;')
+            else:
+                # 缩略图在后台线程按 320px 缩放解码，完成后由 _on_thumbnail_ready 填充
+                image = self.thumb_service.request(path, GROUP_THUMB_SIZE)
+                if image is not None:
+                    label.setPixmap(QPixmap.fromImage(image))
+                else:
+                    label.setText('…')
+                    self._pending_thumb_labels[(path, GROUP_THUMB_SIZE)] = label
             row.addWidget(label)
             frame = QFrame()
             frame.setFrameShape(QFrame.VLine)
@@ -631,8 +1149,26 @@ class DedupGui(QWidget):
             else:
                 row_widget.setStyleSheet('background: #f9f9f9; margin-bottom: 6px; border-radius: 8px;')
             self.img_layout.addWidget(row_widget)
-        # 更新统计区损坏图片数
-        self.log_dedup_stats()
+
+    def _group_details(self, details, groups, idx):
+        """取第 idx 组的文件信息；旧版文本报告只有路径，首次访问时补成 dict 以便缓存验证结论"""
+        if idx not in details:
+            details[idx] = [{'path': p} for p in groups[idx]]
+        return details[idx]
+
+    def _drop_pending_thumbs(self, size):
+        self.thumb_service.cancel_pending(size)
+        for key in [k for k in self._pending_thumb_labels if k[1] == size]:
+            del self._pending_thumb_labels[key]
+
+    def _on_thumbnail_ready(self, path, size, image):
+        label = self._pending_thumb_labels.pop((path, size), None)
+        if label is None:
+            return
+        if image.isNull():
+            label.setText(tr('no_thumbnail'))
+        else:
+            label.setPixmap(QPixmap.fromImage(image))
 
     def on_check_changed(self, group_idx, path, state):
         if state == Qt.Checked:
@@ -652,41 +1188,26 @@ class DedupGui(QWidget):
             w = self.vid_layout.itemAt(i).widget()
             if w:
                 w.setParent(None)
-        group = self.vid_groups[idx]
-        for path in group:
+        self._drop_pending_thumbs(VIDEO_THUMB_SIZE)
+        details = self._group_details(self.vid_group_details, self.vid_groups, idx)
+        for info in details:
+            path = info['path']
             row = QHBoxLayout()
-            # 视频缩略图
-            thumb = get_video_thumbnail(path)
-            thumb_label = QLabel()
-            if thumb and not thumb.isNull():
-                pix = thumb
-                pix = pix.scaled(160, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label.setPixmap(pix)
-                thumb_label.setCursor(Qt.PointingHandCursor)
-                def show_big_thumb(p=path):
-                    dlg = QDialog(self)
-                    dlg.setWindowTitle(os.path.basename(p))
-                    vbox = QVBoxLayout(dlg)
-                    img_label = QLabel()
-                    # 生成大尺寸缩略图
-                    big_thumb = get_video_thumbnail(p, width=800, height=600)
-                    if big_thumb and not big_thumb.isNull():
-                        screen = QApplication.primaryScreen().availableGeometry()
-                        maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                        big_thumb = big_thumb.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        img_label.setPixmap(big_thumb)
-                    else:
-                        img_label.setText('无法加载缩略图')
-                    vbox.addWidget(img_label)
-                    dlg.resize( min(big_thumb.width()+40 if big_thumb else 600, 1200), min(big_thumb.height()+80 if big_thumb else 400, 900) )
-                    dlg.exec_()
-                thumb_label.mousePressEvent = lambda e, f=show_big_thumb: f()
+            # 视频缩略图在后台抽帧，完成前显示占位符
+            thumb_label = ClickableLabel(path, preview=show_video_preview)
+            image = self.thumb_service.request(path, VIDEO_THUMB_SIZE, 'video')
+            if image is not None:
+                thumb_label.setPixmap(QPixmap.fromImage(image))
             else:
-                thumb_label.setText('无缩略图')
+                thumb_label.setText('…')
+                self._pending_thumb_labels[(path, VIDEO_THUMB_SIZE)] = thumb_label
             row.addWidget(thumb_label)
             # 只显示文件名、路径、大小
             name = os.path.basename(path)
-            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if 'size' in info:
+                size = info['size']  # 扫描时记录的大小
+            else:
+                size = os.path.getsize(path) if os.path.exists(path) else 0
             name_label = QLabel(name)
             row.addWidget(name_label)
             size_label = QLabel(f'{size/1024/1024:.2f} MB')
@@ -784,18 +1305,142 @@ class DedupGui(QWidget):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply != QMessageBox.Yes:
             return
-        failed = []
-        for path in delete_list:
-            try:
-                if os.path.exists(path):
-                    os.remove(path)
-            except Exception as e:
-                failed.append((path, str(e)))
+        # 后台按目录分批删除，完成后就地更新分组，不再重新加载报告
+        self.log_box.append(tr('deleting', count=len(delete_list)))
+        self._start_file_op(batch_delete, delete_list, use_trash=self.chk_trash.isChecked(),
+                            on_done=self._on_delete_done)
+
+    def link_files(self):
+        """把未勾选的重复文件替换为指向本组第一个勾选文件的硬链接/reflink，路径保留但只占一份空间"""
+        plan = []
+        for groups, checked in ((self.img_groups, self.img_checked), (self.vid_groups, self.vid_checked)):
+            for idx, group in enumerate(groups):
+                keep = [p for p in group if p in checked.get(idx, set())]
+                dups = [p for p in group if p not in checked.get(idx, set())]
+                if keep and dups:
+                    plan.append((keep[0], dups))
+        count = sum(len(dups) for _, dups in plan)
+        if not count:
+            QMessageBox.information(self, tr('link_dups'), tr('no_files_to_link'))
+            return
+        mode = ('hard', 'reflink')[self.combo_link_mode.currentIndex()]
+        reply = QMessageBox.question(self, tr('link_dups'), tr('confirm_link_msg', count=count, mode=self.combo_link_mode.currentText()),
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self.log_box.append(tr('linking', count=count))
+        self._start_file_op(batch_link, plan, mode=mode, on_done=self._on_link_done)
+
+    def _on_link_done(self, result):
+        linked = {dup for dup, _ in result['linked']}
+        if result['cancelled']:
+            self.log_box.append(tr('op_cancelled', done=len(linked) + len(result['skipped']) + len(result['failed'])))
+        for path, reason in result['skipped']:
+            self.log_box.append(tr('link_skipped', path=path, reason=tr('link_reason_' + reason)))
+        for path, error in result['failed']:
+            self.log_box.append(tr('link_failed', path=path, error=error))
+        # 已替换为链接的文件不再占用额外空间，从重复组中移除
+        self._remove_deleted_from_groups(linked)
+        msg = tr('link_done', linked=len(linked), skipped=len(result['skipped']), failed=len(result['failed']),
+                 mb=result['reclaimed'] / 1024 / 1024)
+        self.log_box.append(msg)
+        if result['failed']:
+            QMessageBox.warning(self, tr('link_dups'), msg)
+        else:
+            QMessageBox.information(self, tr('link_dups'), msg)
+
+    def _start_file_op(self, func, *args, on_done, **kwargs):
+        self.btn_delete.setEnabled(False)
+        self.btn_link.setEnabled(False)
+        self.btn_move_img_supp.setEnabled(False)
+        self.btn_move_vid_supp.setEnabled(False)
+        self.progress.setValue(0)
+        self.progress.show()
+        self.btn_cancel_op.show()
+        self.file_op_thread = FileOpThread(func, *args, **kwargs)
+        self.file_op_thread.progress_signal.connect(
+            lambda done, total: self.progress_update.emit(int(done * 100 / max(total, 1))))
+        self.file_op_thread.done_signal.connect(self._finish_file_op)
+        self.file_op_thread.done_signal.connect(on_done)
+        self.file_op_thread.error_signal.connect(self._on_file_op_error)
+        self.file_op_thread.start()
+
+    def _finish_file_op(self, result=None):
+        self.progress.hide()
+        self.btn_cancel_op.hide()
+        self.btn_delete.setEnabled(True)
+        self.btn_link.setEnabled(True)
+        self.btn_move_img_supp.setEnabled(True)
+        self.btn_move_vid_supp.setEnabled(True)
+
+    def _on_file_op_error(self, msg):
+        self._finish_file_op()
+        self.on_thread_error(msg)
+
+    def cancel_file_op(self):
+        thread = getattr(self, 'file_op_thread', None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+
+    def _on_delete_done(self, result):
+        deleted = set(result['deleted'])
+        failed = result['failed']
+        if result['cancelled']:
+            self.log_box.append(tr('op_cancelled', done=len(deleted) + len(failed)))
+        if result['trash_dirs']:
+            self.log_box.append(tr('trash_location', dirs=', '.join(result['trash_dirs'])))
+        self._remove_deleted_from_groups(deleted)
         if not failed:
-            QMessageBox.information(self, tr('delete_complete'), f'{tr("delete_complete_msg")} {len(delete_list)} {tr("files")}.')
+            QMessageBox.information(self, tr('delete_complete'), f'{tr("delete_complete_msg")} {len(deleted)} {tr("files")}.')
         else:
             QMessageBox.warning(self, tr('partial_delete_failed'), f'{tr("partial_delete_failed_msg")} {len(failed)} {tr("files")} {tr("delete_failed")}.\\n' + '\\n'.join(f[0] for f in failed))
-        self.load_report()
+
+    @staticmethod
+    def _drop_paths(groups, details, checked, removed):
+        """从分组中去掉已删除的文件，只剩一个文件的组不再是重复组"""
+        new_groups, new_details, new_checked = [], {}, {}
+        for idx, group in enumerate(groups):
+            kept = [p for p in group if p not in removed]
+            if len(kept) < 2:
+                continue
+            new_idx = len(new_groups)
+            new_groups.append(kept)
+            if idx in details:
+                new_details[new_idx] = [info for info in details[idx] if info['path'] not in removed]
+            new_checked[new_idx] = checked.get(idx, set()) - removed
+        return new_groups, new_details, new_checked
+
+    def _remove_deleted_from_groups(self, removed):
+        """删除完成后就地更新图片/视频分组及列表模型"""
+        if not removed:
+            return
+        self.img_groups, self.img_group_details, self.img_checked = self._drop_paths(
+            self.img_groups, self.img_group_details, self.img_checked, removed)
+        self.vid_groups, self.vid_group_details, self.vid_checked = self._drop_paths(
+            self.vid_groups, self.vid_group_details, self.vid_checked, removed)
+        if self._last_dedup_result:
+            self._last_dedup_result['img_groups'] = [self.img_group_details.get(i, []) for i in range(len(self.img_groups))]
+            self._last_dedup_result['vid_groups'] = [self.vid_group_details.get(i, []) for i in range(len(self.vid_groups))]
+        img_row = min(self.current_img_group, len(self.img_groups) - 1)
+        vid_row = min(self.current_vid_group, len(self.vid_groups) - 1)
+        self.group_list.set_groups(self.img_groups)
+        self.vid_group_list.set_groups(self.vid_groups)
+        self._clear_layout(self.img_layout)
+        self._clear_layout(self.vid_layout)
+        if img_row >= 0:
+            self.group_list.setCurrentRow(img_row)
+            self.show_group(img_row)
+        if vid_row >= 0:
+            self.vid_group_list.setCurrentRow(vid_row)
+            self.show_vid_group(vid_row)
+        self.log_dedup_stats(from_data=bool(self._last_dedup_result))
+
+    @staticmethod
+    def _clear_layout(layout):
+        for i in reversed(range(layout.count())):
+            w = layout.itemAt(i).widget()
+            if w:
+                w.setParent(None)
 
     def show_supplement_report(self, path, from_data=False):
         if from_data and self._last_supp_result:
@@ -843,91 +1488,11 @@ class DedupGui(QWidget):
                     self.supplement_img_files.append(l.strip())
                 elif mode == 'vid':
                     self.supplement_vid_files.append(l.strip())
-        # 图片缩略图列表
-        for f in self.supplement_img_files:
-            item_widget = QWidget()
-            hbox = QHBoxLayout(item_widget)
-            is_corrupt = False
-            try:
-                with Image.open(f) as im:
-                    im.verify()
-                thumb = QPixmap(f)
-            except Exception:
-                is_corrupt = True
-                self.corrupt_img_files.append(f)
-                thumb = None
-            if thumb and not thumb.isNull():
-                pix = thumb.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label = QLabel()
-                thumb_label.setPixmap(pix)
-                thumb_label.setCursor(Qt.PointingHandCursor)
-                def show_big_thumb(p=f):
-                    dlg = QDialog(self)
-                    dlg.setWindowTitle(os.path.basename(p))
-                    vbox = QVBoxLayout(dlg)
-                    img_label = QLabel()
-                    pix2 = QPixmap(p)
-                    if not pix2.isNull():
-                        screen = QApplication.primaryScreen().availableGeometry()
-                        maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                        pix2 = pix2.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        img_label.setPixmap(pix2)
-                    else:
-                        img_label.setText(tr('no_thumbnail'))
-                    vbox.addWidget(img_label)
-                    dlg.resize( min(pix2.width()+40 if pix2 else 600, 1200), min(pix2.height()+80 if pix2 else 400, 900) )
-                    dlg.exec_()
-                thumb_label.mousePressEvent = lambda e, f=show_big_thumb: f()
-                hbox.addWidget(thumb_label)
-            else:
-                l = QLabel(tr('corrupted')) if is_corrupt else QLabel(tr('no_thumbnail'))
-                l.setStyleSheet('color: red; font-weight: bold;' if is_corrupt else '')
-                hbox.addWidget(l)
-            hbox.addWidget(QLabel(f))
-            item_widget.setLayout(hbox)
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            if is_corrupt:
-                list_item.setBackground(Qt.red)
-            self.supplement_img_list.addItem(list_item)
-            self.supplement_img_list.setItemWidget(list_item, item_widget)
-        # 视频缩略图列表
-        self.supplement_vid_list.clear()
-        for f in self.supplement_vid_files:
-            item_widget = QWidget()
-            hbox = QHBoxLayout(item_widget)
-            thumb = get_video_thumbnail(f)
-            if thumb and not thumb.isNull():
-                pix = thumb.scaled(80, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label = QLabel()
-                thumb_label.setPixmap(pix)
-                thumb_label.setCursor(Qt.PointingHandCursor)
-                def show_big_thumb(p=f):
-                    dlg = QDialog(self)
-                    dlg.setWindowTitle(os.path.basename(p))
-                    vbox = QVBoxLayout(dlg)
-                    img_label = QLabel()
-                    big_thumb = get_video_thumbnail(p, width=800, height=600)
-                    if big_thumb and not big_thumb.isNull():
-                        screen = QApplication.primaryScreen().availableGeometry()
-                        maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                        big_thumb = big_thumb.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        img_label.setPixmap(big_thumb)
-                    else:
-                        img_label.setText('无法加载缩略图')
-                    vbox.addWidget(img_label)
-                    dlg.resize( min(big_thumb.width()+40 if big_thumb else 600, 1200), min(big_thumb.height()+80 if big_thumb else 400, 900) )
-                    dlg.exec_()
-                thumb_label.mousePressEvent = lambda e, f=show_big_thumb: f()
-                hbox.addWidget(thumb_label)
-            else:
-                hbox.addWidget(QLabel(tr('no_thumbnail')))
-            hbox.addWidget(QLabel(f))
-            item_widget.setLayout(hbox)
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            self.supplement_vid_list.addItem(list_item)
-            self.supplement_vid_list.setItemWidget(list_item, item_widget)
+        # 虚拟化列表：缩略图在行可见时才按需加载
+        self.supplement_img_details = [{'path': f} for f in self.supplement_img_files]
+        self.supplement_vid_details = [{'path': f} for f in self.supplement_vid_files]
+        self.supplement_img_list.set_files(self.supplement_img_details)
+        self.supplement_vid_list.set_files(self.supplement_vid_details)
         # 动态刷新统计标签
         self.supp_img_label.setText(tr('supp_img', count=len(self.supplement_img_files)))
         self.supp_vid_label.setText(tr('supp_vid', count=len(self.supplement_vid_files)))
@@ -936,11 +1501,11 @@ class DedupGui(QWidget):
 
     def move_supplement_files(self, which):
         if which == 'img':
-            files = self.supplement_img_files
+            files = self.supplement_img_details
             label = tr('img')
             target_dir = self.supplement_img_target_dir
         else:
-            files = self.supplement_vid_files
+            files = self.supplement_vid_details
             label = tr('vid')
             target_dir = self.supplement_vid_target_dir
         if not files:
@@ -953,58 +1518,50 @@ class DedupGui(QWidget):
             try:
                 os.makedirs(target_dir, exist_ok=True)
             except Exception as e:
-                QMessageBox.warning(self, tr('batch_move'), f'{tr("target_dir_create_fail")}\\n{target_dir}\\n{e}')
+                QMessageBox.warning(self, tr('batch_move'), f'{tr("target_dir_create_fail")}\n{target_dir}\n{e}')
                 return
         # 新增：损坏文件集中到一个子文件夹
         corrupt_dir = os.path.join(target_dir, tr('corrupted_files'))
-        if not os.path.exists(corrupt_dir):
-            os.makedirs(corrupt_dir, exist_ok=True)
-        failed = []
-        corrupt = []
-        for f in files:
-            try:
-                if os.path.exists(f):
-                    is_corrupt = False
-                    if which == 'img':
-                        #from PIL import Image
-                        #Image.MAX_IMAGE_PIXELS = 200000000  # 例如允许2亿像素图片
-                        try:
-                            with Image.open(f) as im:
-                                im.verify()
-                        except Exception:
-                            is_corrupt = True
-                    elif which == 'vid':
-                        # 简单判断：文件过小或ffmpeg无法读取
-                        try:
-                            import subprocess
-                            result = subprocess.run([
-                                'ffmpeg', '-v', 'error', '-i', f, '-f', 'null', '-'],
-                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5)
-                            if result.returncode != 0:
-                                is_corrupt = True
-                        except Exception:
-                            is_corrupt = True
-                    base = os.path.basename(f)
-                    if is_corrupt:
-                        target = os.path.join(corrupt_dir, base)
-                        corrupt.append(f)
-                    else:
-                        target = os.path.join(target_dir, base)
-                    count = 1
-                    while os.path.exists(target):
-                        name, ext = os.path.splitext(base)
-                        target = os.path.join(os.path.dirname(target), f"{name}_{count}{ext}")
-                        count += 1
-                    os.rename(f, target)
-            except Exception as e:
-                failed.append((f, str(e)))
-        msg = f'{tr("move_success")} {len(files)-len(failed)} {label} {tr("to")}\\n{target_dir}'
+        infos = {info['path']: info for info in files}
+        if which == 'img':
+            from compare import current_verdict
+            # 沿用增补扫描时的验证结论，文件被修改过才重新验证
+            def is_corrupt(path):
+                return bool(current_verdict(infos[path]))
+        elif self.chk_decode_videos.isChecked():
+            # 完整解码检查开销大，只在用户勾选时进行
+            def is_corrupt(path):
+                return infos[path].get('is_corrupt', False) or not video_decodes(path)
+        else:
+            def is_corrupt(path):
+                return infos[path].get('is_corrupt', False)
+        # 沿用增补报告中已去重的目标文件名，不同来源的同名文件不会互相占用
+        target_names = {path: os.path.basename(info['target_path'])
+                        for path, info in infos.items() if info.get('target_path')}
+        self._start_file_op(batch_move, list(infos), target_dir, corrupt_dir=corrupt_dir, is_corrupt=is_corrupt,
+                            target_names=target_names, on_done=lambda result: self._on_move_done(which, label, target_dir, corrupt_dir, result))
+
+    def _on_move_done(self, which, label, target_dir, corrupt_dir, result):
+        failed = result['failed']
+        corrupt = result['corrupt']
+        moved = {src for src, _ in result['moved']}
+        if result['cancelled']:
+            self.log_box.append(tr('op_cancelled', done=len(moved) + len(failed)))
+        # 已移动的文件从增补列表中去掉，未处理和失败的文件保留，可再次移动
+        if which == 'img':
+            self.supplement_img_details = [i for i in self.supplement_img_details if i['path'] not in moved]
+            self.supplement_img_files = [i['path'] for i in self.supplement_img_details]
+        else:
+            self.supplement_vid_details = [i for i in self.supplement_vid_details if i['path'] not in moved]
+            self.supplement_vid_files = [i['path'] for i in self.supplement_vid_details]
+        self._update_supplement_ui()
+        msg = f'{tr("move_success")} {len(moved)} {label} {tr("to")}\n{target_dir}'
         if corrupt:
-            msg += f'\\n{tr("move_corrupt")} {len(corrupt)} {tr("corrupted_files")} {tr("to")}: {corrupt_dir}'
+            msg += f'\n{tr("move_corrupt")} {len(corrupt)} {tr("corrupted_files")} {tr("to")}: {corrupt_dir}'
         if not failed:
             QMessageBox.information(self, tr('batch_move'), msg)
         else:
-            QMessageBox.warning(self, tr('partial_move_failed'), f'{tr("partial_move_failed_msg")} {len(failed)} {label} {tr("move_failed")}.\\n' + '\\n'.join(f[0] for f in failed))
+            QMessageBox.warning(self, tr('partial_move_failed'), f'{tr("partial_move_failed_msg")} {len(failed)} {label} {tr("move_failed")}.\n' + '\n'.join(f[0] for f in failed))
 
     def clear_interface(self): 
         """清除界面上所有任务结果显示"""
@@ -1091,13 +1648,14 @@ class DedupGui(QWidget):
         report_path, _ = QFileDialog.getSaveFileName(self, tr('save_dedup_report_as'), 'deduplicate_report.txt', tr('text_files'))
         if not report_path:
             return
-        hash_method = 'md5'
+        hash_method = 'payload' if self.chk_payload_hash.isChecked() else 'md5'
         self.progress.show()
         self._last_report_start_time = time.time()
         self.thread = ReportThread(
             folder, report_path, hash_method, LANG,
             dry_run=True,
-            progress_callback=lambda val: self.progress_update.emit(int(val * 100))  # ← 修改这行
+            progress_callback=lambda val: self.progress_update.emit(int(val * 100)),  # ← 修改这行
+            auto_tune=self.chk_auto_tune.isChecked()
         )
         self.thread.data_signal.connect(self.on_dedup_data)
         self.thread.done_signal.connect(self.on_report_done)
@@ -1139,16 +1697,34 @@ class DedupGui(QWidget):
         if os.path.abspath(main_folder) == os.path.abspath(supplement_folder):
             QMessageBox.warning(self, tr('param_error'), tr('main_supp_same'))
             return
+        
+        # 可继续添加补充文件夹，按选择顺序排定优先级，一次扫描生成统一的增补计划
+        sources = [supplement_folder]
+        while QMessageBox.question(self, tr('select_supp_folder'), tr('add_more_sources'),
+                                   QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
+            folder = QFileDialog.getExistingDirectory(self, tr('select_supp_folder'))
+            if not folder:
+                break
+            if os.path.abspath(folder) in {os.path.abspath(f) for f in sources + [main_folder]}:
+                QMessageBox.warning(self, tr('param_error'), tr('source_duplicated'))
+                continue
+            sources.append(folder)
+            supp_msg = f'{tr("selected_supp_folder")}: {folder}'
+            self.folder_info_messages.append(supp_msg)
+            self.log_box.append(supp_msg)
+        if len(sources) > 1:
+            supplement_folder = sources
         report_path, _ = QFileDialog.getSaveFileName(self, tr('save_supp_report_as'), 'supplement_report.txt', tr('text_files'))
         if not report_path:
             return
-        hash_method = 'md5'
+        hash_method = 'payload' if self.chk_payload_hash.isChecked() else 'md5'
         self.progress.show()
         self._last_report_start_time = time.time()
         self.supp_thread = SupplementReportThread(
             main_folder, supplement_folder, report_path, hash_method, LANG, 
             dry_run=True,
-            progress_callback=lambda val: self.progress_update.emit(int(val * 100))  # ← 添加这行
+            progress_callback=lambda val: self.progress_update.emit(int(val * 100)),  # ← 添加这行
+            auto_tune=self.chk_auto_tune.isChecked()
         )
         self.supp_thread.data_signal.connect(self.on_supp_data)
         self.supp_thread.done_signal.connect(self.on_report_done)
@@ -1164,6 +1740,10 @@ class DedupGui(QWidget):
 
     def load_report_path(self, path):
         self.report_path = path
+        structured = self._find_structured_report(path)
+        if structured:
+            self.load_structured_report(structured)
+            return
         # 检查是否为增补报告
         with open(path, 'r', encoding='utf-8') as f:
             first_lines = [f.readline() for _ in range(10)]
@@ -1186,16 +1766,14 @@ class DedupGui(QWidget):
             self.log_supplement_stats()
             return
         self.img_groups, self.vid_groups = self.parse_report(path)
+        self.img_group_details = {}
+        self.vid_group_details = {}
         self.img_checked = {i: {group[0]} if group else set() for i, group in enumerate(self.img_groups)}
         self.vid_checked = {i: {group[0]} if group else set() for i, group in enumerate(self.vid_groups)}
-        self.group_list.clear()
-        for i, group in enumerate(self.img_groups):
-            self.group_list.addItem(f"{tr('group')}{i+1} ({len(group)})")
+        self.group_list.set_groups(self.img_groups)
         if self.img_groups:
             self.group_list.setCurrentRow(0)
-        self.vid_group_list.clear()
-        for i, group in enumerate(self.vid_groups):
-            self.vid_group_list.addItem(f"{tr('video_group')}{i+1} ({len(group)})")
+        self.vid_group_list.set_groups(self.vid_groups)
         if self.vid_groups:
             self.vid_group_list.setCurrentRow(0)
         self.combo_strategy.setCurrentIndex(0)
@@ -1278,13 +1856,9 @@ class DedupGui(QWidget):
 
     def _update_group_lists(self):
         """更新分组列表"""
-        self.group_list.clear()
-        for i, group in enumerate(self.img_groups):
-            self.group_list.addItem(f"{tr('group')}{i+1} ({len(group)})")
+        self.group_list.set_groups(self.img_groups)
         
-        self.vid_group_list.clear()
-        for i, group in enumerate(self.vid_groups):
-            self.vid_group_list.addItem(f"{tr('video_group')}{i+1} ({len(group)})")
+        self.vid_group_list.set_groups(self.vid_groups)
         
         if self.img_groups:
             self.group_list.setCurrentRow(0)
@@ -1349,101 +1923,8 @@ class DedupGui(QWidget):
 
     def _update_supplement_ui(self):
         """更新增补界面"""
-        self.supplement_img_list.clear()
-        for file_info in self.supplement_img_details:
-            item_widget = QWidget()
-            hbox = QHBoxLayout(item_widget)
-            
-            is_corrupt = file_info.get('is_corrupt', False)
-            
-            if not is_corrupt:
-                try:
-                    thumb = QPixmap(file_info['path'])
-                    if not thumb.isNull():
-                        pix = thumb.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        thumb_label = QLabel()
-                        thumb_label.setPixmap(pix)
-                        thumb_label.setCursor(Qt.PointingHandCursor)
-                        
-                        def show_big_thumb(p=file_info['path']):
-                            dlg = QDialog(self)
-                            dlg.setWindowTitle(os.path.basename(p))
-                            vbox = QVBoxLayout(dlg)
-                            img_label = QLabel()
-                            pix2 = QPixmap(p)
-                            if not pix2.isNull():
-                                screen = QApplication.primaryScreen().availableGeometry()
-                                maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                                pix2 = pix2.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                                img_label.setPixmap(pix2)
-                            else:
-                                img_label.setText(tr('no_thumbnail'))
-                            vbox.addWidget(img_label)
-                            dlg.resize( min(pix2.width()+40 if pix2 else 600, 1200), min(pix2.height()+80 if pix2 else 400, 900) )
-                            dlg.exec_()
-                        
-                        thumb_label.mousePressEvent = lambda e, f=show_big_thumb: f()
-                        hbox.addWidget(thumb_label)
-                    else:
-                        raise Exception("Cannot load thumbnail")
-                except Exception:
-                    l = QLabel(tr('no_thumbnail'))
-                    hbox.addWidget(l)
-            else:
-                l = QLabel(tr('corrupted'))
-                l.setStyleSheet('color: red; font-weight: bold;')
-                hbox.addWidget(l)
-            
-            hbox.addWidget(QLabel(file_info['path']))
-            item_widget.setLayout(hbox)
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            if is_corrupt:
-                list_item.setBackground(Qt.red)
-            self.supplement_img_list.addItem(list_item)
-            self.supplement_img_list.setItemWidget(list_item, item_widget)
-        
-        # 处理视频
-        self.supplement_vid_list.clear()
-        for file_info in self.supplement_vid_details:
-            item_widget = QWidget()
-            hbox = QHBoxLayout(item_widget)
-            
-            thumb = get_video_thumbnail(file_info['path'])
-            if thumb and not thumb.isNull():
-                pix = thumb.scaled(80, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                thumb_label = QLabel()
-                thumb_label.setPixmap(pix)
-                thumb_label.setCursor(Qt.PointingHandCursor)
-                
-                def show_big_thumb(p=file_info['path']):
-                    dlg = QDialog(self)
-                    dlg.setWindowTitle(os.path.basename(p))
-                    vbox = QVBoxLayout(dlg)
-                    img_label = QLabel()
-                    big_thumb = get_video_thumbnail(p, width=800, height=600)
-                    if big_thumb and not big_thumb.isNull():
-                        screen = QApplication.primaryScreen().availableGeometry()
-                        maxw, maxh = int(screen.width() * 0.8), int(screen.height() * 0.8)
-                        big_thumb = big_thumb.scaled(maxw, maxh, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        img_label.setPixmap(big_thumb)
-                    else:
-                        img_label.setText('无法加载缩略图')
-                    vbox.addWidget(img_label)
-                    dlg.resize( min(big_thumb.width()+40 if big_thumb else 600, 1200), min(big_thumb.height()+80 if big_thumb else 400, 900) )
-                    dlg.exec_()
-                
-                thumb_label.mousePressEvent = lambda e, f=show_big_thumb: f()
-                hbox.addWidget(thumb_label)
-            else:
-                hbox.addWidget(QLabel(tr('no_thumbnail')))
-            
-            hbox.addWidget(QLabel(file_info['path']))
-            item_widget.setLayout(hbox)
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            self.supplement_vid_list.addItem(list_item)
-            self.supplement_vid_list.setItemWidget(list_item, item_widget)
+        self.supplement_img_list.set_files(self.supplement_img_details)
+        self.supplement_vid_list.set_files(self.supplement_vid_details)
         
         # 更新标签
         self.supp_img_label.setText(tr('supp_img', count=len(self.supplement_img_files)))
@@ -1460,6 +1941,8 @@ class DedupGui(QWidget):
         self.log_supplement_stats(from_data=True)
 
     def log_dedup_stats(self, from_data=False):
+        # 尚未完成的旧版报告统计已经过时，结果到达时丢弃
+        self._legacy_stats_thread = None
         if from_data and self._last_dedup_result:
             stats = self._last_dedup_result.get('stats', {})
             
@@ -1498,54 +1981,56 @@ class DedupGui(QWidget):
             msg += f"\n  {tr('vid_total', count=vid_scanned)}, {tr('vid_del', count=vid_del)}, {tr('vid_save', size=vid_del_size/1024/1024)}, {tr('vid_corrupt', count=vid_corrupt)}"
             if elapsed:
                 msg += f"\n  {tr('elapsed', sec=elapsed)}"
+            msg += self._stage_lines(stats)
             self.log_box.append(msg)
             return
         
-        # 统计去重报告（从文件解析的情况）
-        img_total = sum(len(g) for g in self.img_groups)
-        vid_total = sum(len(g) for g in self.vid_groups)
-        img_del = sum(len(g)-1 for g in self.img_groups if len(g)>1)
-        vid_del = sum(len(g)-1 for g in self.vid_groups if len(g)>1)
-        img_del_size = 0
-        img_corrupt = 0
-        for g in self.img_groups:
-            for p in g[1:]:
-                try:
-                    img_del_size += os.path.getsize(p)
-                except Exception:
-                    pass
-            for p in g:
-                if not os.path.exists(p):
-                    img_corrupt += 1
-                else:
-                    try:
-                        #from PIL import Image
-                        #Image.MAX_IMAGE_PIXELS = 200000000  # 例如允许2亿像素图片
-                        with Image.open(p) as im:
-                            im.verify()
-                    except Exception:
-                        img_corrupt += 1
-        vid_del_size = 0
-        vid_corrupt = 0
-        for g in self.vid_groups:
-            for p in g[1:]:
-                try:
-                    vid_del_size += os.path.getsize(p)
-                except Exception:
-                    pass
-            for p in g:
-                if not os.path.exists(p):
-                    vid_corrupt += 1
+        # 统计去重报告（从文件解析的情况）：验证图片要逐个解码，交给后台线程，完成后再输出统计
+        details = [self._group_details(self.img_group_details, self.img_groups, idx)
+                   for idx in range(len(self.img_groups))]
+        totals = {
+            'img_total': sum(len(g) for g in self.img_groups),
+            'vid_total': sum(len(g) for g in self.vid_groups),
+            'img_del': sum(len(g)-1 for g in self.img_groups if len(g)>1),
+            'vid_del': sum(len(g)-1 for g in self.vid_groups if len(g)>1),
+        }
+        thread = LegacyStatsThread(details, [list(g) for g in self.vid_groups], self)
+        thread.finished.connect(thread.deleteLater)
+        thread.done_signal.connect(lambda counts, t=thread: self._on_legacy_stats_done(t, totals, counts))
+        self._legacy_stats_thread = thread
+        thread.start()
+
+    def _on_legacy_stats_done(self, thread, totals, counts):
+        # 统计期间又加载了其他报告时丢弃旧结果
+        if thread is not self._legacy_stats_thread:
+            return
+        self._legacy_stats_thread = None
         elapsed = None
         if self._last_report_start_time and self._last_report_end_time:
             elapsed = self._last_report_end_time - self._last_report_start_time
         msg = f"{tr('stat_dedup')}"
-        msg += f"\n  {tr('img_total', count=img_total)}, {tr('img_del', count=img_del)}, {tr('img_save', size=img_del_size/1024/1024)}, {tr('img_corrupt', count=img_corrupt)}"
-        msg += f"\n  {tr('vid_total', count=vid_total)}, {tr('vid_del', count=vid_del)}, {tr('vid_save', size=vid_del_size/1024/1024)}, {tr('vid_corrupt', count=vid_corrupt)}"
+        msg += f"\n  {tr('img_total', count=totals['img_total'])}, {tr('img_del', count=totals['img_del'])}, {tr('img_save', size=counts['img_del_size']/1024/1024)}, {tr('img_corrupt', count=counts['img_corrupt'])}"
+        msg += f"\n  {tr('vid_total', count=totals['vid_total'])}, {tr('vid_del', count=totals['vid_del'])}, {tr('vid_save', size=counts['vid_del_size']/1024/1024)}, {tr('vid_corrupt', count=counts['vid_corrupt'])}"
         if elapsed:
             msg += f"\n  {tr('elapsed', sec=elapsed)}"
         self.log_box.append(msg)
 
+    @staticmethod
+    def _stage_lines(stats):
+        """把 stats['stages'] 格式化为日志行（旧版报告没有该字段时返回空串）"""
+        stages = stats.get('stages')
+        if not stages:
+            return ''
+        msg = f"\n  {tr('stage_header')}"
+        for name, st in stages.items():
+            rate = tr('stage_rate', rate=st['files_per_s']) if st.get('files_per_s') else '-'
+            mbps = f"{st['bytes_per_s'] / 1024 / 1024:.1f} MB/s" if st.get('bytes_per_s') else '-'
+            msg += "\n  " + tr('stage_line', name=tr('stage_' + name), wall=st['wall_seconds'], cpu=st['cpu_seconds'],
+                                 files=st['files'], rate=rate, mb=st['bytes_read'] / 1024 / 1024, mbps=mbps)
+            if 'cache_hit_rate' in st:
+                msg += tr('stage_hit_rate', rate=st['cache_hit_rate'])
+        return msg
+
     def log_supplement_stats(self, from_data=False):
         if from_data and self._last_supp_result:
             stats = self._last_supp_result.get('stats', {})
@@ -1565,8 +2050,11 @@ class DedupGui(QWidget):
                 msg += f"\n  {tr('supp_scanned', count=self._last_supp_supp_count)}"
             msg += f"\n  {tr('supp_img', count=img_count)}, {tr('supp_img_save', size=img_size/1024/1024)}, {tr('supp_img_corrupt', count=self._last_supp_corrupt_img)}"
             msg += f"\n  {tr('supp_vid', count=vid_count)}, {tr('supp_vid_save', size=vid_size/1024/1024)}, {tr('supp_vid_corrupt', count=self._last_supp_corrupt_vid)}"
+            if stats.get('images_duplicate') or stats.get('videos_duplicate'):
+                msg += f"\n  {tr('supp_duplicates', img=stats.get('images_duplicate', 0), vid=stats.get('videos_duplicate', 0))}"
             if elapsed:
                 msg += f"\n  {tr('elapsed', sec=elapsed)}"
+            msg += self._stage_lines(stats)
             self.log_box.append(msg)
             return
         
@@ -1613,14 +2101,20 @@ class DedupGui(QWidget):
         self.setWindowTitle(tr('title'))
         self.btn_duplication_analysis.setText(tr('duplication_analysis'))
         self.btn_supplement_analysis.setText(tr('supplement_analysis'))
+        self.chk_auto_tune.setText(tr('auto_tune'))
+        self.chk_payload_hash.setText(tr('payload_hash'))
         self.btn_load.setText(tr('load_report'))
         self.btn_delete.setText(tr('delete'))
+        self.chk_trash.setText(tr('use_trash'))
+        self.btn_link.setText(tr('link_dups'))
+        self.combo_link_mode.setItemText(0, tr('link_hard'))
+        self.combo_link_mode.setItemText(1, tr('link_reflink'))
+        self.btn_cancel_op.setText(tr('cancel'))
         self.btn_select_all.setText(tr('select_all'))
         self.btn_unselect_all.setText(tr('unselect_all'))
         self.batch_select_label.setText(tr('batch_select'))
-        self.combo_strategy.setItemText(0, tr('keep_first'))
-        self.combo_strategy.setItemText(1, tr('keep_newest'))
-        self.combo_strategy.setItemText(2, tr('keep_largest'))
+        for i, name in enumerate(STRATEGIES):
+            self.combo_strategy.setItemText(i, tr(name))
         self.tabs.setTabText(0, tr('img_tab'))
         self.tabs.setTabText(1, tr('vid_tab'))
         self.tabs.setTabText(2, tr('supp_tab'))
@@ -1632,6 +2126,7 @@ class DedupGui(QWidget):
         self.vid_group_box.setTitle(tr('vid_tab'))
         self.btn_move_img_supp.setText(tr('move_supp_img'))
         self.btn_move_vid_supp.setText(tr('move_supp_vid'))
+        self.chk_decode_videos.setText(tr('decode_check_videos'))
         # 重新设置增补tab标签
         self.supp_img_label.setText(tr('supp_img', count=len(self.supplement_img_files)))
         self.supp_vid_label.setText(tr('supp_vid', count=len(self.supplement_vid_files)))
@@ -1640,12 +2135,8 @@ class DedupGui(QWidget):
         self.combo_lang.setItemText(1, 'English')
         self.lang_label.setText(tr('choose_language'))
         # 刷新分组列表
-        self.group_list.clear()
-        for i, group in enumerate(self.img_groups):
-            self.group_list.addItem(f"{tr('group')}{i+1} ({len(group)})")
-        self.vid_group_list.clear()
-        for i, group in enumerate(self.vid_groups):
-            self.vid_group_list.addItem(f"{tr('video_group')}{i+1} ({len(group)})")
+        self.group_list.refresh()
+        self.vid_group_list.refresh()
 
 # LANG = 'zh'
 # TRANSLATIONS = {
@@ -1839,8 +2330,16 @@ class DedupGui(QWidget):
 # def tr(key, **kwargs):
 #     s = TRANSLATIONS.get(LANG, TRANSLATIONS['zh']).get(key, key)
 #     return s.format(**kwargs) if kwargs else s
+def _configure_entry_point(result):
+    """GUI 入口的日志与信号配置，在后台导入 compare 完成后于界面线程执行"""
+    import compare
+    compare.setup_logging()
+    compare.install_signal_handlers()
+
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     gui = DedupGui()
+    gui.startup_ready.connect(_configure_entry_point)
     gui.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,184 @@
+# 外部排序（out-of-core）分组
+# 千万级文件的图库无法把路径和元数据全部放在内存中：路径顺序写入磁盘上的路径文件，以文件内偏移作为路径号；
+# 定长记录（键 + 路径号 + 附带字段）先在内存中累积，超过内存预算时排序后写成有序的 run 文件，
+# 最后多路归并所有 run，按键取连续相同段即为候选分组（sort + unique 的磁盘版本）。
+# 内存占用只取决于预算、归并路数和最大的单个分组，与图库大小无关。
+
+import heapq
+import os
+import shutil
+import struct
+import tempfile
+from itertools import groupby
+
+RECORD_OVERHEAD = 90         # 估算内存中每条记录（bytes 对象与列表槽位）的额外字节数
+MERGE_FANIN = 64             # 单次归并最多同时打开的 run 文件数，超过时先分批归并为更大的 run
+READ_BUFFER = 256 * 1024
+_LEN = struct.Struct('>I')
+
+
+def parse_memory_limit(value):
+    """解析内存上限：正整数字节数，或带 K/M/G 后缀"""
+    value = str(value).strip().lower()
+    scale = 1
+    if value[-1:] in ('k', 'm', 'g'):
+        scale = 1024 ** ('kmg'.index(value[-1]) + 1)
+        value = value[:-1]
+    number = int(value) * scale
+    if number <= 0:
+        raise ValueError(value)
+    return number
+
+
+class SpillDir:
+    """存放路径文件和 run 文件的临时目录，关闭时整体删除"""
+
+    def __init__(self, parent=None):
+        self.path = tempfile.mkdtemp(prefix='photo_tool_sort_', dir=parent)
+        self._counter = 0
+
+    def new_file(self, prefix):
+        self._counter += 1
+        return os.path.join(self.path, f'{prefix}_{self._counter:06d}.bin')
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class PathSpool:
+    """
+    磁盘上的路径表：append 返回路径号（该路径在文件中的偏移），之后按路径号随机读取。
+    路径号随写入顺序递增，排序记录时以它作为最后一个比较字段，同键记录保持遍历顺序。
+    """
+
+    def __init__(self, spill_dir, prefix='paths'):
+        self.path = spill_dir.new_file(prefix)
+        self._writer = open(self.path, 'wb', buffering=READ_BUFFER)
+        self._reader = None
+        self._offset = 0
+        self.count = 0
+
+    def append(self, path):
+        data = os.fsencode(path)
+        self._writer.write(_LEN.pack(len(data)))
+        self._writer.write(data)
+        offset = self._offset
+        self._offset += _LEN.size + len(data)
+        self.count += 1
+        return offset
+
+    def finish(self):
+        """写入结束，之后才能读取"""
+        if not self._writer.closed:
+            self._writer.close()
+
+    def __getitem__(self, offset):
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        self._reader.seek(offset)
+        (n,) = _LEN.unpack(self._reader.read(_LEN.size))
+        return os.fsdecode(self._reader.read(n))
+
+    def __iter__(self):
+        """按写入顺序产出 (路径号, 路径)"""
+        offset = 0
+        with open(self.path, 'rb', buffering=READ_BUFFER) as f:
+            while True:
+                head = f.read(_LEN.size)
+                if not head:
+                    break
+                (n,) = _LEN.unpack(head)
+                yield offset, os.fsdecode(f.read(n))
+                offset += _LEN.size + n
+
+    def close(self):
+        self.finish()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+class ExternalSorter:
+    """
+    定长记录的外部排序。记录为 bytes，按字节序比较，因此键字段需以大端无符号编码放在记录开头。
+    memory_limit 为内存中缓冲记录的字节预算（按记录长度加 RECORD_OVERHEAD 估算）。
+    """
+
+    def __init__(self, record_size, memory_limit, spill_dir, prefix='run'):
+        self.record_size = record_size
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.prefix = prefix
+        self._buffer = []
+        self._used = 0
+        self.runs = []
+        self.records = 0
+        self.spilled_runs = 0
+        self.spilled_bytes = 0
+
+    def add(self, record):
+        self._buffer.append(record)
+        self._used += self.record_size + RECORD_OVERHEAD
+        self.records += 1
+        if self._used >= self.memory_limit:
+            self._spill()
+
+    def _write_run(self, records):
+        path = self.spill_dir.new_file(self.prefix)
+        written = 0
+        with open(path, 'wb', buffering=READ_BUFFER) as f:
+            for rec in records:
+                f.write(rec)
+                written += len(rec)
+        self.spilled_bytes += written
+        return path
+
+    def _spill(self):
+        self._buffer.sort()
+        self.runs.append(self._write_run(self._buffer))
+        self.spilled_runs += 1
+        self._buffer = []
+        self._used = 0
+
+    def _read_run(self, path):
+        size = self.record_size
+        block = max(size, READ_BUFFER // size * size)
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(block)
+                if not data:
+                    break
+                for i in range(0, len(data), size):
+                    yield data[i:i + size]
+        os.remove(path)
+
+    def sorted_records(self):
+        """按字节序产出全部记录；没有溢出到磁盘时直接在内存中排序"""
+        if not self.runs:
+            self._buffer.sort()
+            records, self._buffer, self._used = self._buffer, [], 0
+            yield from records
+            return
+        if self._buffer:
+            self._spill()
+        runs, self.runs = self.runs, []
+        # run 过多时分批归并，保证同时打开的文件数和读缓冲不超过 MERGE_FANIN 份
+        while len(runs) > MERGE_FANIN:
+            batch, runs = runs[:MERGE_FANIN], runs[MERGE_FANIN:]
+            runs.append(self._write_run(heapq.merge(*(self._read_run(p) for p in batch))))
+        yield from heapq.merge(*(self._read_run(p) for p in runs))
+
+
+def duplicate_runs(records, key_size):
+    """对有序记录按前 key_size 字节取连续相同段，只产出包含至少两条记录的段（列表）"""
+    for _, run in groupby(records, key=lambda rec: rec[:key_size]):
+        run = list(run)
+        if len(run) > 1:
+            yield run
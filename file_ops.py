@@ -0,0 +1,445 @@
+# 批量文件操作引擎
+# 删除、移动等批量操作按所在目录分批，在线程池中并行执行，支持进度回调与取消。
+# "删除"默认是移入同一文件系统上的回收目录（一次 rename，瞬间完成且可恢复），
+# 跨文件系统或回收目录不可写时才真正 unlink。本模块不依赖 Qt，GUI 在后台线程中调用。
+
+import errno
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TRASH_DIR_NAME = '.photo_tool_trash'
+DEFAULT_WORKERS = 4
+MOVE_BATCH = 32  # 移动时每批文件数，增补文件通常集中在少数目录中
+
+
+def mount_point(path):
+    """返回 path 所在文件系统的挂载点"""
+    path = os.path.realpath(os.path.abspath(path))
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class Trash:
+    """
+    按文件系统划分的回收目录：与文件同一文件系统时优先用 ~/.photo_tool/.photo_tool_trash/<时间戳>/，
+    其他文件系统（外接盘、NAS 挂载点等）用 <挂载点>/.photo_tool_trash/<时间戳>/，都不可写时用文件所在目录。
+    只使用与文件同一文件系统的目录，保证移入只是一次 rename；单分区主机上不会在根目录下创建回收目录。
+    每次移入都记录到 manifest.jsonl，便于手动恢复。
+    """
+
+    def __init__(self):
+        self.stamp = time.strftime('%Y%m%d_%H%M%S')
+        self._dirs = {}  # st_dev -> 回收目录（None 表示该文件系统不可用）
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    @staticmethod
+    def _device(path):
+        """path 所在文件系统的设备号，path 尚不存在时取最近的已存在上级目录"""
+        while True:
+            try:
+                return os.stat(path).st_dev
+            except FileNotFoundError:
+                parent = os.path.dirname(path)
+                if parent == path:
+                    raise
+                path = parent
+
+    def _trash_dir(self, path):
+        dev = os.stat(path).st_dev
+        with self._lock:
+            if dev in self._dirs:
+                return self._dirs[dev]
+            candidates = [os.path.join(os.path.expanduser('~'), '.photo_tool'), mount_point(path),
+                          os.path.dirname(os.path.abspath(path))]
+            trash = None
+            for base in candidates:
+                d = os.path.join(base, TRASH_DIR_NAME, self.stamp)
+                try:
+                    # 先确认在同一文件系统上再创建，不在其他文件系统上留下空的回收目录
+                    if self._device(base) != dev:
+                        continue
+                    os.makedirs(d, exist_ok=True)
+                    if os.stat(d).st_dev == dev:
+                        trash = d
+                        break
+                except OSError:
+                    continue
+            self._dirs[dev] = trash
+            return trash
+
+    def move_in(self, path):
+        """把文件移入回收目录，返回回收后的路径；无法同盘 rename 时返回 None"""
+        trash = self._trash_dir(path)
+        if trash is None:
+            return None
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        target = os.path.join(trash, f'{seq:07d}_{os.path.basename(path)}')
+        os.rename(path, target)
+        with self._lock:
+            with open(os.path.join(trash, 'manifest.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'path': path, 'trash': target}, ensure_ascii=False) + '\n')
+        return target
+
+    @property
+    def dirs(self):
+        return sorted(d for d in self._dirs.values() if d)
+
+
+def batch_by_directory(paths, max_batch=None):
+    """
+    按所在目录分批，同一目录的操作在一个任务里顺序执行（目录项和元数据局部性更好）；
+    给定 max_batch 时大目录再切成多批，以便同一目录的文件也能并发处理。
+    """
+    by_dir = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+    if not max_batch:
+        return list(by_dir.values())
+    return [files[i:i + max_batch] for files in by_dir.values() for i in range(0, len(files), max_batch)]
+
+
+def batch_delete(paths, use_trash=True, workers=DEFAULT_WORKERS, progress_callback=None, cancel_event=None):
+    """
+    批量删除文件。返回 dict:
+        'deleted': 已删除（或已移入回收目录）的路径列表
+        'failed': [(路径, 错误信息)]
+        'trash_dirs': 本次使用的回收目录
+        'cancelled': 是否被取消（取消后未处理的文件保持原样）
+    progress_callback(done, total) 在工作线程中调用。
+    """
+    total = len(paths)
+    trash = Trash() if use_trash else None
+    deleted = []
+    failed = []
+    lock = threading.Lock()
+    done = [0]
+
+    def delete_one(path):
+        if trash is not None:
+            try:
+                if trash.move_in(path) is not None:
+                    return
+            except OSError as e:
+                logger.warning(f"移入回收目录失败，改为直接删除: {path}, 错误: {e}")
+        os.remove(path)
+
+    def run_batch(batch):
+        for path in batch:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                if os.path.exists(path):
+                    delete_one(path)
+                ok, err = True, None
+            except Exception as e:
+                ok, err = False, str(e)
+            with lock:
+                if ok:
+                    deleted.append(path)
+                else:
+                    failed.append((path, err))
+                done[0] += 1
+                count = done[0]
+            if progress_callback:
+                progress_callback(count, total)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(run_batch, batch) for batch in batch_by_directory(paths)]:
+            future.result()
+
+    return {
+        'deleted': deleted,
+        'failed': failed,
+        'trash_dirs': trash.dirs if trash else [],
+        'cancelled': bool(cancel_event is not None and cancel_event.is_set() and done[0] < total),
+    }
+
+
+def video_decodes(path, timeout=5):
+    """用 ffmpeg 完整解码一遍视频，能正常解码返回 True（开销大，仅在用户要求时使用）"""
+    try:
+        result = subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-f', 'null', '-'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+class TargetNames:
+    """并发移动时为目标文件分配不重名的路径（已存在或已被其他线程占用时追加 _1、_2 ...）"""
+
+    def __init__(self):
+        self._reserved = set()
+        self._lock = threading.Lock()
+
+    def reserve(self, directory, base):
+        name, ext = os.path.splitext(base)
+        target = os.path.join(directory, base)
+        count = 1
+        with self._lock:
+            while target in self._reserved or os.path.exists(target):
+                target = os.path.join(directory, f"{name}_{count}{ext}")
+                count += 1
+            self._reserved.add(target)
+        return target
+
+
+def move_file(src, dst):
+    """同一文件系统内 rename，跨文件系统时退回复制后删除"""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+def batch_move(paths, target_dir, corrupt_dir=None, is_corrupt=None, workers=DEFAULT_WORKERS * 2,
+               progress_callback=None, cancel_event=None, target_names=None):
+    """
+    批量把文件移动到 target_dir；is_corrupt(path) 判定为损坏的文件移动到 corrupt_dir。
+    target_names 可选，为 {源路径: 目标文件名}（如增补报告中已去重的名字），缺省时沿用源文件名。
+    返回 dict:
+        'moved': [(源路径, 目标路径)]（含损坏文件）
+        'corrupt': 判定为损坏的源路径列表
+        'failed': [(路径, 错误信息)]
+        'cancelled': 是否被取消
+    判定和 rename 都在线程池中并发执行，progress_callback(done, total) 在工作线程中调用。
+    """
+    total = len(paths)
+    names = TargetNames()
+    moved = []
+    corrupt = []
+    failed = []
+    lock = threading.Lock()
+    done = [0]
+
+    def run_batch(batch):
+        for path in batch:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            bad = False
+            try:
+                bad = bool(is_corrupt and corrupt_dir and is_corrupt(path))
+                base = target_names.get(path) if target_names else None
+                target = names.reserve(corrupt_dir if bad else target_dir, base or os.path.basename(path))
+                move_file(path, target)
+                ok, err = True, None
+            except Exception as e:
+                ok, err = False, str(e)
+            with lock:
+                if ok:
+                    moved.append((path, target))
+                    if bad:
+                        corrupt.append(path)
+                else:
+                    failed.append((path, err))
+                done[0] += 1
+                count = done[0]
+            if progress_callback:
+                progress_callback(count, total)
+
+    os.makedirs(target_dir, exist_ok=True)
+    if corrupt_dir:
+        os.makedirs(corrupt_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(run_batch, batch) for batch in batch_by_directory(paths, MOVE_BATCH)]:
+            future.result()
+
+    return {
+        'moved': moved,
+        'corrupt': corrupt,
+        'failed': failed,
+        'cancelled': bool(cancel_event is not None and cancel_event.is_set() and done[0] < total),
+    }
+
+
+# ---------------------------------------------------------------------------
+# 链接去重：用硬链接或 reflink 克隆替换重复文件，所有路径保持可用但只占一份空间
+# ---------------------------------------------------------------------------
+
+FICLONE = 0x40049409  # Linux ioctl：让目标文件共享源文件的数据块（Btrfs/XFS 等支持）
+LINK_MODES = ('hard', 'reflink')
+VERIFY_CHUNK = 1024 * 1024
+
+
+def files_identical(a, b):
+    """逐字节比较两个文件（先比较大小）"""
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        while True:
+            ca = fa.read(VERIFY_CHUNK)
+            cb = fb.read(VERIFY_CHUNK)
+            if ca != cb:
+                return False
+            if not ca:
+                return True
+
+
+def reflink(src, dst):
+    """创建 dst 作为 src 的 reflink 克隆（不复制数据），不支持时抛出 OSError"""
+    import fcntl  # 仅 POSIX 平台可用
+    with open(src, 'rb') as fs, open(dst, 'wb') as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            os.remove(dst)
+            raise
+
+
+def _make_link(src, dst, mode):
+    if mode == 'hard':
+        os.link(src, dst)
+    else:
+        reflink(src, dst)
+
+
+_link_support = {}
+_link_support_lock = threading.Lock()
+
+
+def link_supported(directory, mode):
+    """在 directory 所在文件系统上实际尝试一次硬链接/reflink，结果按 (设备, 模式) 缓存"""
+    dev = os.stat(directory).st_dev
+    with _link_support_lock:
+        if (dev, mode) in _link_support:
+            return _link_support[(dev, mode)]
+        src = os.path.join(directory, f'.photo_tool_probe_{os.getpid()}')
+        dst = src + '.link'
+        ok = False
+        try:
+            with open(src, 'wb') as f:
+                f.write(b'probe')
+            _make_link(src, dst, mode)
+            ok = True
+        except (OSError, ImportError):
+            ok = False
+        finally:
+            for p in (src, dst):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+        _link_support[(dev, mode)] = ok
+        return ok
+
+
+def replace_with_link(keep, dup, mode):
+    """
+    把 dup 原子地替换为指向 keep 的硬链接或 reflink 克隆：
+    先在 dup 同目录创建临时链接，再 os.replace 覆盖，任何时刻 dup 路径都是完整文件。
+    reflink 保留 dup 原有的时间戳和权限；硬链接与 keep 共享同一 inode 的元数据。
+    """
+    tmp = os.path.join(os.path.dirname(dup), f'.{os.path.basename(dup)}.photo_tool_link')
+    _make_link(keep, tmp, mode)
+    try:
+        if mode == 'reflink':
+            shutil.copystat(dup, tmp)
+        os.replace(tmp, dup)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def batch_link(plan, mode='hard', workers=DEFAULT_WORKERS, progress_callback=None, cancel_event=None):
+    """
+    按 plan = [(保留文件, [重复文件...]), ...] 把重复文件替换为链接。
+    每个重复文件先逐字节校验与保留文件相同；跨文件系统或文件系统不支持该模式时跳过。
+    返回 dict:
+        'linked': [(重复文件, 保留文件)]
+        'skipped': [(重复文件, 原因)]  原因为 'same_file' / 'cross_device' / 'unsupported' / 'content_differs'
+        'failed': [(重复文件, 错误信息)]
+        'reclaimed': 预计回收的字节数
+        'cancelled': 是否被取消
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f'unknown link mode: {mode}')
+    tasks = [(keep, dup) for keep, dups in plan for dup in dups]
+    total = len(tasks)
+    linked, skipped, failed = [], [], []
+    reclaimed = [0]
+    lock = threading.Lock()
+    done = [0]
+
+    def link_one(keep, dup):
+        """返回 (结果, 附加信息)：('linked', 回收字节) / ('skipped', 原因)"""
+        ks, ds = os.stat(keep), os.stat(dup)
+        if (ks.st_dev, ks.st_ino) == (ds.st_dev, ds.st_ino):
+            return 'skipped', 'same_file'
+        if ks.st_dev != ds.st_dev:
+            return 'skipped', 'cross_device'
+        if not link_supported(os.path.dirname(dup), mode):
+            return 'skipped', 'unsupported'
+        if not files_identical(keep, dup):
+            return 'skipped', 'content_differs'
+        replace_with_link(keep, dup, mode)
+        # 硬链接时只有 dup 是其 inode 的最后一个链接才真正释放空间
+        freed = ds.st_size if (mode == 'reflink' or ds.st_nlink == 1) else 0
+        return 'linked', freed
+
+    def run_batch(batch):
+        for keep, dup in batch:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                status, info = link_one(keep, dup)
+            except Exception as e:
+                status, info = 'failed', str(e)
+            with lock:
+                if status == 'linked':
+                    linked.append((dup, keep))
+                    reclaimed[0] += info
+                elif status == 'skipped':
+                    skipped.append((dup, info))
+                else:
+                    failed.append((dup, info))
+                done[0] += 1
+                count = done[0]
+            if progress_callback:
+                progress_callback(count, total)
+
+    # 按重复文件所在目录分批
+    by_dir = {}
+    for keep, dup in tasks:
+        by_dir.setdefault(os.path.dirname(dup), []).append((keep, dup))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(run_batch, batch) for batch in by_dir.values()]:
+            future.result()
+
+    return {
+        'linked': linked,
+        'skipped': skipped,
+        'failed': failed,
+        'reclaimed': reclaimed[0],
+        'cancelled': bool(cancel_event is not None and cancel_event.is_set() and done[0] < total),
+    }
+
+
+def link_plan_from_groups(groups):
+    """由 find_duplicates 的分组生成链接计划：每组保留第一个未损坏的文件，其余替换为链接"""
+    plan = []
+    for group in groups:
+        good = [info['path'] for info in group if not info.get('is_corrupt')]
+        if len(good) > 1:
+            plan.append((good[0], good[1:]))
+    return plan
@@ -1,27 +1,89 @@
 import argparse
-import os
-from compare import (collect_images,find_duplicates,supplement_duplicates)
+from itertools import chain
+# compare 及其依赖（PIL 等）在解析完参数后才导入，--help 不加载任何重型模块
 
 TEXTS = {
     'zh': {
         'desc': '照片去重与增补工具',
         'folder1': '主文件夹路径（去重模式为待去重文件夹，增补模式为主文件夹）',
-        'folder2': '补充文件夹路径（仅增补模式需要）',
+        'folder2': '补充文件夹路径（仅增补模式需要）；可给出多个，按优先级排列，一次扫描生成统一的增补计划',
         'report': '报告输出路径',
-        'hash': '哈希算法',
+        'hash': '哈希算法；payload 对 JPEG/PNG 只哈希图像数据，忽略 EXIF 等元数据',
         'execute': '真正执行写入操作（否则为只读预演模式）',
+        'no_text_report': '只写结构化报告（.jsonl），不生成文本报告',
+        'warm_thumbnails': '分析完成后为报告中的文件预生成缩略图缓存，GUI 打开报告时直接读取',
+        'warm_done': '缩略图缓存：新生成 {created}，已缓存 {cached}，失败 {failed}',
+        'warm_hit_rate': '缩略图缓存命中率 {rate:.0%}（命中 {hits} 次，未命中 {misses} 次）',
+        'exif_stats': '图片缩略图来源：内嵌 EXIF 缩略图 {exif} 次，解码原图 {decode} 次（快速路径 {rate:.0%}）',
+        'link': '去重模式下把每组中除第一个未损坏文件外的重复文件替换为硬链接（hard）或 reflink 克隆（reflink），需配合 --execute，否则只预演',
+        'link_plan': '预演：{groups} 组中的 {files} 个重复文件将被替换为 {mode} 链接，最多可回收 {mb:.2f} MB（加 --execute 执行）',
+        'link_done': '链接替换完成：替换 {linked} 个，跳过 {skipped} 个，失败 {failed} 个，回收 {mb:.2f} MB',
+        'link_skipped': '    跳过 {path}：{reason}',
+        'link_failed': '    失败 {path}：{error}',
+        'link_reason_same_file': '已是同一文件',
+        'link_reason_cross_device': '与保留文件不在同一文件系统',
+        'link_reason_unsupported': '文件系统不支持该链接方式',
+        'link_reason_content_differs': '内容与保留文件不一致',
+        'profile': '用 cProfile 记录整个分析过程，并把结果写入指定文件（可用 python -m pstats 或 snakeviz 查看）',
+        'profile_saved': 'cProfile 结果已保存到: {path}',
+        'jobs': '探测图片尺寸的进程数，auto 为按设备自动调优（默认按 CPU 数）',
+        'io_threads': '哈希与验证图片的线程数，auto 为按设备自动调优（默认 1，顺序处理）',
+        'chunk_size': '哈希时每次读取的字节数，可带 K/M 后缀，auto 为按设备自动调优（默认按文件大小取 8K～1M）',
+        'bad_knob': '{option} 的取值无效：{value}（应为 auto 或正整数）',
+        'memory_limit': '去重模式下使用外部排序，把中间数据写入磁盘，内存占用不超过该上限（如 512M、2G），适用于千万级文件的图库',
+        'spill_dir': '外部排序临时文件所在目录（默认为系统临时目录，应位于磁盘而非内存文件系统上）',
+        'bad_size': '{option} 的取值无效：{value}（应为正整数，可带 K/M/G 后缀）',
+        'shard': '分片扫描：只扫描第 I 个分片（共 N 个，I 从 0 开始），写入 --index 指定的部分索引；各分片可在不同主机上并行运行',
+        'index': '分片扫描时部分索引的输出路径（默认 shard_I_of_N.jsonl）',
+        'merge_index': '合并各分片的部分索引，计算跨分片的重复组并生成报告（folder1 为本机上的根目录）',
+        'bad_shard': '--shard 的取值无效：{value}（应为 I/N，0 <= I < N）',
+        'shard_mode': '运行分片扫描：根目录={folder}，分片 {shard}/{shards}',
+        'merge_mode': '运行分片合并：根目录={folder}，共 {count} 个索引',
         'dedup_mode': '运行去重模式：目标文件夹={folder}',
         'supp_mode': '运行增补模式：主文件夹={main}，补充文件夹={supp}',
+        'option_conflict': '{option} 不能与 {other} 同用',
+        'supplement_folders': '补充文件夹（增补模式）',
     },
     'en': {
         'desc': 'Photo Deduplication & Supplement Tool',
         'folder1': 'Main folder path (target folder for deduplication, main folder for supplement)',
-        'folder2': 'Supplement folder path (only needed for supplement mode)',
+        'folder2': 'Supplement folder path (only needed for supplement mode); several may be given in ranked order to build one plan in a single scan',
         'report': 'Report output path',
-        'hash': 'Hash algorithm',
+        'hash': 'Hash algorithm; payload hashes only the image data of JPEG/PNG, ignoring EXIF and other metadata',
         'execute': 'Actually perform file operations (otherwise dry-run mode)',
+        'no_text_report': 'Only write the structured report (.jsonl), skip the text report',
+        'warm_thumbnails': 'Pre-generate the thumbnail cache for files in the report so the GUI opens it instantly',
+        'warm_done': 'Thumbnail cache: {created} created, {cached} already cached, {failed} failed',
+        'warm_hit_rate': 'Thumbnail cache hit rate {rate:.0%} ({hits} hits, {misses} misses)',
+        'exif_stats': 'Image thumbnail sources: {exif} embedded EXIF thumbnails, {decode} full decodes ({rate:.0%} fast path)',
+        'link': 'In dedup mode, replace every duplicate except the first intact file of each group with a hard link (hard) or reflink clone (reflink); requires --execute, otherwise only a dry run',
+        'link_plan': 'Dry run: {files} duplicates in {groups} groups would be replaced with {mode} links, reclaiming up to {mb:.2f} MB (add --execute to apply)',
+        'link_done': 'Link replacement done: {linked} replaced, {skipped} skipped, {failed} failed, {mb:.2f} MB reclaimed',
+        'link_skipped': '    Skipped {path}: {reason}',
+        'link_failed': '    Failed {path}: {error}',
+        'link_reason_same_file': 'already the same file',
+        'link_reason_cross_device': 'not on the same filesystem as the kept file',
+        'link_reason_unsupported': 'link mode not supported by the filesystem',
+        'link_reason_content_differs': 'content differs from the kept file',
+        'profile': 'Profile the whole analysis with cProfile and write the dump to the given file (view with python -m pstats or snakeviz)',
+        'profile_saved': 'cProfile dump saved to: {path}',
+        'jobs': 'Processes used to probe image dimensions; auto picks a per-device tuned value (default: CPU count)',
+        'io_threads': 'Threads used to hash and validate images; auto picks a per-device tuned value (default: 1, sequential)',
+        'chunk_size': 'Bytes read per hashing step, K/M suffixes allowed; auto picks a per-device tuned value (default: 8K-1M by file size)',
+        'bad_knob': 'Invalid value for {option}: {value} (expected auto or a positive integer)',
+        'memory_limit': 'Deduplication only: use external sorting, spilling intermediate data to disk so memory stays under this limit (e.g. 512M, 2G); meant for libraries with tens of millions of files',
+        'spill_dir': 'Directory for external sort temporary files (default: system temp directory; it should be on disk, not a RAM filesystem)',
+        'bad_size': 'Invalid value for {option}: {value} (expected a positive integer, optionally with a K/M/G suffix)',
+        'shard': 'Sharded scan: scan only shard I of N (I starts at 0) and write the partial index given by --index; shards can run in parallel on different hosts',
+        'index': 'Output path of the partial index for a sharded scan (default: shard_I_of_N.jsonl)',
+        'merge_index': 'Merge the partial indexes of all shards, find duplicate groups across shards and write the report (folder1 is the root on this host)',
+        'bad_shard': 'Invalid value for --shard: {value} (expected I/N with 0 <= I < N)',
+        'shard_mode': 'Running sharded scan: root={folder}, shard {shard}/{shards}',
+        'merge_mode': 'Running shard merge: root={folder}, {count} indexes',
         'dedup_mode': 'Running deduplication mode: target folder={folder}',
         'supp_mode': 'Running supplement mode: main={main}, supplement={supp}',
+        'option_conflict': '{option} cannot be combined with {other}',
+        'supplement_folders': 'supplement folders (supplement mode)',
     }
 }
 def get_text(lang, key, **kwargs):
@@ -37,22 +99,133 @@ def main():
             lang = sys.argv[i+1]
     parser = argparse.ArgumentParser(description=get_text(lang, 'desc'))
     parser.add_argument('folder1', help=get_text(lang, 'folder1'))
-    parser.add_argument('folder2', nargs='?', default=None, help=get_text(lang, 'folder2'))
+    parser.add_argument('folder2', nargs='*', default=[], help=get_text(lang, 'folder2'))
     parser.add_argument('--report', default='report.txt', help=get_text(lang, 'report'))
-    parser.add_argument('--hash', default='md5', choices=['md5', 'sha1'], help=get_text(lang, 'hash'))
+    parser.add_argument('--hash', default='md5', choices=['md5', 'sha1', 'payload'], help=get_text(lang, 'hash'))
     parser.add_argument('--execute', action='store_true', help=get_text(lang, 'execute'))
+    parser.add_argument('--no-text-report', action='store_true', help=get_text(lang, 'no_text_report'))
+    parser.add_argument('--warm-thumbnails', action='store_true', help=get_text(lang, 'warm_thumbnails'))
+    parser.add_argument('--link', choices=['hard', 'reflink'], help=get_text(lang, 'link'))
+    parser.add_argument('--profile', metavar='PATH', help=get_text(lang, 'profile'))
+    parser.add_argument('--jobs', metavar='N|auto', help=get_text(lang, 'jobs'))
+    parser.add_argument('--io-threads', metavar='N|auto', help=get_text(lang, 'io_threads'))
+    parser.add_argument('--chunk-size', metavar='SIZE|auto', help=get_text(lang, 'chunk_size'))
+    parser.add_argument('--memory-limit', metavar='SIZE', help=get_text(lang, 'memory_limit'))
+    parser.add_argument('--spill-dir', metavar='DIR', help=get_text(lang, 'spill_dir'))
+    parser.add_argument('--shard', metavar='I/N', help=get_text(lang, 'shard'))
+    parser.add_argument('--index', metavar='PATH', help=get_text(lang, 'index'))
+    parser.add_argument('--merge-index', nargs='+', metavar='INDEX', help=get_text(lang, 'merge_index'))
     parser.add_argument('--lang', default=lang, choices=['zh', 'en'], help='Language: zh or en')
     args = parser.parse_args()
     lang = args.lang
+    # --link 会原地替换文件，不适用的模式下直接报错，不能静默忽略
+    if args.link and args.folder2:
+        parser.error(get_text(lang, 'option_conflict', option='--link', other=get_text(lang, 'supplement_folders')))
+    if args.link and args.shard:
+        parser.error(get_text(lang, 'option_conflict', option='--link', other='--shard'))
+    if args.warm_thumbnails and args.shard:
+        parser.error(get_text(lang, 'option_conflict', option='--warm-thumbnails', other='--shard'))
+    # 外部排序只用于普通去重模式
+    for option, value in (('--memory-limit', args.memory_limit), ('--spill-dir', args.spill_dir)):
+        if value is None:
+            continue
+        if args.folder2:
+            parser.error(get_text(lang, 'option_conflict', option=option, other=get_text(lang, 'supplement_folders')))
+        for other, given in (('--shard', args.shard), ('--merge-index', args.merge_index)):
+            if given:
+                parser.error(get_text(lang, 'option_conflict', option=option, other=other))
+    from tuning import parse_knob
+    knobs = {}
+    for option, dest, byte_size in (('--jobs', 'jobs', False), ('--io-threads', 'io_threads', False),
+                                    ('--chunk-size', 'chunk_size', True)):
+        value = getattr(args, dest)
+        try:
+            knobs[dest] = parse_knob(value, byte_size=byte_size)
+        except ValueError:
+            parser.error(get_text(lang, 'bad_knob', option=option, value=value))
+    external = {}
+    if args.memory_limit:
+        from external_sort import parse_memory_limit
+        try:
+            external['memory_limit'] = parse_memory_limit(args.memory_limit)
+        except ValueError:
+            parser.error(get_text(lang, 'bad_size', option='--memory-limit', value=args.memory_limit))
+        external['spill_dir'] = args.spill_dir
     import compare
+    compare.setup_logging()
+    compare.install_signal_handlers()
     compare.LANG = lang
     dry_run = not args.execute
-    if args.folder2:
-        print(get_text(lang, 'supp_mode', main=args.folder1, supp=args.folder2))
-        compare.supplement_duplicates(args.folder1, args.folder2, args.report, args.hash, dry_run=dry_run)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if args.shard:
+        from shard_index import parse_shard_spec, scan_shard
+        try:
+            shard, shards = parse_shard_spec(args.shard)
+        except ValueError:
+            parser.error(get_text(lang, 'bad_shard', value=args.shard))
+        print(get_text(lang, 'shard_mode', folder=args.folder1, shard=shard, shards=shards))
+        result = scan_shard(args.folder1, shard, shards, args.index or f'shard_{shard}_of_{shards}.jsonl', args.hash,
+                            log_callback=print, **knobs)
+    elif args.merge_index:
+        print(get_text(lang, 'merge_mode', folder=args.folder1, count=len(args.merge_index)))
+        try:
+            result = compare.merge_shard_indexes(args.folder1, args.merge_index, args.report, dry_run=dry_run,
+                                                 text_report=not args.no_text_report)
+        except ValueError as e:
+            parser.exit(1, f'{e}\n')
+    elif args.folder2:
+        print(get_text(lang, 'supp_mode', main=args.folder1, supp=', '.join(args.folder2)))
+        sources = args.folder2[0] if len(args.folder2) == 1 else args.folder2
+        result = compare.supplement_duplicates(args.folder1, sources, args.report, args.hash, dry_run=dry_run,
+                                               text_report=not args.no_text_report, **knobs)
     else:
         print(get_text(lang, 'dedup_mode', folder=args.folder1))
-        compare.find_duplicates(args.folder1, args.report, args.hash, dry_run=dry_run)
+        result = compare.find_duplicates(args.folder1, args.report, args.hash, dry_run=dry_run,
+                                         text_report=not args.no_text_report, **knobs, **external)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(get_text(lang, 'profile_saved', path=args.profile))
+    if args.link:
+        from file_ops import batch_link, link_plan_from_groups
+        # --memory-limit 时分组为从报告流式读取的视图，这里只迭代，不拼接成列表
+        groups = chain(result.get('img_groups', []), result.get('vid_groups', []))
+        if dry_run:
+            plan_groups = files = reclaim = 0
+            for group in groups:
+                good = [f for f in group if not f.get('is_corrupt')]
+                if len(good) > 1:
+                    plan_groups += 1
+                    files += len(good) - 1
+                    reclaim += sum(f.get('size', 0) for f in good[1:])
+            print(get_text(lang, 'link_plan', groups=plan_groups, files=files, mode=args.link, mb=reclaim / 1024 / 1024))
+        else:
+            linked = batch_link(link_plan_from_groups(groups), mode=args.link)
+            for path, reason in linked['skipped']:
+                print(get_text(lang, 'link_skipped', path=path, reason=get_text(lang, 'link_reason_' + reason)))
+            for path, error in linked['failed']:
+                print(get_text(lang, 'link_failed', path=path, error=error))
+            print(get_text(lang, 'link_done', linked=len(linked['linked']), skipped=len(linked['skipped']),
+                           failed=len(linked['failed']), mb=linked['reclaimed'] / 1024 / 1024))
+    if args.warm_thumbnails:
+        from thumbnails import warm_thumbnails, render_stats
+        from stage_stats import StageStats
+        items = [(f['path'], 'image') for group in result.get('img_groups', []) for f in group]
+        items += [(f['path'], 'video') for group in result.get('vid_groups', []) for f in group]
+        items += [(f['path'], 'image') for f in result.get('added_images', [])]
+        items += [(f['path'], 'video') for f in result.get('added_videos', [])]
+        timer = StageStats()
+        print(get_text(lang, 'warm_done', **warm_thumbnails(items, stats=timer)))
+        warm = timer.to_dict()['thumbnails']
+        if 'cache_hit_rate' in warm:
+            print(get_text(lang, 'warm_hit_rate', rate=warm['cache_hit_rate'], hits=warm['cache_hits'],
+                           misses=warm['cache_misses']))
+        stats = render_stats()
+        print(get_text(lang, 'exif_stats', exif=stats['exif'], decode=stats['decode'], rate=stats['exif_rate']))
 
 if __name__ == '__main__':
     main()
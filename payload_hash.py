@@ -0,0 +1,105 @@
+# 忽略元数据的内容哈希（payload hash）
+# 只修改了 EXIF（旋转标记、删除 GPS、照片管理软件改写日期等）的重复图片，字节哈希不同，感知哈希又需要解码。
+# 这里不解码图片，只按文件格式遍历结构：
+#   JPEG：跳过 APPn（EXIF、XMP、ICC 等）和 COM 段，哈希其余的段（量化表、霍夫曼表、帧头、扫描头）
+#         及熵编码的扫描数据，到 EOI 为止（EOI 之后附加的数据不计入）；
+#   PNG：只哈希决定像素内容的块（IHDR、PLTE、tRNS、IDAT），跳过 tEXt、eXIf、tIME 等辅助块。
+# 文件通过 mmap 读取，I/O 与字节哈希相同；其他格式或结构无法解析时返回 None，由调用方改用字节哈希。
+
+import hashlib
+import mmap
+import re
+import struct
+
+PAYLOAD_METHOD = 'payload'
+_JPEG_SOI = b'\xff\xd8'
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# 扫描数据中 FF 后跟 00（字节填充）或 D0-D7（RST）仍属于扫描数据，其余组合为下一个标记
+_JPEG_SCAN_END = re.compile(rb'\xff[^\x00\xd0-\xd7]')
+_PNG_PAYLOAD_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'IDAT'}
+_PNG_CHUNK = struct.Struct('>I4s')
+
+
+def _jpeg_payload(buf, hasher):
+    """遍历 JPEG 标记段，把非元数据部分送入 hasher；不是 JPEG 或结构损坏时返回 False"""
+    if buf[:2] != _JPEG_SOI:
+        return False
+    view = memoryview(buf)
+    n = len(buf)
+    pos = 2
+    try:
+        while pos + 2 <= n:
+            if buf[pos] != 0xFF:
+                return False
+            marker = buf[pos + 1]
+            if marker == 0xFF:  # 标记前的填充字节
+                pos += 1
+                continue
+            if marker == 0xD9:  # EOI
+                hasher.update(b'\xff\xd9')
+                return True
+            if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # 无长度的独立标记
+                hasher.update(view[pos:pos + 2])
+                pos += 2
+                continue
+            if pos + 4 > n:
+                return False
+            end = pos + 2 + ((buf[pos + 2] << 8) | buf[pos + 3])
+            if not (0xE0 <= marker <= 0xEF or marker == 0xFE):
+                hasher.update(view[pos:end])
+            pos = end
+            if marker == 0xDA:  # SOS 之后是熵编码数据，一直到下一个标记
+                match = _JPEG_SCAN_END.search(buf, pos)
+                stop = match.start() if match else n
+                hasher.update(view[pos:stop])
+                pos = stop
+        # 没有 EOI 的截断文件：已读到的内容照样参与哈希
+        return True
+    finally:
+        view.release()
+
+
+def _png_payload(buf, hasher):
+    """只把 IHDR / PLTE / tRNS / IDAT 块的类型和数据送入 hasher；不是 PNG 时返回 False"""
+    if buf[:8] != _PNG_SIGNATURE:
+        return False
+    view = memoryview(buf)
+    n = len(buf)
+    pos = 8
+    try:
+        while pos + 8 <= n:
+            length, chunk_type = _PNG_CHUNK.unpack_from(buf, pos)
+            data_end = pos + 8 + length
+            if data_end > n:
+                return False
+            if chunk_type in _PNG_PAYLOAD_CHUNKS:
+                hasher.update(chunk_type)
+                hasher.update(view[pos + 8:data_end])
+            if chunk_type == b'IEND':
+                break
+            pos = data_end + 4  # 跳过 CRC
+        return True
+    finally:
+        view.release()
+
+
+def payload_digest(path, method='md5'):
+    """
+    返回忽略元数据的内容摘要（原始字节）；不是 JPEG / PNG 或无法解析时返回 None。
+    空文件或不支持 mmap 的文件（部分网络 / 特殊文件系统）同样返回 None，由调用方退回按字节哈希。
+    method 为底层哈希算法（md5 / sha1 / sha256）。
+    """
+    hasher = hashlib.new(method if method in ('md5', 'sha1', 'sha256') else 'md5')
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                head = buf[:8]
+                if head.startswith(_JPEG_SOI):
+                    ok = _jpeg_payload(buf, hasher)
+                elif head == _PNG_SIGNATURE:
+                    ok = _png_payload(buf, hasher)
+                else:
+                    ok = False
+    except (OSError, ValueError):  # mmap.error 即 OSError；空文件 mmap 时为 ValueError
+        return None
+    return hasher.digest() if ok else None
@@ -1,14 +1,30 @@
-# 设置文件创建时间的工具，实现如下要求：
-# 递归遍历指定目录，包含所有子目录，查找每个文件的atime/mtime/ctime，找出最早时间；
-# 支持两种模式：
-#   --mode show ：只显示每个文件的时间信息，不修改
-#   --mode exec ：执行实际的创建时间修改
-# 通过命令行参数控制要处理的目录和模式
+# 把文件时间统一为最早时间的工具，实现如下要求：
+# 递归遍历指定目录，包含所有子目录，比较每个文件的 atime / mtime / 创建时间以及照片、视频的拍摄时间（EXIF / QuickTime），
+# 找出最早时间，把修改时间和访问时间改为该时间（os.utime，各平台通用）；Windows 上装有 pywin32 时同时修改创建时间。
+# 创建时间：macOS / BSD 与 Windows 取 st_birthtime（Windows 旧版 Python 为 st_ctime），Linux 通过 statx 读取（内核与文件系统支持时）。
+# 支持三种模式：
+#   --mode show  ：预演，只输出汇总（--verbose 时逐个列出将要的变化），可用 --plan 把变更计划写成 CSV 或 JSON Lines
+#   --mode exec  ：扫描并直接修改
+#   --mode apply ：按 show 写出的计划修改（--plan 指定），不再遍历目录；计划写出后又被改动过的文件跳过
+# 遍历基于 os.scandir：每个目录的列举和每批文件的 stat 与拍摄时间读取作为独立任务并行执行，输出按块缓冲写出。
+# 加 --index 时不遍历目录，改为读取 main.py 刚写出的分片索引或报告（路径、大小、修改时间、拍摄时间），
+# 只对索引显示拍摄时间早于修改时间的文件 stat 一次并修改；索引中没有拍摄时间的文件不处理（汇总中列出个数），需完整扫描。
 
-import os
-import sys
 import argparse
+import csv
+import ctypes
 import datetime
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from capture_time import capture_time
+from file_ops import TRASH_DIR_NAME
+from structured_report import ReportWriter
 
 # 仅在 Windows 下使用 pywin32
 try:
@@ -20,14 +36,272 @@ except ImportError:
     win32file = None
     win32con = None
 
-def get_file_times(path):
-    stat = os.stat(path)
-    atime = datetime.datetime.fromtimestamp(stat.st_atime)
-    mtime = datetime.datetime.fromtimestamp(stat.st_mtime)
-    ctime = datetime.datetime.fromtimestamp(stat.st_ctime)
-    return atime, mtime, ctime
+PLAN_MODE = 'timestamp_plan'
+PLAN_FIELDS = ('path', 'size', 'mtime_ns', 'atime_ns', 'birth_ns', 'taken_ns', 'target_ns', 'source')
+PROBE_BATCH = 256       # 每个任务 stat 并读取拍摄时间的文件数
+OUTPUT_BUFFER = 1000    # 逐文件输出时累计多少行写出一次
+MIN_SHIFT_NS = 2 * 10 ** 9  # 比目标时间晚不到 2 秒（FAT 的时间精度，也涵盖写入时 atime 略早于 mtime）不算需要修改
+SOURCE_LABELS = {'atime': '访问时间', 'mtime': '修改时间', 'birth': '创建时间', 'taken': '拍摄时间'}
+
+# statx（Linux 4.11+，glibc 2.28+）：只请求创建时间，不强制与远端文件系统同步
+_AT_FDCWD = -100
+_AT_SYMLINK_NOFOLLOW = 0x100
+_AT_STATX_DONT_SYNC = 0x4000
+_STATX_BTIME = 0x800
+_STATX_BUFFER = 256
+_STATX_BTIME_OFFSET = 80  # struct statx 中 stx_btime 的偏移
+_statx = None
+
+
+def _load_statx():
+    """返回 libc 的 statx 函数，平台不支持时返回 False（只查找一次）"""
+    global _statx
+    if _statx is None:
+        _statx = False
+        if sys.platform.startswith('linux'):
+            try:
+                func = ctypes.CDLL(None, use_errno=True).statx
+            except (OSError, AttributeError):
+                return _statx
+            func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.c_void_p]
+            func.restype = ctypes.c_int
+            _statx = func
+    return _statx
+
+
+def birth_time_ns(path, st):
+    """文件的创建时间（纳秒），平台或文件系统不提供时返回 None"""
+    birth = getattr(st, 'st_birthtime_ns', None)
+    if birth is not None:
+        return birth
+    if hasattr(st, 'st_birthtime'):
+        return int(st.st_birthtime * 1e9)
+    if sys.platform == 'win32':
+        return st.st_ctime_ns  # Python 3.12 之前 Windows 的 st_ctime 即创建时间
+    statx = _load_statx()
+    if not statx:
+        return None
+    buf = ctypes.create_string_buffer(_STATX_BUFFER)
+    if statx(_AT_FDCWD, os.fsencode(path), _AT_SYMLINK_NOFOLLOW | _AT_STATX_DONT_SYNC, _STATX_BTIME, buf) != 0:
+        return None
+    (mask,) = struct.unpack_from('=I', buf.raw, 0)
+    if not mask & _STATX_BTIME:
+        return None
+    sec, nsec = struct.unpack_from('=qI', buf.raw, _STATX_BTIME_OFFSET)
+    return sec * 1_000_000_000 + nsec
 
-def set_file_creation_time(path, new_ctime):
+
+def file_record(path, st, read_exif=True):
+    """一个文件的时间信息：大小、mtime / atime / 创建时间 / 拍摄时间（纳秒，没有时为 None）"""
+    taken = capture_time(path) if read_exif else None
+    return {
+        'path': path,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'atime_ns': st.st_atime_ns,
+        'birth_ns': birth_time_ns(path, st),
+        'taken_ns': int(round(taken * 1e9)) if taken else None,
+    }
+
+
+def _list_dir(directory):
+    """列举一个目录，返回 (子目录, 普通文件, 错误)；不跟随符号链接，跳过回收站目录"""
+    subdirs, files, errors = [], [], []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != TRASH_DIR_NAME:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(entry.path)
+                except OSError as e:
+                    errors.append((entry.path, str(e)))
+    except OSError as e:
+        errors.append((directory, str(e)))
+    return subdirs, files, errors
+
+
+def _probe_files(paths, read_exif):
+    records, errors = [], []
+    for path in paths:
+        try:
+            records.append(file_record(path, os.lstat(path), read_exif))
+        except OSError as e:
+            errors.append((path, str(e)))
+    return records, errors
+
+
+def scan_tree(root, jobs=None, read_exif=True, on_error=None):
+    """
+    并行遍历 root，按完成顺序产出文件记录（file_record）。
+    目录列举与每 PROBE_BATCH 个文件的 stat / 拍摄时间读取都是线程池中的独立任务，
+    目录列举完成后立即提交其子目录和文件批次，大目录也能分散到多个线程。
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = {pool.submit(_list_dir, root): 'dir'}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind = pending.pop(future)
+                if kind == 'dir':
+                    subdirs, files, errors = future.result()
+                    for directory in subdirs:
+                        pending[pool.submit(_list_dir, directory)] = 'dir'
+                    for i in range(0, len(files), PROBE_BATCH):
+                        pending[pool.submit(_probe_files, files[i:i + PROBE_BATCH], read_exif)] = 'files'
+                else:
+                    records, errors = future.result()
+                    yield from records
+                if on_error:
+                    for path, message in errors:
+                        on_error(path, message)
+
+
+def plan_change(record, set_birth=False):
+    """
+    计算一个文件的变更：目标时间为各项时间中最早的一个（忽略缺失值和 1970 年以前的值）。
+    修改时间晚于目标时间（set_birth 时还包括创建时间晚于目标时间）超过 MIN_SHIFT_NS 才需要修改，否则返回 None。
+    """
+    candidates = [(record[key + '_ns'], key) for key in ('taken', 'birth', 'mtime', 'atime')
+                  if record.get(key + '_ns') and record[key + '_ns'] > 0]
+    if not candidates:
+        return None
+    target, source = min(candidates)
+    late_birth = set_birth and record.get('birth_ns') and record['birth_ns'] - target > MIN_SHIFT_NS
+    if record['mtime_ns'] - target <= MIN_SHIFT_NS and not late_birth:
+        return None
+    change = dict(record)
+    change['target_ns'] = target
+    change['source'] = source
+    return change
+
+
+def iter_index_entries(paths, root=None):
+    """
+    读取 compare 写出的扫描结果，产出 {path, size, mtime, taken}（mtime / taken 为秒，taken 可为 None）：
+    分片索引（main.py --shard I/N --index）覆盖全部图片和视频，相对路径拼接 root（默认为索引记录的根目录）；
+    去重 / 增补报告只含分组和增补记录中的文件，同一路径只产出一次。
+    """
+    seen = set()
+    for path in paths:
+        header = _jsonl_header(path)
+        is_index = header.get('mode') == 'shard_index'
+        base = os.path.abspath(root or header.get('root') or '.')
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                rtype = rec.get('type')
+                if is_index:
+                    if rtype == 'file':
+                        yield {'path': os.path.join(base, *rec['rel'].split('/')), 'size': rec['size'],
+                               'mtime': rec['mtime'], 'taken': rec.get('taken')}
+                    continue
+                if rtype in ('img_group', 'vid_group'):
+                    files = rec.get('files', [])
+                elif rtype == 'supp_file':
+                    files = [rec]
+                else:
+                    continue
+                for info in files:
+                    if info.get('mtime') is None or info['path'] in seen:
+                        continue
+                    seen.add(info['path'])
+                    yield {'path': info['path'], 'size': info.get('size'), 'mtime': info['mtime'],
+                           'taken': info.get('taken')}
+
+
+def index_candidate(entry, set_birth=False):
+    """
+    按索引判断文件是否可能需要修改，不访问文件：拍摄时间早于索引中的修改时间超过 MIN_SHIFT_NS，
+    或需要修改创建时间（set_birth）且有拍摄时间。没有拍摄时间的文件只有完整扫描才能判断，索引模式不处理。
+    """
+    taken = entry.get('taken')
+    if not taken:
+        return False
+    return set_birth or (entry['mtime'] - taken) * 1e9 > MIN_SHIFT_NS
+
+
+def _check_entries(entries, set_birth, read_exif):
+    """对候选文件各 stat 一次：与索引一致时沿用索引中的拍摄时间，否则（扫描后被改动过）重新读取"""
+    changes, errors, stale = [], [], 0
+    for entry in entries:
+        path = entry['path']
+        try:
+            st = os.lstat(path)
+        except OSError as e:
+            errors.append((path, str(e)))
+            continue
+        if st.st_size == entry['size'] and abs(st.st_mtime - entry['mtime']) < 1e-6:
+            record = {
+                'path': path,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'atime_ns': st.st_atime_ns,
+                'birth_ns': birth_time_ns(path, st),
+                'taken_ns': int(round(entry['taken'] * 1e9)),
+            }
+        else:
+            stale += 1
+            record = file_record(path, st, read_exif)
+        change = plan_change(record, set_birth)
+        if change is not None:
+            changes.append(change)
+    return changes, errors, stale
+
+
+def index_changes(entries, jobs=None, set_birth=False, read_exif=True, on_error=None, counts=None):
+    """
+    由索引条目产出变更：先按索引筛出候选（index_candidate），再分批在线程池中 stat 核对。
+    同时在途的批次数有上限，内存占用与索引大小无关。
+    counts 为 dict 时累计 entries / no_taken（没有拍摄时间而跳过）/ candidates / stale。
+    """
+    counts = counts if counts is not None else {}
+    for key in ('entries', 'no_taken', 'candidates', 'stale'):
+        counts.setdefault(key, 0)
+
+    def batches():
+        batch = []
+        for entry in entries:
+            counts['entries'] += 1
+            if not entry.get('taken'):
+                counts['no_taken'] += 1
+                continue
+            if not index_candidate(entry, set_birth):
+                continue
+            counts['candidates'] += 1
+            batch.append(entry)
+            if len(batch) >= PROBE_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def collect(future):
+        changes, errors, stale = future.result()
+        counts['stale'] += stale
+        if on_error:
+            for path, message in errors:
+                on_error(path, message)
+        return changes
+
+    limit = (jobs or min(32, (os.cpu_count() or 1) + 4)) * 4  # 在途批次上限，线程数默认值同 ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        window = deque()
+        for batch in batches():
+            window.append(pool.submit(_check_entries, batch, set_birth, read_exif))
+            if len(window) >= limit:
+                yield from collect(window.popleft())
+        while window:
+            yield from collect(window.popleft())
+
+
+def set_file_creation_time(path, timestamp):
+    """Windows：只修改创建时间（访问时间与修改时间由 os.utime 设置）"""
     try:
         handle = win32file.CreateFile(
             path,
@@ -37,64 +311,254 @@ def set_file_creation_time(path, new_ctime):
             win32con.OPEN_EXISTING,
             win32con.FILE_ATTRIBUTE_NORMAL,
             None)
-        stat = os.stat(path)
-        atime = pywintypes.Time(stat.st_atime)
-        mtime = pywintypes.Time(stat.st_mtime)
-        # 注意new_ctime必须是 pywintypes.Time 类型
-        win32file.SetFileTime(handle, pywintypes.Time(new_ctime.timestamp()), atime, mtime)
-        handle.close()
+        try:
+            win32file.SetFileTime(handle, pywintypes.Time(timestamp), None, None)
+        finally:
+            handle.close()
         return True, ""
     except Exception as e:
         return False, str(e)
 
-def process_file(path, mode):
+
+def apply_change(change, set_birth=False):
+    """
+    执行一个变更，返回 ('applied' | 'changed' | 'failed', 说明)。
+    文件的大小或修改时间与计划记录的不一致（计划写出后被改动过）时不修改，返回 'changed'。
+    """
+    path = change['path']
     try:
-        atime, mtime, ctime = get_file_times(path)
-        min_time = min(atime, mtime, ctime)
-        print(f"{path}")
-        print(f"  atime: {atime}")
-        print(f"  mtime: {mtime}")
-        print(f"  ctime: {ctime}")
-        print(f"  earliest: {min_time}", end=' ')
-        if min_time == ctime:
-            print("[已最早，无需修改]")
-            return
-
-        if mode == "show":
-            print("[需修改]")
-        elif mode == "exec":
-            # 修改 ctime（仅Windows）
-            if win32file:
-                ok, errmsg = set_file_creation_time(path, min_time)
-                if ok:
-                    print("[已修改]")
-                else:
-                    print(f"[修改失败: {errmsg}]")
-            else:
-                print("[exec模式仅支持Windows]")
+        st = os.lstat(path)
+    except OSError as e:
+        return 'failed', str(e)
+    if st.st_size != change['size'] or st.st_mtime_ns != change['mtime_ns']:
+        return 'changed', ''
+    target = change['target_ns']
+    try:
+        os.utime(path, ns=(target, target))
+    except OSError as e:
+        return 'failed', str(e)
+    if set_birth:
+        ok, errmsg = set_file_creation_time(path, target / 1e9)
+        if not ok:
+            return 'failed', errmsg
+    return 'applied', ''
+
+
+class PlanWriter:
+    """变更计划：扩展名为 .csv 时写 CSV，否则写 JSON Lines（带 header / end 记录，可识别不完整的计划）"""
+
+    def __init__(self, path, root):
+        self.path = path
+        self._csv = path.lower().endswith('.csv')
+        if self._csv:
+            self._f = open(path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._f, fieldnames=PLAN_FIELDS, extrasaction='ignore')
+            self._writer.writeheader()
         else:
-            print("[未知模式]")
-    except Exception as e:
-        print(f"{path} [处理失败: {e}]")
+            self._report = ReportWriter(path, PLAN_MODE, root=root)
+
+    def write(self, change):
+        # 计划中一律记录绝对路径，apply 时与当前工作目录无关
+        change = dict(change, path=os.path.abspath(change['path']))
+        if self._csv:
+            self._writer.writerow(change)
+        else:
+            self._report.write('change', **{key: change.get(key) for key in PLAN_FIELDS})
+
+    def close(self, summary=None):
+        if self._csv:
+            self._f.close()
+        else:
+            self._report.close(summary)
+
+
+def _int_or_none(value):
+    return int(value) if value not in (None, '') else None
+
+
+def _jsonl_header(path):
+    """
+    返回 JSON Lines 文件（计划、报告、分片索引）的 header 记录，只读首行和末尾，不遍历全文；
+    没有 end 记录（写出时中断）时抛出 ValueError。
+    """
+    with open(path, 'rb') as f:
+        head = f.readline()
+        f.seek(max(0, os.fstat(f.fileno()).st_size - 4096))
+        tail = f.read().strip().splitlines()
+    try:
+        header = json.loads(head)
+        end = json.loads(tail[-1]) if tail else {}
+    except ValueError:
+        header, end = {}, {}
+    if header.get('type') != 'header':
+        raise ValueError(f"无法识别的文件: {path}")
+    if end.get('type') != 'end':
+        raise ValueError(f"文件不完整（写出时中断）: {path}")
+    return header
+
+
+def _plan_rows(path):
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                change = {key: _int_or_none(row.get(key)) for key in PLAN_FIELDS if key not in ('path', 'source')}
+                change['path'] = row['path']
+                change['source'] = row.get('source')
+                yield change
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec.pop('type', None) == 'change':
+                yield rec
+
+
+def read_plan(path):
+    """
+    逐条产出计划中的变更；JSON Lines 计划不完整（没有 end 记录）或不是变更计划时抛出 ValueError。
+    计划中的路径必须是绝对路径（相对路径取决于写出时的工作目录，apply 时可能指向另一棵目录树），
+    含相对路径时在修改任何文件之前抛出 ValueError。
+    """
+    if not path.lower().endswith('.csv'):
+        header = _jsonl_header(path)
+        if header.get('mode') != PLAN_MODE:
+            raise ValueError(f"不是时间变更计划: {path}")
+    for change in _plan_rows(path):
+        if not os.path.isabs(change['path']):
+            raise ValueError(f"计划中的路径必须是绝对路径: {change['path']}")
+    yield from _plan_rows(path)
+
+
+class Output:
+    """逐文件输出按块缓冲，避免每个文件多次 print"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lines = []
+
+    def line(self, text):
+        self._lines.append(text + '\n')
+        if len(self._lines) >= OUTPUT_BUFFER:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self.stream.write(''.join(self._lines))
+            self._lines = []
+        self.stream.flush()
+
+
+def _fmt(ns):
+    return datetime.datetime.fromtimestamp(ns / 1e9).strftime('%Y-%m-%d %H:%M:%S') if ns else '-'
+
+
+def _describe(change, status=None):
+    text = f"{change['path']}  {_fmt(change['mtime_ns'])} -> {_fmt(change['target_ns'])}  [{SOURCE_LABELS.get(change['source'], change['source'])}]"
+    return f"{text} [{status}]" if status else text
+
+
+def run(changes, mode, out, verbose=False, plan=None, set_birth=False):
+    """处理变更流：写入计划、执行修改并统计，返回汇总 dict"""
+    summary = {'changes': 0, 'applied': 0, 'changed': 0, 'failed': 0, 'by_source': {}}
+    for change in changes:
+        summary['changes'] += 1
+        summary['by_source'][change['source']] = summary['by_source'].get(change['source'], 0) + 1
+        if plan is not None:
+            plan.write(change)
+        if mode == 'show':
+            if verbose:
+                out.line(_describe(change))
+            continue
+        status, message = apply_change(change, set_birth)
+        summary[status] += 1
+        if status == 'failed':
+            out.line(_describe(change, f"修改失败: {message}"))
+        elif status == 'changed':
+            out.line(_describe(change, "文件已变化，跳过"))
+        elif verbose:
+            out.line(_describe(change, "已修改"))
+    return summary
 
-def process_dir(root_dir, mode):
-    for base, dirs, files in os.walk(root_dir):
-        for fname in files:
-            fpath = os.path.join(base, fname)
-            process_file(fpath, mode)
 
 def main():
-    parser = argparse.ArgumentParser(description="批量查/改文件的创建时间为最早的时间")
-    parser.add_argument("directory", metavar="DIR", help="要处理的根目录")
-    parser.add_argument("--mode", choices=["show", "exec"], required=True, help="操作模式: show | exec")
+    parser = argparse.ArgumentParser(description="批量把文件时间改为最早的时间（含照片/视频的拍摄时间）")
+    parser.add_argument("directory", metavar="DIR", nargs='?',
+                        help="要处理的根目录（apply 模式不需要；与 --index 同用时为索引中相对路径的根目录，可省略）")
+    parser.add_argument("--mode", choices=["show", "exec", "apply"], required=True,
+                        help="操作模式: show（预演）| exec（扫描并修改）| apply（按 --plan 计划修改）")
+    parser.add_argument("--plan", metavar="FILE", help="变更计划文件（.csv 或 .jsonl）：show / exec 时写出，apply 时读取")
+    parser.add_argument("--index", metavar="FILE", nargs='+',
+                        help="读取 main.py 写出的分片索引或报告（.jsonl），不再遍历目录，只处理拍摄时间早于修改时间的文件；"
+                             "索引中没有拍摄时间的文件（无 EXIF / QuickTime 时间）不处理，需不加 --index 完整扫描")
+    parser.add_argument("--jobs", type=int, default=None, help="并行线程数（默认按 CPU 数）")
+    parser.add_argument("--no-exif", action="store_true", help="不读取拍摄时间，只比较文件系统时间")
+    parser.add_argument("--verbose", action="store_true", help="逐个列出变更的文件")
     args = parser.parse_args()
 
-    # 检查操作系统
-    if sys.platform != "win32" and args.mode == "exec":
-        print("exec模式仅支持Windows系统。")
+    if args.mode == "apply" and not args.plan:
+        parser.error("apply 模式需要 --plan")
+    if args.mode == "apply" and args.index:
+        parser.error("apply 模式按 --plan 修改，不能与 --index 同用")
+    if args.mode != "apply" and not args.directory and not args.index:
+        parser.error("show / exec 模式需要 DIR 或 --index")
+    set_birth = win32file is not None
+    if sys.platform == "win32" and not set_birth and args.mode != "show":
+        print("未安装 pywin32，只修改访问时间和修改时间，不修改创建时间。")
+
+    out = Output()
+    started = time.perf_counter()
+    scanned = [0]
+    errors = [0]
+    counts = {}
+
+    def on_error(path, message):
+        errors[0] += 1
+        out.line(f"{path} [读取失败: {message}]")
+
+    if args.mode == "apply":
+        changes = read_plan(args.plan)
+        plan = None
+    elif args.index:
+        changes = index_changes(iter_index_entries(args.index, args.directory), args.jobs, set_birth,
+                                not args.no_exif, on_error, counts)
+        root = os.path.abspath(args.directory) if args.directory else None
+        plan = PlanWriter(args.plan, root) if args.plan else None
+    else:
+        def planned():
+            for record in scan_tree(os.path.abspath(args.directory), args.jobs, not args.no_exif, on_error):
+                scanned[0] += 1
+                change = plan_change(record, set_birth)
+                if change is not None:
+                    yield change
+        changes = planned()
+        plan = PlanWriter(args.plan, os.path.abspath(args.directory)) if args.plan else None
+
+    try:
+        summary = run(changes, args.mode, out, args.verbose, plan, set_birth)
+    except ValueError as e:
+        out.flush()
+        print(e)
         sys.exit(1)
+    summary['scanned'] = scanned[0]
+    summary['errors'] = errors[0]
+    summary.update(counts)
+    summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    if plan is not None:
+        plan.close(summary)
+    out.flush()
+
+    sources = '，'.join(f"{SOURCE_LABELS.get(k, k)} {v}" for k, v in sorted(summary['by_source'].items()))
+    if args.index:
+        print(f"索引记录 {summary['entries']} 个，没有拍摄时间跳过 {summary['no_taken']} 个，需核对 {summary['candidates']} 个"
+              f"（其中扫描后被改动过 {summary['stale']} 个），读取失败 {summary['errors']} 个，耗时 {summary['elapsed_seconds']} 秒")
+    elif args.mode != "apply":
+        print(f"扫描文件 {summary['scanned']} 个，读取失败 {summary['errors']} 个，耗时 {summary['elapsed_seconds']} 秒")
+    print(f"需修改 {summary['changes']} 个" + (f"（最早时间来源：{sources}）" if sources else ""))
+    if args.mode == "show":
+        print("预演模式，未修改任何文件" + (f"；变更计划已写入 {args.plan}" if args.plan else ""))
+    else:
+        print(f"已修改 {summary['applied']} 个，已变化跳过 {summary['changed']} 个，失败 {summary['failed']} 个")
 
-    process_dir(args.directory, args.mode)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
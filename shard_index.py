@@ -0,0 +1,179 @@
+# 分片扫描与部分索引
+# 多个独立的进程（可以在挂载同一共享目录的不同主机上）各扫描目录树的一个确定分片：
+# 目录按其相对根目录的路径哈希分配给分片，同一目录下的文件总在同一分片，各分片互不重叠。
+# 每个分片把图片的大小、尺寸、修改时间、拍摄时间和完整哈希，以及视频的大小、修改时间和拍摄时间写入部分索引（JSON Lines），
+# 由 compare.merge_shard_indexes 读取全部分片的索引，跨分片计算重复组并输出与去重模式相同格式的报告。
+# 索引中只记录相对路径，各主机的挂载点可以不同，合并时拼接合并所在主机的根目录。
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+from compare import (collect_image_table, collect_videos, get_image_digest, iter_walk_directory, normalize_path,
+                     IMAGE_EXTS, VIDEO_EXTS)
+from stage_stats import StageStats
+from structured_report import ReportWriter
+from translations import tr
+
+logger = logging.getLogger(__name__)
+
+INDEX_MODE = 'shard_index'
+
+
+def parse_shard_spec(spec):
+    """解析 'I/N'（分片号从 0 开始），返回 (I, N)"""
+    index, _, count = str(spec).partition('/')
+    index, count = int(index), int(count)
+    if count <= 0 or not 0 <= index < count:
+        raise ValueError(spec)
+    return index, count
+
+
+def relative_dir(root, directory):
+    """目录相对根目录的路径，统一用 '/' 分隔，根目录本身为 '.'"""
+    rel = os.path.relpath(directory, root)
+    return rel.replace(os.sep, '/')
+
+
+def shard_of(rel_dir, shards):
+    """目录所属的分片号：相对路径的 md5 对分片数取模，与主机、挂载点和遍历顺序无关"""
+    digest = hashlib.md5(rel_dir.encode('utf-8', 'surrogateescape')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+
+def iter_shard_files(root, shard, shards):
+    """遍历整棵目录树，只产出属于该分片的目录中的文件（每个分片都要列出全部目录，但只处理自己的文件）"""
+    last_dir, mine = None, False
+    for path in iter_walk_directory(root):
+        directory = os.path.dirname(path)
+        if directory != last_dir:
+            last_dir = directory
+            mine = shard_of(relative_dir(root, directory), shards) == shard
+        if mine:
+            yield path
+
+
+def scan_shard(folder, shard, shards, index_path, hash_method='md5', jobs=None, io_threads=None, chunk_size=None,
+               log_callback=None):
+    """
+    扫描 folder 的第 shard 个分片（共 shards 个），写入部分索引 index_path。
+    分片内所有能读取尺寸的图片都计算完整哈希：其他分片中可能有同大小的文件，单个分片无法判断哪些文件不需要哈希。
+    jobs / io_threads / chunk_size 同 find_duplicates。返回本分片的统计 dict。
+    """
+    from tuning import resolve
+
+    def log_emit(msg):
+        if log_callback:
+            log_callback(msg)
+
+    root = normalize_path(folder)
+    timer = StageStats()
+    with timer.stage('tuning'):
+        knobs, _ = resolve(root, jobs, io_threads, chunk_size, stats=timer)
+    images, videos = [], []
+    with timer.stage('shard_walk') as rec:
+        for path in iter_shard_files(root, shard, shards):
+            ext = os.path.splitext(path)[1].lower()
+            if ext in IMAGE_EXTS:
+                images.append(path)
+            elif ext in VIDEO_EXTS:
+                videos.append(path)
+        rec['files'] += len(images) + len(videos)
+    log_emit(tr('shard_scanning', shard=shard, shards=shards, images=len(images), videos=len(videos)))
+
+    table = collect_image_table(root, stats=timer, jobs=knobs['jobs'], files=images)
+    rows = [i for i in range(len(table)) if table.widths[i]]
+
+    def digest_of(i):
+        try:
+            return get_image_digest(table.paths[i], hash_method, chunk_size=knobs['chunk_size'])
+        except Exception as e:
+            logger.error(f"哈希计算失败: {table.paths[i]}, 错误: {e}")
+            return None
+
+    with timer.stage('hash', files=len(rows), nbytes=sum(table.sizes[i] for i in rows)):
+        if knobs['io_threads'] and knobs['io_threads'] > 1:
+            with ThreadPoolExecutor(max_workers=knobs['io_threads']) as pool:
+                digests = list(pool.map(digest_of, rows))
+        else:
+            digests = [digest_of(i) for i in rows]
+    hashes = dict(zip(rows, digests))
+
+    summary = {'shard': shard, 'shards': shards, 'images': len(table), 'videos': 0,
+               'hashed': sum(1 for d in digests if d is not None),
+               'hash_failed': sum(1 for d in digests if d is None)}
+    with ReportWriter(index_path, INDEX_MODE, root=root, shard=shard, shards=shards, hash_method=hash_method,
+                      host=socket.gethostname()) as index:
+        with timer.stage('report', files=len(table)):
+            for i in range(len(table)):
+                digest = hashes.get(i)
+                index.write('file', kind='img', rel=os.path.relpath(table.paths[i], root).replace(os.sep, '/'),
+                            size=table.sizes[i], shape=table.shape(i), mtime=table.mtimes[i], taken=table.taken(i),
+                            hash=digest.hex() if digest is not None else None,
+                            hash_failed=i in hashes and digest is None)
+        with timer.stage('video', files=len(videos)):
+            for meta in collect_videos(root, jobs=knobs['jobs'], files=videos):
+                index.write('file', kind='vid', rel=os.path.relpath(meta['path'], root).replace(os.sep, '/'),
+                            size=meta['size'], mtime=meta['mtime'], taken=meta['taken'])
+                summary['videos'] += 1
+        summary['elapsed_seconds'] = round(timer.elapsed(), 3)
+        summary['stages'] = timer.to_dict()
+        index.write('stats', **summary)
+    log_emit(tr('shard_done', shard=shard, shards=shards, images=summary['images'], videos=summary['videos'],
+                path=index_path))
+    return summary
+
+
+def _read_index(path):
+    """读取一个部分索引，返回 (header, 文件记录列表)；不是分片索引或没有 end 记录（扫描未完成）时抛出 ValueError"""
+    header, files, complete = None, [], False
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            rtype = rec.pop('type', None)
+            if rtype == 'header':
+                header = rec
+            elif rtype == 'file':
+                files.append(rec)
+            elif rtype == 'stats' and header is not None:
+                header['stats'] = rec
+            elif rtype == 'end':
+                complete = True
+    if header is None or header.get('mode') != INDEX_MODE:
+        raise ValueError(tr('shard_not_index', path=path))
+    if not complete:
+        raise ValueError(tr('shard_incomplete', path=path))
+    return header, files
+
+
+def read_shard_indexes(paths):
+    """
+    读取并校验一组部分索引：分片数与哈希算法必须一致，且 0..N-1 每个分片恰好出现一次。
+    返回 (shards, hash_method, 按分片号排序的 [(header, 文件记录列表)])。
+    """
+    indexes = [_read_index(p) for p in paths]
+    if not indexes:
+        raise ValueError(tr('shard_missing', missing='-'))
+    shards = indexes[0][0]['shards']
+    hash_method = indexes[0][0]['hash_method']
+    for (header, _), path in zip(indexes, paths):
+        if header['shards'] != shards or header['hash_method'] != hash_method:
+            raise ValueError(tr('shard_mismatch', path=path))
+    seen = [header['shard'] for header, _ in indexes]
+    duplicated = sorted({s for s in seen if seen.count(s) > 1})
+    if duplicated:
+        raise ValueError(tr('shard_duplicated', shards=', '.join(map(str, duplicated))))
+    missing = sorted(set(range(shards)) - set(seen))
+    if missing:
+        raise ValueError(tr('shard_missing', missing=', '.join(map(str, missing))))
+    indexes.sort(key=lambda item: item[0]['shard'])
+    return shards, hash_method, indexes
@@ -0,0 +1,88 @@
+# 批量保留策略
+# 直接使用扫描时记录的文件信息（size、mtime、shape、taken、is_corrupt）为每个重复组选出保留文件，
+# 一次遍历所有分组完成，不再对每个文件调用 os.path.exists / getmtime / getsize。
+# 只有旧版文本报告缺少 size/mtime 时才对该文件 stat 一次，并把结果写回文件信息以供后续复用。
+# 本模块不依赖 Qt，GUI 与命令行均可调用。
+
+import os
+
+STRATEGIES = (
+    'keep_first',             # 保留第一个
+    'keep_newest',            # 保留修改时间最新的
+    'keep_largest',           # 保留文件最大的
+    'keep_highest_res',       # 保留分辨率最高的
+    'keep_preferred_folder',  # 保留位于首选文件夹中的
+    'keep_shallowest',        # 保留目录层级最浅的
+    'keep_earliest_taken',    # 保留拍摄时间最早的（无拍摄时间时按修改时间）
+)
+
+
+def _stat_field(info, name):
+    """取 size / mtime，旧版报告缺失时 stat 一次并写回 info，文件不存在时为 0"""
+    if name not in info:
+        try:
+            st = os.stat(info['path'])
+            info['size'], info['mtime'] = st.st_size, st.st_mtime
+        except OSError:
+            info['size'], info['mtime'] = 0, 0
+    return info[name] or 0
+
+
+def _resolution(info):
+    shape = info.get('shape')
+    if not shape:
+        return 0
+    return shape[0] * shape[1]
+
+
+def _depth(info):
+    return os.path.normpath(info['path']).count(os.sep)
+
+
+def _folder_rank(folders):
+    """返回按首选文件夹排序的打分函数：越靠前的文件夹分数越高，不在任何首选文件夹中为 0"""
+    prefixes = [os.path.normcase(os.path.join(os.path.abspath(f), '')) for f in folders]
+
+    def rank(info):
+        path = os.path.normcase(os.path.abspath(info['path']))
+        for i, prefix in enumerate(prefixes):
+            if path.startswith(prefix):
+                return len(prefixes) - i
+        return 0
+    return rank
+
+
+def strategy_key(strategy, preferred_folders=()):
+    """返回策略的打分函数 info -> 可比较值，值越大越应保留"""
+    if strategy == 'keep_first':
+        return lambda info: 0
+    if strategy == 'keep_newest':
+        return lambda info: _stat_field(info, 'mtime')
+    if strategy == 'keep_largest':
+        return lambda info: _stat_field(info, 'size')
+    if strategy == 'keep_highest_res':
+        return lambda info: (_resolution(info), _stat_field(info, 'size'))
+    if strategy == 'keep_preferred_folder':
+        return _folder_rank(preferred_folders)
+    if strategy == 'keep_shallowest':
+        return lambda info: -_depth(info)
+    if strategy == 'keep_earliest_taken':
+        return lambda info: -(info.get('taken') or _stat_field(info, 'mtime'))
+    raise ValueError(f'unknown strategy: {strategy}')
+
+
+def select_keepers(groups, strategy, preferred_folders=()):
+    """
+    groups 为文件信息列表的列表（每个文件信息至少含 'path'），返回每组保留文件的路径。
+    已知损坏的文件只有在整组都损坏时才会被保留；分数相同时保留组内靠前的文件。
+    """
+    key = strategy_key(strategy, preferred_folders)
+    keepers = []
+    for group in groups:
+        if not group:
+            keepers.append(None)
+            continue
+        best = max(range(len(group)),
+                   key=lambda i: (not group[i].get('is_corrupt'), key(group[i]), -i))
+        keepers.append(group[best]['path'])
+    return keepers
@@ -0,0 +1,255 @@
+# 结构化报告（JSON Lines）的读写
+# 每行一个 JSON 对象，第一行为 header，之后按发现顺序写入分组/文件记录，最后是 stats 和 end。
+# 文本报告只是由结构化报告生成的一个可选视图，GUI 直接加载结构化报告，不再解析文本。
+
+import json
+import os
+import time
+
+from translations import tr, get_language
+
+REPORT_VERSION = 1
+FLUSH_INTERVAL = 1.0  # 秒，流式写入时的最长刷新间隔
+
+
+def report_paths(report_path):
+    """由用户给出的报告路径得到 (结构化报告路径, 文本报告路径)"""
+    base, ext = os.path.splitext(report_path)
+    if ext.lower() == '.jsonl':
+        return report_path, base + '.txt'
+    return base + '.jsonl', report_path
+
+
+def is_structured_report(path):
+    """判断文件是否为结构化报告（首行为 header 记录）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            first = json.loads(f.readline())
+        return isinstance(first, dict) and first.get('type') == 'header'
+    except (OSError, ValueError, UnicodeDecodeError):
+        return False
+
+
+class ReportWriter:
+    """
+    流式写入结构化报告：分组一旦确定就立即写出，
+    进程中途退出时已写出的分组仍然可读。
+    """
+
+    def __init__(self, path, mode, **header):
+        self.path = path
+        self._f = open(path, 'w', encoding='utf-8')
+        self._last_flush = time.monotonic()
+        self._group_ids = {}
+        self.write('header', version=REPORT_VERSION, mode=mode,
+                   created=time.strftime('%Y-%m-%d %H:%M:%S'), **header)
+
+    def write(self, record_type, **fields):
+        record = {'type': record_type}
+        record.update(fields)
+        self._f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._f.flush()
+            self._last_flush = now
+
+    def group(self, kind, files, **extra):
+        """写入一个重复组，kind 为 'img' 或 'vid'，组号从 1 开始"""
+        group_id = self._group_ids.get(kind, 0) + 1
+        self._group_ids[kind] = group_id
+        self.write(kind + '_group', id=group_id, files=files, **extra)
+
+    def close(self, stats=None):
+        if self._f.closed:
+            return
+        if stats is not None:
+            self.write('stats', **stats)
+        self.write('end')
+        self._f.close()
+
+    def abort(self):
+        """异常退出时关闭文件但不写 end 记录，读取方据此识别为不完整报告"""
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def _load_file(info):
+    if isinstance(info.get('shape'), list):
+        info['shape'] = tuple(info['shape'])
+    return info
+
+
+class ReportGroups:
+    """
+    结构化报告中一类重复组（'img' 或 'vid'）的只读视图：支持 len() 和重复迭代，
+    每次迭代都从文件流式读取，不把所有分组载入内存（用于外部排序模式的超大报告）。
+    """
+
+    def __init__(self, path, kind, count):
+        self.path = path
+        self.kind = kind
+        self.count = count
+        self._prefix = json.dumps({'type': kind + '_group'})[:-1]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith(self._prefix):
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                yield [_load_file(info) for info in rec.get('files', [])]
+
+
+def read_report(path, lazy_groups=False):
+    """
+    读取结构化报告，返回与 find_duplicates / supplement_duplicates 结果相同结构的 dict，
+    另附 'mode'、'header' 和 'complete'（是否读到 end 记录）。
+    lazy_groups 为 True 时 img_groups / vid_groups 为 ReportGroups 视图，读取时只计数不解析分组。
+    """
+    result = {
+        'mode': None, 'header': {}, 'complete': False,
+        'img_groups': [], 'vid_groups': [],
+        'added_images': [], 'skipped_images': [], 'added_videos': [], 'skipped_videos': [],
+        'duplicate_images': [], 'duplicate_videos': [],
+        'target_dirs': {}, 'stats': {}, 'corrupt_files': [], 'log': [], 'progress': 1.0,
+    }
+    group_counts = {'img': 0, 'vid': 0}
+    group_prefixes = {kind: json.dumps({'type': kind + '_group'})[:-1] for kind in group_counts}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if lazy_groups:
+                kind = next((k for k, prefix in group_prefixes.items() if line.startswith(prefix)), None)
+                if kind is not None:
+                    group_counts[kind] += 1
+                    continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # 写入中断时最后一行可能不完整
+                continue
+            rtype = rec.pop('type', None)
+            if rtype == 'header':
+                result['header'] = rec
+                result['mode'] = rec.get('mode')
+                result['target_dirs'] = rec.get('target_dirs', {})
+            elif rtype in ('img_group', 'vid_group'):
+                files = [_load_file(info) for info in rec.get('files', [])]
+                result[rtype + 's'].append(files)
+            elif rtype == 'supp_file':
+                kind = 'images' if rec.pop('kind', 'img') == 'img' else 'videos'
+                status = rec.pop('status', 'added')
+                result[f'{status}_{kind}'].append(_load_file(rec))
+            elif rtype == 'corrupt':
+                result['corrupt_files'].append(rec['path'])
+            elif rtype == 'stats':
+                result['stats'] = rec
+            elif rtype == 'end':
+                result['complete'] = True
+    if lazy_groups:
+        result['img_groups'] = ReportGroups(path, 'img', group_counts['img'])
+        result['vid_groups'] = ReportGroups(path, 'vid', group_counts['vid'])
+    return result
+
+
+def render_text_report(report, text_path, lang=None):
+    """由结构化报告（路径或 read_report 的结果）生成人类可读的文本报告"""
+    if isinstance(report, str):
+        report = read_report(report)
+    lang = lang or get_language()
+    with open(text_path, 'w', encoding='utf-8') as f:
+        if report['mode'] == 'supplement':
+            _write_supplement_text(f, report)
+        else:
+            _write_dedup_text(f, report, lang)
+
+
+def _write_dedup_text(f, report, lang):
+    stats = report['stats']
+    img_groups = report['img_groups']
+    vid_groups = report['vid_groups']
+    if lang == 'zh':
+        f.write('去重图片报告\n\n')
+        f.write(f'共检测到{stats.get("total_img_groups", len(img_groups))}组重复图片，共{stats.get("total_img_files", 0)}张图片\n\n')
+    else:
+        f.write('Deduplication Report\n\n')
+        f.write(f'{stats.get("total_img_groups", len(img_groups))} duplicate image groups, {stats.get("total_img_files", 0)} images in total\n\n')
+
+    if img_groups:
+        for group_id, group in enumerate(img_groups, 1):
+            f.write(f'重复图片组{group_id} (哈希: {group[0]["hash"]}):\n' if lang == 'zh' else f'Duplicate Image Group {group_id} (hash: {group[0]["hash"]}):\n')
+            for file_info in group:
+                f.write(f"    {file_info['path']}\n")
+            f.write("\n")
+    else:
+        f.write('未发现重复图片\n\n' if lang == 'zh' else 'No duplicate images found\n\n')
+
+    if lang == 'zh':
+        f.write(f'共检测到{stats.get("total_vid_groups", len(vid_groups))}组重复视频，共{stats.get("total_vid_files", 0)}个视频\n\n')
+    else:
+        f.write(f'{stats.get("total_vid_groups", len(vid_groups))} duplicate video groups, {stats.get("total_vid_files", 0)} videos in total\n\n')
+
+    if vid_groups:
+        for idx, group in enumerate(vid_groups, 1):
+            f.write(f'视频重复组{idx}:\n' if lang == 'zh' else f'Duplicate Video Group {idx}:\n')
+            for file_info in group:
+                f.write(f"    {file_info['path']}\n")
+            f.write("\n")
+    else:
+        f.write('未发现重复视频\n' if lang == 'zh' else 'No duplicate videos found\n')
+
+
+def _write_supplement_text(f, report):
+    target_dirs = report['target_dirs']
+    corrupt_files = report['corrupt_files']
+    if report['header'].get('dry_run'):
+        f.write(tr('dry_run') + '\n\n')
+    f.write(tr('supp_report') + '\n\n')
+    f.write(tr('supp_img_success', count=len(report['added_images']), dir=target_dirs.get('supplement_dir')) + '\n')
+    for img in report['added_images']:
+        f.write(f"    {img['path']}\n")
+
+    f.write(tr('supp_img_exists', count=len(report['skipped_images'])) + '\n')
+    for img in report['skipped_images']:
+        f.write(f"    {img['path']}\n")
+
+    f.write(tr('supp_vid_success', count=len(report['added_videos']), dir=target_dirs.get('mp4_dir')) + '\n')
+    for vid in report['added_videos']:
+        f.write(f"    {vid['path']}\n")
+
+    f.write(tr('supp_vid_exists', count=len(report['skipped_videos'])) + '\n')
+    for vid in report['skipped_videos']:
+        f.write(f"    {vid['path']}\n")
+
+    # 多个补充文件夹（或同一文件夹内）之间的重复文件，只在有时列出
+    duplicates = report['duplicate_images'] + report['duplicate_videos']
+    if duplicates:
+        f.write(tr('supp_duplicates_header', count=len(duplicates)) + '\n')
+        for info in duplicates:
+            f.write(f"    {info['path']}  ->  {info.get('duplicate_of')}\n")
+
+    # 🔥 添加损坏文件详细信息
+    if corrupt_files:
+        f.write(f"\n❌ 发现 {len(corrupt_files)} 个损坏或无法处理的文件：\n")
+        f.write("=" * 60 + "\n")
+        for idx, corrupt_file in enumerate(corrupt_files, 1):
+            f.write(f"{idx:3d}. {corrupt_file}\n")
+        f.write("\n建议：请检查这些文件是否确实损坏，如果确认损坏请删除或修复。\n\n")
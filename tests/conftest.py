@@ -0,0 +1,5 @@
+# 各模块位于仓库根目录（没有包结构），测试时把根目录加入 sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,121 @@
+import datetime
+import io
+import struct
+
+import pytest
+
+from capture_time import _QT_EPOCH_OFFSET, _bytes_tiff, _quicktime, _Tiff, TimeIndex
+
+
+def _utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _tiff(ifd0, exif_ifd=None, order='<'):
+    """
+    构造最小 TIFF：ifd0 / exif_ifd 为 {标签: bytes（ASCII）或 int（LONG）}，
+    有 exif_ifd 时在 IFD0 中加入 0x8769 指针。ASCII 值统一放在 IFD 之后的数据区。
+    """
+    head = (b'II*\0' if order == '<' else b'MM\0*') + struct.pack(order + 'I', 8)
+    ifd0 = dict(ifd0)
+    if exif_ifd is not None:
+        ifd0[0x8769] = 0  # 占位，下面回填偏移
+
+    def ifd_size(tags):
+        return 2 + 12 * len(tags) + 4
+
+    exif_offset = 8 + ifd_size(ifd0)
+    data_offset = exif_offset + (ifd_size(exif_ifd) if exif_ifd is not None else 0)
+    if exif_ifd is not None:
+        ifd0[0x8769] = exif_offset
+    data = bytearray()
+
+    def encode(tags):
+        nonlocal data
+        out = struct.pack(order + 'H', len(tags))
+        for tag, value in sorted(tags.items()):
+            if isinstance(value, int):
+                out += struct.pack(order + 'HHII', tag, 4, 1, value)
+            elif len(value) <= 4:
+                out += struct.pack(order + 'HHI', tag, 2, len(value)) + value.ljust(4, b'\0')
+            else:
+                out += struct.pack(order + 'HHII', tag, 2, len(value), data_offset + len(data))
+                data += value
+        return out + b'\0\0\0\0'
+
+    body = encode(ifd0)
+    if exif_ifd is not None:
+        body += encode(exif_ifd)
+    return head + body + bytes(data)
+
+
+@pytest.mark.parametrize('order', ['<', '>'])
+def test_tiff_prefers_original_time_with_subsec_and_offset(order):
+    data = _tiff({0x0132: b'2020:01:01 00:00:00\0'},
+                 {0x9003: b'2001:02:03 04:05:06\0', 0x9291: b'25\0', 0x9011: b'+02:00\0'}, order)
+    assert _bytes_tiff(data).capture_time() == pytest.approx(_utc(2001, 2, 3, 2, 5, 6) + 0.25)
+
+
+def test_tiff_falls_back_to_ifd0_datetime():
+    data = _tiff({0x0132: b'2010:06:07 08:09:10\0', 0x9010: b'Z\0'})
+    assert _bytes_tiff(data).capture_time() is not None
+    data = _tiff({0x0132: b'2010:06:07 08:09:10\0', 0x9010: b'-05:30\0'})
+    assert _bytes_tiff(data).capture_time() == _utc(2010, 6, 7, 13, 39, 10)
+
+
+def test_tiff_ignores_invalid_or_out_of_range_values():
+    assert _bytes_tiff(_tiff({0x0132: b'0000:00:00 00:00:00\0'})).capture_time() is None
+    assert _bytes_tiff(b'not a tiff header').capture_time() is None
+    # 指向数据之外的 EXIF IFD 与 ASCII 值都不读取
+    data = _tiff({0x8769: 10 ** 6})
+    assert _bytes_tiff(data).capture_time() is None
+    data = _tiff({0x0132: b'2010:06:07 08:09:10\0'})
+    assert _Tiff(lambda offset, n: data[offset:offset + n], len(data) - 5).capture_time() is None
+
+
+def _atom(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _mvhd(seconds, version=0):
+    if version == 1:
+        return _atom(b'mvhd', b'\x01\0\0\0' + struct.pack('>QQ', seconds, seconds) + b'\0' * 80)
+    return _atom(b'mvhd', b'\0\0\0\0' + struct.pack('>II', seconds, seconds) + b'\0' * 80)
+
+
+def _qt(*moov_children):
+    return io.BytesIO(_atom(b'ftyp', b'isom\0\0\0\0') + _atom(b'moov', b''.join(moov_children))
+                      + _atom(b'mdat', b'\0' * 32))
+
+
+def test_quicktime_reads_day_from_udta():
+    day = _atom(b'\xa9day', struct.pack('>HH', 24, 0) + b'2015-03-04T05:06:07+0100')
+    f = _qt(_mvhd(_QT_EPOCH_OFFSET + 1000), _atom(b'udta', day))
+    assert _quicktime(f) == _utc(2015, 3, 4, 4, 6, 7)
+
+
+def test_quicktime_reads_itunes_style_meta():
+    data = _atom(b'data', b'\0\0\0\x01\0\0\0\0' + b'2016-07-08T09:10:11Z')
+    ilst = _atom(b'ilst', _atom(b'\xa9day', data))
+    meta = _atom(b'meta', b'\0\0\0\0' + _atom(b'hdlr', b'\0' * 24) + ilst)
+    f = _qt(_atom(b'udta', meta), _mvhd(0))
+    assert _quicktime(f) == _utc(2016, 7, 8, 9, 10, 11)
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_quicktime_falls_back_to_mvhd(version):
+    f = _qt(_mvhd(_QT_EPOCH_OFFSET + 86400, version), _atom(b'udta', b''))
+    assert _quicktime(f) == 86400.0
+
+
+def test_quicktime_without_moov_or_creation_time():
+    assert _quicktime(io.BytesIO(_atom(b'ftyp', b'isom'))) is None
+    assert _quicktime(_qt(_mvhd(0))) is None
+
+
+def test_time_index_orders_and_slices():
+    index = TimeIndex([(30.0, 'c'), (10.0, 'a'), (20.0, 'b')])
+    assert [item for _, item in index] == ['a', 'b', 'c']
+    assert index.between(10.0, 30.0) == [(10.0, 'a'), (20.0, 'b')]
+    assert index.span() == (10.0, 30.0)
+    assert TimeIndex().span() is None
@@ -0,0 +1,49 @@
+import os
+import random
+import struct
+
+from external_sort import MERGE_FANIN, RECORD_OVERHEAD, ExternalSorter, SpillDir, duplicate_runs, parse_memory_limit
+
+_RECORD = struct.Struct('>QI')
+
+
+def _records(count, seed=1):
+    rng = random.Random(seed)
+    return [_RECORD.pack(rng.randrange(count // 3 + 1), i) for i in range(count)]
+
+
+def test_in_memory_sort_does_not_spill(tmp_path):
+    records = _records(100)
+    with SpillDir(str(tmp_path)) as spill:
+        sorter = ExternalSorter(_RECORD.size, 1 << 30, spill)
+        for rec in records:
+            sorter.add(rec)
+        assert list(sorter.sorted_records()) == sorted(records)
+        assert sorter.spilled_runs == 0
+
+
+def test_forced_spills_merge_to_sorted_output(tmp_path):
+    records = _records(1000)
+    with SpillDir(str(tmp_path)) as spill:
+        # 预算只够缓冲 10 条记录，强制溢出约 100 个 run，并触发分批归并（超过 MERGE_FANIN）
+        sorter = ExternalSorter(_RECORD.size, 10 * (_RECORD.size + RECORD_OVERHEAD), spill)
+        for rec in records:
+            sorter.add(rec)
+        assert sorter.spilled_runs > MERGE_FANIN
+        assert list(sorter.sorted_records()) == sorted(records)
+        assert sorter.records == len(records)
+        # 归并后 run 文件全部删除
+        assert os.listdir(spill.path) == []
+    assert not os.path.exists(spill.path)
+
+
+def test_duplicate_runs_groups_equal_keys():
+    records = sorted(_RECORD.pack(key, i) for i, key in enumerate([1, 2, 2, 3, 3, 3, 4]))
+    runs = list(duplicate_runs(records, 8))
+    assert [[_RECORD.unpack(r)[0] for r in run] for run in runs] == [[2, 2], [3, 3, 3]]
+
+
+def test_parse_memory_limit():
+    assert parse_memory_limit('512M') == 512 * 1024 ** 2
+    assert parse_memory_limit('2g') == 2 * 1024 ** 3
+    assert parse_memory_limit('4096') == 4096
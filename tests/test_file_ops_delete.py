@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+import pytest
+
+import file_ops
+from file_ops import TRASH_DIR_NAME, Trash, batch_delete
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    home = tmp_path / 'home'
+    home.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('USERPROFILE', str(home))
+    return home
+
+
+def _files(directory, count):
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = directory / f'{i}.jpg'
+        path.write_bytes(b'photo %d' % i)
+        paths.append(str(path))
+    return paths
+
+
+def test_delete_moves_into_home_trash_with_manifest(tmp_path, home):
+    paths = _files(tmp_path / 'library', 3)
+    result = batch_delete(paths)
+    assert sorted(result['deleted']) == sorted(paths)
+    assert result['failed'] == [] and not result['cancelled']
+    [trash] = result['trash_dirs']
+    assert trash.startswith(os.path.join(str(home), '.photo_tool', TRASH_DIR_NAME))
+    with open(os.path.join(trash, 'manifest.jsonl'), encoding='utf-8') as f:
+        manifest = [json.loads(line) for line in f]
+    assert sorted(entry['path'] for entry in manifest) == sorted(paths)
+    for entry in manifest:
+        assert not os.path.exists(entry['path'])
+        with open(entry['trash'], 'rb') as f:
+            assert f.read().startswith(b'photo ')
+
+
+def test_trash_is_not_created_at_mount_point_when_home_is_usable(tmp_path, home):
+    [path] = _files(tmp_path / 'library', 1)
+    trash = Trash()
+    trash.move_in(path)
+    assert trash.dirs[0].startswith(str(home))
+    assert not os.path.exists(os.path.join(file_ops.mount_point(path), TRASH_DIR_NAME, trash.stamp))
+
+
+def test_delete_falls_back_to_remove_without_same_device_trash(tmp_path, home, monkeypatch):
+    paths = _files(tmp_path / 'library', 2)
+    monkeypatch.setattr(Trash, '_trash_dir', lambda self, path: None)
+    result = batch_delete(paths)
+    assert sorted(result['deleted']) == sorted(paths)
+    assert result['trash_dirs'] == []
+    assert not any(os.path.exists(p) for p in paths)
+    assert not (home / '.photo_tool').exists()
+
+
+def test_cancel_leaves_unprocessed_files_untouched(tmp_path, home):
+    paths = _files(tmp_path / 'library', 5)
+    cancel = threading.Event()
+
+    def progress(done, total):
+        if done == 2:
+            cancel.set()
+
+    result = batch_delete(paths, use_trash=False, workers=1, progress_callback=progress, cancel_event=cancel)
+    assert result['cancelled']
+    assert len(result['deleted']) == 2
+    remaining = [p for p in paths if os.path.exists(p)]
+    assert sorted(remaining) == sorted(set(paths) - set(result['deleted']))
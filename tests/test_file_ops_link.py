@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import file_ops
+from file_ops import batch_link, link_plan_from_groups, replace_with_link
+
+
+@pytest.fixture
+def pair(tmp_path):
+    keep, dup = tmp_path / 'keep.jpg', tmp_path / 'sub' / 'dup.jpg'
+    dup.parent.mkdir()
+    keep.write_bytes(b'same bytes' * 100)
+    dup.write_bytes(b'same bytes' * 100)
+    return str(keep), str(dup)
+
+
+def test_batch_link_replaces_duplicate_with_hard_link(pair):
+    keep, dup = pair
+    result = batch_link([(keep, [dup])], mode='hard')
+    assert result['linked'] == [(dup, keep)]
+    assert result['reclaimed'] == 1000
+    assert os.path.samefile(keep, dup)
+    assert os.stat(keep).st_nlink == 2
+
+    # 再次运行时已是同一文件，跳过且不计回收空间
+    again = batch_link([(keep, [dup])], mode='hard')
+    assert again['skipped'] == [(dup, 'same_file')]
+    assert again['reclaimed'] == 0
+
+
+def test_batch_link_skips_when_content_differs(pair):
+    keep, dup = pair
+    with open(dup, 'r+b') as f:
+        f.write(b'X')
+    result = batch_link([(keep, [dup])], mode='hard')
+    assert result['skipped'] == [(dup, 'content_differs')]
+    assert not os.path.samefile(keep, dup)
+
+
+def test_failed_replace_removes_temp_link(pair, monkeypatch):
+    keep, dup = pair
+
+    def fail(src, dst):
+        raise OSError('replace failed')
+
+    monkeypatch.setattr(file_ops.os, 'replace', fail)
+    with pytest.raises(OSError):
+        replace_with_link(keep, dup, 'hard')
+    monkeypatch.undo()
+    assert os.listdir(os.path.dirname(dup)) == ['dup.jpg']
+    assert not os.path.samefile(keep, dup)
+
+    monkeypatch.setattr(file_ops.os, 'replace', fail)
+    result = batch_link([(keep, [dup])], mode='hard')
+    monkeypatch.undo()
+    assert [path for path, _ in result['failed']] == [dup]
+    assert os.listdir(os.path.dirname(dup)) == ['dup.jpg']
+
+
+def test_link_plan_never_keeps_corrupt_files():
+    groups = [
+        [{'path': '/a.jpg', 'is_corrupt': True}, {'path': '/b.jpg'}, {'path': '/c.jpg', 'is_corrupt': False}],
+        [{'path': '/d.jpg'}, {'path': '/e.jpg', 'is_corrupt': True}],
+        [{'path': '/f.jpg', 'is_corrupt': True}, {'path': '/g.jpg', 'is_corrupt': True}],
+    ]
+    assert link_plan_from_groups(groups) == [('/b.jpg', ['/c.jpg'])]
+
+
+def test_batch_link_rejects_unknown_mode(pair):
+    with pytest.raises(ValueError):
+        batch_link([(pair[0], [pair[1]])], mode='symlink')
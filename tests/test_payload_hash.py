@@ -0,0 +1,91 @@
+import hashlib
+import io
+
+import pytest
+
+PIL = pytest.importorskip('PIL')
+from PIL import Image, PngImagePlugin
+
+from payload_hash import _jpeg_payload, _png_payload, payload_digest
+
+
+def _image():
+    img = Image.new('RGB', (16, 16))
+    for x in range(16):
+        img.putpixel((x, x), (x * 16, 255 - x * 16, 7))
+    return img
+
+
+def _jpeg_bytes(exif=None):
+    buf = io.BytesIO()
+    _image().save(buf, 'JPEG', quality=90, **({'exif': exif} if exif else {}))
+    return buf.getvalue()
+
+
+def _png_bytes(text=None):
+    info = PngImagePlugin.PngInfo()
+    if text:
+        info.add_text('Comment', text)
+    buf = io.BytesIO()
+    _image().save(buf, 'PNG', pnginfo=info)
+    return buf.getvalue()
+
+
+def _digest(func, data):
+    hasher = hashlib.md5()
+    return hasher.digest() if func(data, hasher) else None
+
+
+def _exif(value):
+    exif = Image.Exif()
+    exif[0x0132] = value
+    return exif.tobytes()
+
+
+def test_jpeg_payload_ignores_exif_and_trailing_data():
+    plain = _jpeg_bytes()
+    tagged = _jpeg_bytes(_exif('2001:02:03 04:05:06'))
+    retagged = _jpeg_bytes(_exif('2020:01:01 00:00:00'))
+    assert plain != tagged
+    assert _digest(_jpeg_payload, plain) == _digest(_jpeg_payload, tagged) == _digest(_jpeg_payload, retagged)
+    assert _digest(_jpeg_payload, plain + b'appended') == _digest(_jpeg_payload, plain)
+
+
+def test_jpeg_payload_detects_pixel_changes():
+    other = io.BytesIO()
+    Image.new('RGB', (16, 16), (1, 2, 3)).save(other, 'JPEG', quality=90)
+    assert _digest(_jpeg_payload, other.getvalue()) != _digest(_jpeg_payload, _jpeg_bytes())
+
+
+def test_jpeg_payload_rejects_other_data():
+    assert _digest(_jpeg_payload, b'not a jpeg') is None
+    assert _digest(_jpeg_payload, b'\xff\xd8\x00garbage') is None
+
+
+def test_png_payload_ignores_text_chunks():
+    plain = _png_bytes()
+    tagged = _png_bytes('edited by a photo manager')
+    assert plain != tagged
+    assert _digest(_png_payload, plain) == _digest(_png_payload, tagged)
+
+
+def test_png_payload_rejects_truncated_chunk():
+    data = _png_bytes()
+    assert _digest(_png_payload, data[:50]) is None
+    assert _digest(_png_payload, b'\x89PNG') is None
+
+
+def test_payload_digest_returns_none_for_unmappable_files(tmp_path):
+    empty = tmp_path / 'empty.jpg'
+    empty.write_bytes(b'')
+    assert payload_digest(str(empty)) is None
+    other = tmp_path / 'a.gif'
+    other.write_bytes(b'GIF89a' + b'\0' * 16)
+    assert payload_digest(str(other)) is None
+
+
+def test_payload_digest_matches_for_metadata_only_edits(tmp_path):
+    a, b = tmp_path / 'a.jpg', tmp_path / 'b.jpg'
+    a.write_bytes(_jpeg_bytes())
+    b.write_bytes(_jpeg_bytes(_exif('2001:02:03 04:05:06')))
+    assert payload_digest(str(a), 'sha256') == payload_digest(str(b), 'sha256') is not None
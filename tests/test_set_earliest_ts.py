@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+import set_earliest_ts
+from set_earliest_ts import (MIN_SHIFT_NS, PlanWriter, index_candidate, index_changes, iter_index_entries,
+                             plan_change, read_plan)
+from shard_index import INDEX_MODE
+from structured_report import ReportWriter
+
+SECOND = 10 ** 9
+
+
+def _record(path='/photos/a.jpg', **times):
+    record = {'path': path, 'size': 10, 'mtime_ns': 5000 * SECOND, 'atime_ns': 5000 * SECOND,
+              'birth_ns': None, 'taken_ns': None}
+    record.update(times)
+    return record
+
+
+def test_plan_change_picks_earliest_source():
+    change = plan_change(_record(taken_ns=1000 * SECOND, birth_ns=2000 * SECOND))
+    assert (change['target_ns'], change['source']) == (1000 * SECOND, 'taken')
+    change = plan_change(_record(atime_ns=3000 * SECOND))
+    assert (change['target_ns'], change['source']) == (3000 * SECOND, 'atime')
+
+
+def test_plan_change_tolerates_small_shifts_and_ignores_pre_epoch_times():
+    assert plan_change(_record(atime_ns=5000 * SECOND - MIN_SHIFT_NS)) is None
+    assert plan_change(_record(taken_ns=-SECOND, birth_ns=0)) is None
+    assert plan_change(_record(atime_ns=5000 * SECOND - MIN_SHIFT_NS - 1)) is not None
+
+
+def test_plan_change_late_birth_time():
+    record = _record(birth_ns=9000 * SECOND)
+    assert plan_change(record) is None
+    change = plan_change(record, set_birth=True)
+    assert change['target_ns'] == 5000 * SECOND
+
+
+@pytest.mark.parametrize('name', ['plan.csv', 'plan.jsonl'])
+def test_plan_round_trip(tmp_path, name, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    changes = [plan_change(_record(path='a.jpg', taken_ns=1000 * SECOND, birth_ns=4000 * SECOND)),
+               plan_change(_record(path=str(tmp_path / 'b.mp4'), atime_ns=2000 * SECOND))]
+    plan = PlanWriter(str(tmp_path / name), str(tmp_path))
+    for change in changes:
+        plan.write(change)
+    plan.close({'changes': len(changes)})
+
+    loaded = list(read_plan(str(tmp_path / name)))
+    assert [c['path'] for c in loaded] == [str(tmp_path / 'a.jpg'), str(tmp_path / 'b.mp4')]
+    for original, row in zip(changes, loaded):
+        for key in ('size', 'mtime_ns', 'atime_ns', 'birth_ns', 'taken_ns', 'target_ns', 'source'):
+            assert row[key] == original[key]
+
+
+def test_read_plan_rejects_relative_paths_before_yielding(tmp_path):
+    path = tmp_path / 'plan.csv'
+    path.write_text('path,size,mtime_ns,atime_ns,birth_ns,taken_ns,target_ns,source\n'
+                    f'{tmp_path / "a.jpg"},1,2,2,,1,1,taken\n'
+                    'relative.jpg,1,2,2,,1,1,taken\n', encoding='utf-8')
+    rows = read_plan(str(path))
+    with pytest.raises(ValueError):
+        next(rows)
+
+
+def test_read_plan_rejects_incomplete_or_foreign_jsonl(tmp_path):
+    path = str(tmp_path / 'plan.jsonl')
+    plan = PlanWriter(path, str(tmp_path))
+    plan.write(plan_change(_record(path=str(tmp_path / 'a.jpg'), taken_ns=SECOND)))
+    plan.close()
+    # 去掉 end 记录，模拟写出时中断
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+    with pytest.raises(ValueError):
+        list(read_plan(path))
+
+    ReportWriter(path, 'dedup').close()
+    with pytest.raises(ValueError):
+        list(read_plan(path))
+
+
+def test_iter_index_entries_joins_rel_paths_and_dedupes_report_files(tmp_path):
+    index = str(tmp_path / 'index.jsonl')
+    with ReportWriter(index, INDEX_MODE, root=str(tmp_path / 'library'), shard=0, shards=1, hash_method='md5') as w:
+        w.write('file', kind='img', rel='2020/a.jpg', size=10, mtime=100.0, taken=50.0, hash='00')
+        w.write('file', kind='vid', rel='b.mp4', size=20, mtime=200.0, hash='01')
+    entries = list(iter_index_entries([index]))
+    assert [e['path'] for e in entries] == [os.path.join(str(tmp_path / 'library'), '2020', 'a.jpg'),
+                                            os.path.join(str(tmp_path / 'library'), 'b.mp4')]
+    assert (entries[0]['taken'], entries[1]['taken']) == (50.0, None)
+    # 指定 root 时覆盖索引记录的根目录
+    moved = next(iter_index_entries([index], root=str(tmp_path / 'moved')))
+    assert moved['path'] == os.path.join(str(tmp_path / 'moved'), '2020', 'a.jpg')
+
+    report = str(tmp_path / 'report.jsonl')
+    a = {'path': '/photos/a.jpg', 'size': 10, 'mtime': 100.0, 'taken': 50.0}
+    b = {'path': '/photos/b.jpg', 'size': 10, 'mtime': 100.0}
+    with ReportWriter(report, 'dedup', folder='/photos') as w:
+        w.group('img', [a, b], hash='00')
+        w.group('img', [dict(a), {'path': '/photos/c.jpg', 'size': 10}], hash='01')
+    assert [e['path'] for e in iter_index_entries([report])] == ['/photos/a.jpg', '/photos/b.jpg']
+
+
+def test_iter_index_entries_rejects_incomplete_files(tmp_path):
+    path = str(tmp_path / 'index.jsonl')
+    ReportWriter(path, INDEX_MODE, root='/library', shard=0, shards=1, hash_method='md5').abort()
+    with pytest.raises(ValueError):
+        list(iter_index_entries([path]))
+
+
+def _indexed_file(tmp_path, name, mtime):
+    path = tmp_path / name
+    path.write_bytes(b'x' * 10)
+    os.utime(path, (mtime, mtime))
+    return {'path': str(path), 'size': 10, 'mtime': float(mtime)}
+
+
+def test_index_changes_skips_entries_without_taken_and_rereads_stale_files(tmp_path, monkeypatch):
+    fresh = dict(_indexed_file(tmp_path, 'fresh.jpg', 5000), taken=1000.0)
+    stale = dict(_indexed_file(tmp_path, 'stale.jpg', 5000), taken=1000.0)
+    untaken = _indexed_file(tmp_path, 'untaken.jpg', 5000)
+    with open(stale['path'], 'ab') as f:
+        f.write(b'edited')
+    os.utime(stale['path'], (5000, 5000))
+    assert index_candidate(fresh) and not index_candidate(untaken)
+
+    # 被改动过的文件重新读取拍摄时间，而不沿用索引中的值
+    monkeypatch.setattr(set_earliest_ts, 'capture_time', lambda path: 3000.0)
+    counts = {}
+    changes = {c['path']: c for c in index_changes([fresh, stale, untaken], jobs=1, counts=counts)}
+    assert counts == {'entries': 3, 'no_taken': 1, 'candidates': 2, 'stale': 1}
+    assert set(changes) == {fresh['path'], stale['path']}
+    assert changes[fresh['path']]['target_ns'] == 1000 * SECOND
+    assert changes[stale['path']]['target_ns'] == 3000 * SECOND
+    assert changes[stale['path']]['size'] == 16
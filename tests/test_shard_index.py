@@ -0,0 +1,53 @@
+import pytest
+
+from shard_index import INDEX_MODE, parse_shard_spec, read_shard_indexes
+from structured_report import ReportWriter
+
+
+def test_parse_shard_spec():
+    assert parse_shard_spec('0/1') == (0, 1)
+    assert parse_shard_spec('3/4') == (3, 4)
+    for spec in ('4/4', '-1/4', '0/0', '1', 'a/b'):
+        with pytest.raises(ValueError):
+            parse_shard_spec(spec)
+
+
+def _index(tmp_path, shard, shards, hash_method='md5', complete=True, files=1, name=''):
+    path = str(tmp_path / f'part_{shard}_{shards}_{hash_method}{name}.jsonl')
+    writer = ReportWriter(path, INDEX_MODE, root='/library', shard=shard, shards=shards, hash_method=hash_method)
+    for n in range(files):
+        writer.write('file', kind='img', rel=f'd{shard}/f{n}.jpg', size=10, mtime=1.0, hash='00')
+    if complete:
+        writer.close({'files': files})
+    else:
+        writer.abort()
+    return path
+
+
+def test_read_shard_indexes_sorts_by_shard(tmp_path):
+    paths = [_index(tmp_path, 2, 3), _index(tmp_path, 0, 3, files=2), _index(tmp_path, 1, 3)]
+    shards, hash_method, indexes = read_shard_indexes(paths)
+    assert (shards, hash_method) == (3, 'md5')
+    assert [header['shard'] for header, _ in indexes] == [0, 1, 2]
+    assert [len(files) for _, files in indexes] == [2, 1, 1]
+    assert indexes[0][0]['stats'] == {'files': 2}
+
+
+@pytest.mark.parametrize('build', [
+    lambda t: [_index(t, 0, 2)],                                     # 缺少分片
+    lambda t: [_index(t, 0, 2), _index(t, 0, 2, 'sha1'), _index(t, 1, 2)],  # 哈希算法不一致
+    lambda t: [_index(t, 0, 2), _index(t, 1, 3)],                    # 分片数不一致
+    lambda t: [_index(t, 0, 1), _index(t, 0, 1, name='_copy')],      # 同一分片出现两次
+    lambda t: [_index(t, 0, 1, complete=False)],                     # 扫描未完成
+    lambda t: [],
+])
+def test_read_shard_indexes_rejects_inconsistent_sets(tmp_path, build):
+    with pytest.raises(ValueError):
+        read_shard_indexes(build(tmp_path))
+
+
+def test_read_shard_indexes_rejects_other_reports(tmp_path):
+    path = str(tmp_path / 'report.jsonl')
+    ReportWriter(path, 'dedup', folder='/library').close()
+    with pytest.raises(ValueError):
+        read_shard_indexes([path])
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from strategies import STRATEGIES, select_keepers
+
+
+def _info(path, **fields):
+    return dict({'path': path, 'size': 100, 'mtime': 1000.0}, **fields)
+
+
+GROUP = [
+    _info('/lib/a/x.jpg', size=100, mtime=3000.0, shape=(10, 10), taken=500.0),
+    _info('/lib/b/c/x.jpg', size=300, mtime=1000.0, shape=(40, 30)),
+    _info('/lib/x.jpg', size=200, mtime=2000.0, shape=(20, 20), taken=400.0),
+]
+
+
+@pytest.mark.parametrize('strategy, expected', [
+    ('keep_first', '/lib/a/x.jpg'),
+    ('keep_newest', '/lib/a/x.jpg'),
+    ('keep_largest', '/lib/b/c/x.jpg'),
+    ('keep_highest_res', '/lib/b/c/x.jpg'),
+    ('keep_shallowest', '/lib/x.jpg'),
+    ('keep_earliest_taken', '/lib/x.jpg'),
+])
+def test_select_keepers_by_strategy(strategy, expected):
+    assert select_keepers([GROUP], strategy) == [expected]
+
+
+def test_preferred_folder_order():
+    assert select_keepers([GROUP], 'keep_preferred_folder', ['/lib/b', '/lib/a']) == ['/lib/b/c/x.jpg']
+    assert select_keepers([GROUP], 'keep_preferred_folder', ['/other']) == ['/lib/a/x.jpg']
+
+
+def test_corrupt_files_kept_only_when_whole_group_is_corrupt():
+    group = [_info('/a.jpg', size=900, is_corrupt=True), _info('/b.jpg', size=10)]
+    assert select_keepers([group], 'keep_largest') == ['/b.jpg']
+    group[1]['is_corrupt'] = True
+    assert select_keepers([group], 'keep_largest') == ['/a.jpg']
+
+
+def test_ties_keep_earlier_file_and_empty_groups():
+    group = [_info('/a.jpg'), _info('/b.jpg')]
+    for strategy in STRATEGIES:
+        assert select_keepers([group, []], strategy) == ['/a.jpg', None]
+
+
+def test_legacy_entries_are_stat_once(tmp_path):
+    small, large = tmp_path / 'small.jpg', tmp_path / 'large.jpg'
+    small.write_bytes(b'x')
+    large.write_bytes(b'x' * 10)
+    group = [{'path': str(small)}, {'path': str(large)}, {'path': str(tmp_path / 'missing.jpg')}]
+    assert select_keepers([group], 'keep_largest') == [str(large)]
+    assert group[1]['size'] == 10 and group[1]['mtime'] == os.stat(large).st_mtime
+    assert group[2]['size'] == 0
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image
+
+import compare
+from structured_report import read_report
+
+
+def _image(path, color):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new('RGB', (8, 8), color).save(path)
+    return path
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main, high, low = (str(tmp_path / name) for name in ('main', 'high', 'low'))
+    _image(os.path.join(main, 'kept.jpg'), (1, 1, 1))
+    paths = {
+        'in_main': _image(os.path.join(low, 'kept.jpg'), (1, 1, 1)),
+        'low_b': _image(os.path.join(low, 'b.jpg'), (2, 2, 2)),
+        'high_b': _image(os.path.join(high, 'sub', 'b.jpg'), (2, 2, 2)),
+        'high_b_copy': _image(os.path.join(high, 'b copy.jpg'), (2, 2, 2)),
+        'high_c': _image(os.path.join(high, 'c.jpg'), (3, 3, 3)),
+        'low_c': _image(os.path.join(low, 'c.jpg'), (4, 4, 4)),
+    }
+    return main, [high, low], paths
+
+
+def _by_path(infos):
+    return {info['path']: info for info in infos}
+
+
+def test_supplement_ranks_sources_and_names_targets_uniquely(tmp_path, library):
+    main, sources, paths = library
+    result = compare.supplement_duplicates(main, sources, str(tmp_path / 'supp.txt'), text_report=False)
+
+    added = _by_path(result['added_images'])
+    duplicates = _by_path(result['duplicate_images'])
+    assert [info['path'] for info in result['skipped_images']] == [paths['in_main']]
+    # 内容相同的补充文件只增补优先级最高的来源中的一份，其余（包括同一来源内的副本）指向胜出的文件
+    [b_winner] = {paths['high_b'], paths['high_b_copy']} & set(added)
+    assert set(added) == {b_winner, paths['high_c'], paths['low_c']}
+    assert added[b_winner]['source'] == 0
+    assert added[paths['low_c']]['source'] == 1
+    assert set(duplicates) == {paths['high_b'], paths['high_b_copy'], paths['low_b']} - {b_winner}
+    assert all(info['duplicate_of'] == b_winner for info in duplicates.values())
+
+    # 不同来源中的同名文件得到不重名的目标路径，报告中记录的是同一组名字
+    targets = [info['target_path'] for info in result['added_images']]
+    assert len(set(targets)) == len(targets)
+    assert {os.path.basename(added[p]['target_path']) for p in (paths['high_c'], paths['low_c'])} == {'c.jpg', 'c_1.jpg'}
+    assert all(os.path.dirname(t) == result['target_dirs']['supplement_dir'] for t in targets)
+    report = read_report(result['report_file'])
+    assert sorted(info['target_path'] for info in report['added_images']) == sorted(targets)
+
+
+def test_supplement_single_source_duplicates_within_folder(tmp_path, library):
+    main, sources, paths = library
+    result = compare.supplement_duplicates(main, sources[0], str(tmp_path / 'supp.txt'), text_report=False)
+    assert len(result['duplicate_images']) == 1
+    [dup] = result['duplicate_images']
+    assert dup['duplicate_of'] in _by_path(result['added_images'])
+    assert {dup['path'], dup['duplicate_of']} == {paths['high_b'], paths['high_b_copy']}
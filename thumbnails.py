@@ -0,0 +1,463 @@
+# 缩略图磁盘缓存
+# 缩略图按 (绝对路径, 文件大小, 修改时间, 边长) 寻址，原文件改动后自动失效。
+# 缓存文件为小尺寸 JPEG，按字节数上限做 LRU 淘汰（命中时刷新文件 mtime）。
+# 本模块不依赖 Qt，命令行（--warm-thumbnails 预生成）与 GUI 共用同一缓存目录。
+
+import hashlib
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+# PIL 在首次使用时才导入，GUI 冷启动时不加载
+
+logger = logging.getLogger(__name__)
+
+# GUI 使用的缩略图边长，预生成时按这些尺寸写入缓存
+GROUP_THUMB_SIZE = 320  # 图片分组预览
+VIDEO_THUMB_SIZE = 160  # 视频分组预览
+LIST_THUMB_SIZE = 80    # 增补结果列表
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.photo_tool', 'thumbnails')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_VERSION = 1  # 缩略图生成方式变化时递增，使旧缓存失效
+JPEG_QUALITY = 85
+PRUNE_TARGET = 0.8  # 超出上限时淘汰到上限的 80%，避免每次写入都触发淘汰
+
+# 同时运行的 ffmpeg 进程数上限；每个进程自身也会使用多个解码线程
+VIDEO_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+VIDEO_TIMEOUT = 10  # 秒
+
+_ffmpeg_available = None
+_ffmpeg_slots = threading.BoundedSemaphore(VIDEO_WORKERS)
+
+# 按缩略图张数统计的生成方式：'exif' 取自内嵌缩略图，'decode' 由解码原图得到
+_render_counts = {'exif': 0, 'decode': 0}
+_render_lock = threading.Lock()
+
+
+def count_render(how, n=1):
+    with _render_lock:
+        _render_counts[how] += n
+
+
+def render_stats():
+    """返回内嵌缩略图快速路径的使用次数与命中率"""
+    with _render_lock:
+        stats = dict(_render_counts)
+    total = stats['exif'] + stats['decode']
+    stats['exif_rate'] = stats['exif'] / total if total else 0.0
+    return stats
+
+
+def ffmpeg_available():
+    """检查 ffmpeg 是否可用，结果在进程内缓存"""
+    global _ffmpeg_available
+    if _ffmpeg_available is None:
+        try:
+            subprocess.run(['ffmpeg', '-version'], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=5, check=True)
+            _ffmpeg_available = True
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            _ffmpeg_available = False
+    return _ffmpeg_available
+
+
+def encode_jpeg(img):
+    """将 PIL 图像编码为缓存用的 JPEG 字节"""
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buf = BytesIO()
+    img.save(buf, 'JPEG', quality=JPEG_QUALITY)
+    return buf.getvalue()
+
+
+def _jpeg_segments(f):
+    """
+    依次产出 JPEG 文件头部的 (标记, 段长度)，文件位置停在段数据开头；
+    调用方未读取的段数据会在下一次迭代前跳过。遇到 SOS/EOI 或格式错误时结束。
+    """
+    if f.read(2) != b'\xff\xd8':
+        return
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return
+        code = marker[1]
+        if code == 0xFF:  # 填充字节
+            f.seek(-1, 1)
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            return
+        raw = f.read(2)
+        if len(raw) < 2:
+            return
+        length = struct.unpack('>H', raw)[0] - 2
+        if length < 0:
+            return
+        start = f.tell()
+        yield code, length
+        f.seek(start + length)
+
+
+def _is_sof(code):
+    return 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC)
+
+
+def _jpeg_dimensions(f):
+    """从 SOF 段读取 JPEG 的 (宽, 高)"""
+    for code, length in _jpeg_segments(f):
+        if _is_sof(code) and length >= 5:
+            height, width = struct.unpack('>HH', f.read(5)[1:5])
+            return width, height
+    return None
+
+
+def _ifd1_thumbnail(tiff):
+    """从 EXIF 的 TIFF 结构中取出 IFD1 指向的 JPEG 缩略图字节"""
+    try:
+        order = {b'II': '<', b'MM': '>'}[tiff[:2]]
+        ifd0 = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[ifd0:ifd0 + 2])[0]
+        next_pos = ifd0 + 2 + 12 * count
+        ifd1 = struct.unpack(order + 'I', tiff[next_pos:next_pos + 4])[0]
+        if not ifd1:
+            return None
+        count = struct.unpack(order + 'H', tiff[ifd1:ifd1 + 2])[0]
+        offset = length = None
+        for i in range(count):
+            pos = ifd1 + 2 + 12 * i
+            tag, _, _, value = struct.unpack(order + 'HHII', tiff[pos:pos + 12])
+            if tag == 0x0201:
+                offset = value
+            elif tag == 0x0202:
+                length = value
+    except (KeyError, struct.error):
+        return None
+    if not offset or not length:
+        return None
+    data = tiff[offset:offset + length]
+    return data if len(data) == length and data[:2] == b'\xff\xd8' else None
+
+
+def read_exif_thumbnail(path):
+    """
+    只读取 JPEG 文件头部（APP1 到 SOF 之间的几十 KB），
+    返回 (内嵌缩略图 JPEG 字节, 缩略图尺寸, 原图尺寸)；没有内嵌缩略图时返回 None。
+    """
+    thumb = main_size = None
+    with open(path, 'rb') as f:
+        for code, length in _jpeg_segments(f):
+            if code == 0xE1 and thumb is None:
+                seg = f.read(length)
+                if seg[:6] == b'Exif\x00\x00':
+                    thumb = _ifd1_thumbnail(seg[6:])
+            elif _is_sof(code) and length >= 5:
+                height, width = struct.unpack('>HH', f.read(5)[1:5])
+                main_size = (width, height)
+                break
+    if thumb is None or not main_size or not all(main_size):
+        return None
+    thumb_size = _jpeg_dimensions(BytesIO(thumb))
+    if not thumb_size or not all(thumb_size):
+        return None
+    return thumb, thumb_size, main_size
+
+
+def exif_thumbnail(path, size):
+    """
+    内嵌缩略图足够大（长边不小于 size）且宽高比与原图一致（排除带黑边的缩略图）时，
+    返回缩放到 size 以内的 JPEG 字节，否则返回 None 由调用方解码原图。
+    """
+    try:
+        return _fit_exif_thumbnail(read_exif_thumbnail(path), size)
+    except OSError:
+        return None
+
+
+def _fit_exif_thumbnail(found, size):
+    if found is None:
+        return None
+    thumb, (tw, th), (mw, mh) = found
+    if max(tw, th) < size or abs(tw / th - mw / mh) > 0.02 * (mw / mh):
+        return None
+    if max(tw, th) > size:
+        try:
+            from PIL import Image
+            with Image.open(BytesIO(thumb)) as img:
+                thumb = _downscale(img, [size])[size]
+        except Exception:
+            return None
+    count_render('exif')
+    return thumb
+
+
+def render_image_thumbnails(path, sizes):
+    """
+    生成多个尺寸的缩略图，返回 {边长: JPEG 字节}。
+    内嵌 EXIF 缩略图够用的尺寸直接取自文件头；其余尺寸解码一次原图生成，
+    draft() 让 JPEG 在解码时按 2 的幂降采样，不必解码全分辨率。
+    """
+    result = {}
+    try:
+        found = read_exif_thumbnail(path)
+    except OSError:
+        found = None
+    for size in sizes:
+        data = _fit_exif_thumbnail(found, size)
+        if data:
+            result[size] = data
+    rest = [size for size in sizes if size not in result]
+    if rest:
+        from PIL import Image
+        with Image.open(path) as img:
+            result.update(_downscale(img, rest))
+        count_render('decode', len(rest))
+    return result
+
+
+def _downscale(img, sizes):
+    """从大到小依次缩放同一幅图，返回 {边长: JPEG 字节}"""
+    sizes = sorted(set(sizes), reverse=True)
+    result = {}
+    img.draft('RGB', (sizes[0], sizes[0]))
+    img.thumbnail((sizes[0], sizes[0]))
+    for size in sizes:
+        img.thumbnail((size, size))
+        result[size] = encode_jpeg(img)
+    return result
+
+
+def _ffmpeg_frame(path, size, seek):
+    """
+    抽取 seek 秒处的一帧：-ss 放在 -i 之前为输入端定位（按关键帧跳转，不从头解码），
+    帧以 MJPEG 经 stdout 管道返回，不写临时文件。
+    """
+    cmd = [
+        'ffmpeg', '-v', 'error', '-ss', f'{seek:.3f}', '-i', path, '-frames:v', '1', '-an',
+        '-vf', f'scale={size}:{size}:force_original_aspect_ratio=decrease',
+        '-f', 'image2pipe', '-vcodec', 'mjpeg', '-q:v', '4', 'pipe:1'
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            timeout=VIDEO_TIMEOUT, check=True)
+    return result.stdout or None
+
+
+def render_video_thumbnail(path, size):
+    """用 ffmpeg 抽取一帧并缩放到 size 以内，返回 JPEG 字节，失败返回 None"""
+    if not ffmpeg_available():
+        return None
+    try:
+        with _ffmpeg_slots:
+            # 不足 1 秒的短视频在 1 秒处没有帧，退回到第一帧
+            return _ffmpeg_frame(path, size, 1.0) or _ffmpeg_frame(path, size, 0.0)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"生成视频缩略图超时: {path}")
+    except subprocess.CalledProcessError:
+        logger.warning(f"ffmpeg处理视频失败: {path}")
+    except OSError as e:
+        logger.warning(f"生成视频缩略图时发生错误: {path}, 错误: {e}")
+    return None
+
+
+class ThumbnailCache:
+    """
+    线程安全的缩略图磁盘缓存。
+    文件按键的前两位十六进制分目录存放；写入使用临时文件加 os.replace，
+    并发进程（CLI 预生成与 GUI）同时写同一键也不会读到半个文件。
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # 缓存总字节数，首次写入时扫描得到
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, path, size, st=None):
+        st = st or os.stat(path)
+        raw = f'{CACHE_VERSION}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{size}'
+        return hashlib.sha1(raw.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], key + '.jpg')
+
+    def get(self, path, size):
+        """返回缓存的 JPEG 字节；未命中或原文件不存在时返回 None"""
+        try:
+            entry = self._entry_path(self.key(path, size))
+            with open(entry, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(entry)  # 刷新 LRU 顺序
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, path, size, data):
+        """写入一条缩略图，超出字节上限时淘汰最久未使用的条目"""
+        try:
+            entry = self._entry_path(self.key(path, size))
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logger.warning(f"写入缩略图缓存失败: {path}, 错误: {e}")
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_total()
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._prune()
+
+    def get_or_create(self, path, size, kind='image', render=None):
+        """
+        读缓存，未命中时生成并写入缓存，返回 JPEG 字节（失败返回 None）。
+        render(path, size) 可替换默认的生成方式（GUI 使用 Qt 缩放解码）。
+        """
+        data = self.get(path, size)
+        if data is not None:
+            return data
+        try:
+            if render is not None:
+                data = render(path, size)
+            elif kind == 'video':
+                data = render_video_thumbnail(path, size)
+            else:
+                data = render_image_thumbnails(path, [size])[size]
+        except Exception as e:
+            logger.warning(f"生成缩略图失败: {path}, 错误: {e}")
+            return None
+        if data:
+            self.put(path, size, data)
+        return data
+
+    def _iter_entries(self):
+        try:
+            shards = os.scandir(self.root)
+        except OSError:
+            return
+        with shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as it:
+                    for entry in it:
+                        if entry.name.endswith('.jpg'):
+                            try:
+                                st = entry.stat()
+                            except OSError:
+                                continue
+                            yield entry.path, st.st_mtime, st.st_size
+
+    def _scan_total(self):
+        return sum(size for _, _, size in self._iter_entries())
+
+    def _prune(self):
+        """按 mtime 从旧到新删除，直到总大小降到上限的 PRUNE_TARGET 以下（调用方持有锁）"""
+        entries = sorted(self._iter_entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * PRUNE_TARGET
+        for entry, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+        self._total = total
+
+    def clear(self):
+        with self._lock:
+            for entry, _, _ in list(self._iter_entries()):
+                try:
+                    os.remove(entry)
+                except OSError:
+                    pass
+            self._total = 0
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """进程内共享的默认缓存实例"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ThumbnailCache()
+        return _default_cache
+
+
+def warm_thumbnails(items, cache=None, workers=4, progress_callback=None, stats=None):
+    """
+    为报告中的文件预生成 GUI 会用到的各尺寸缩略图。
+    items 为 (路径, 'image' | 'video') 序列；返回 {'created', 'cached', 'failed'} 计数。
+    stats 为 StageStats 时记入 thumbnails 阶段，含缓存的命中 / 未命中次数（每个文件的每个尺寸查找一次）。
+    每个文件只解码一次（视频只运行一次 ffmpeg）即生成全部尺寸；解码在线程池中并行，
+    同时运行的 ffmpeg 进程数受 VIDEO_WORKERS 限制。
+    """
+    cache = cache or get_default_cache()
+    items = list(dict.fromkeys(items))
+    counts = {'created': 0, 'cached': 0, 'failed': 0}
+    hits0, misses0, started = cache.hits, cache.misses, time.perf_counter()
+
+    def warm_one(item):
+        path, kind = item
+        sizes = (VIDEO_THUMB_SIZE, LIST_THUMB_SIZE) if kind == 'video' else (GROUP_THUMB_SIZE, LIST_THUMB_SIZE)
+        missing = [size for size in sizes if cache.get(path, size) is None]
+        if not missing:
+            return 'cached'
+        try:
+            if kind == 'video':
+                # 只运行一次 ffmpeg 抽取最大尺寸，较小尺寸由该帧缩放得到
+                largest = max(missing)
+                data = render_video_thumbnail(path, largest)
+                if not data:
+                    return 'failed'
+                rendered = {largest: data}
+                if len(missing) > 1:
+                    from PIL import Image
+                    with Image.open(BytesIO(data)) as img:
+                        rendered.update(_downscale(img, [s for s in missing if s != largest]))
+            else:
+                rendered = render_image_thumbnails(path, missing)
+        except Exception as e:
+            logger.warning(f"生成缩略图失败: {path}, 错误: {e}")
+            return 'failed'
+        if not all(rendered.values()):
+            return 'failed'
+        for size, data in rendered.items():
+            cache.put(path, size, data)
+        return 'created'
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(warm_one, item) for item in items]
+        for done, future in enumerate(as_completed(futures), 1):
+            counts[future.result()] += 1
+            if progress_callback:
+                progress_callback(done / len(futures))
+    if stats is not None:
+        stats.add('thumbnails', files=len(items), hits=cache.hits - hits0, misses=cache.misses - misses0,
+                  wall=time.perf_counter() - started)
+    return counts
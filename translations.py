@@ -28,6 +28,12 @@ ALL_TRANSLATIONS = {
         'keep_first': '保留第一个',
         'keep_newest': '保留最新',
         'keep_largest': '保留最大',
+        'keep_highest_res': '保留分辨率最高',
+        'keep_preferred_folder': '保留首选文件夹中的',
+        'keep_shallowest': '保留目录层级最浅',
+        'keep_earliest_taken': '保留拍摄时间最早',
+        'select_preferred_folder': '选择首选文件夹（该文件夹中的副本将被保留）',
+        'preferred_folder_set': '首选文件夹：{folder}',
         'img_tab': '图片重复组',
         'vid_tab': '视频重复组',
         'supp_tab': '增补结果',
@@ -39,6 +45,7 @@ ALL_TRANSLATIONS = {
         'save_dedup_report_as': '保存去重报告为',
         'save_supp_report_as': '保存增补报告为',
         'text_files': 'Text Files (*.txt)',
+        'report_files': '报告文件 (*.jsonl *.txt)',
         'param_error': '参数错误',
         'main_supp_same': '主文件夹和补充文件夹不能相同，请重新选择！',
         'no_files_to_move': '没有可移动的增补{label}。',
@@ -80,6 +87,45 @@ ALL_TRANSLATIONS = {
         'supp_vid_save': '预计增补空间: {size:.2f} MB',
         'supp_vid_corrupt': '疑似损坏视频: {count}',
         'elapsed': '分析/报告生成耗时: {sec:.1f} 秒',
+        'stage_header': '各阶段耗时：',
+        'first_paint': '界面首次绘制耗时 {sec:.3f} 秒，后台依赖检查耗时 {probe:.3f} 秒',
+        'first_paint_slow': '界面首次绘制耗时 {sec:.3f} 秒，超过目标 {target:.1f} 秒',
+        'dependency_missing': '⚠️ 无法加载 {name}：{err}',
+        'stage_line': '  {name}: {wall:.2f} 秒（CPU {cpu:.2f} 秒），{files} 个文件，{rate}，读取 {mb:.1f} MB（{mbps}）',
+        'stage_hit_rate': '，缓存命中率 {rate:.0%}',
+        'stage_rate': '{rate:.1f} 个/秒',
+        'stage_walk': '目录遍历',
+        'stage_stat_probe': 'stat 与尺寸探测',
+        'stage_group': '按大小/尺寸分组',
+        'stage_hash': '完整哈希',
+        'stage_validate': '图片验证',
+        'stage_collision_check': '哈希冲突检测',
+        'stage_video': '视频扫描',
+        'stage_report': '报告写入',
+        'stage_tuning': '调优参数解析',
+        'stage_hash_validate': '哈希与验证（并行）',
+        'tuning_profile': '使用设备调优结果：{mbps} MB/s（{when} 校准）',
+        'tuning_used': '并发与读块：进程 {jobs}，线程 {io_threads}，读块 {chunk}',
+        'auto_tune': '自动调优',
+        'payload_hash': '忽略元数据',
+        'external_mode': '外部排序模式：内存上限 {mb:.0f} MB，中间数据写入临时目录',
+        'external_sort_done': '外部排序完成：溢出 {runs} 个 run 文件，共 {mb:.1f} MB',
+        'stage_shard_walk': '分片目录遍历',
+        'stage_merge_read': '读取分片索引',
+        'stage_time_index': '拍摄时间索引',
+        'shard_scanning': '分片 {shard}/{shards}：本分片共 {images} 张图片、{videos} 个视频',
+        'shard_done': '分片 {shard}/{shards} 扫描完成：图片 {images} 张，视频 {videos} 个，索引已写入 {path}',
+        'shard_merging': '正在合并 {count} 个分片索引，根目录: {root}',
+        'shard_not_index': '不是分片索引文件: {path}',
+        'shard_incomplete': '分片索引不完整（扫描未结束或中途退出）: {path}',
+        'shard_mismatch': '分片索引的分片数或哈希算法与其他索引不一致: {path}',
+        'shard_duplicated': '以下分片的索引重复出现: {shards}',
+        'shard_missing': '缺少以下分片的索引: {missing}',
+        'supp_source': '补充文件夹 {rank}: {folder}（图片 {count} 张）',
+        'supp_duplicates_header': '补充文件中的重复副本（同一文件夹内或多个补充文件夹之间，只增补优先级最高的一份）{count} 个文件：',
+        'supp_duplicates': '补充文件中的重复副本: 图片 {img} 张，视频 {vid} 个（同一文件夹内或文件夹之间，只增补优先级最高的一份）',
+        'add_more_sources': '是否继续添加补充文件夹？\n先选择的文件夹优先级更高，重复文件只增补其中一份。',
+        'source_duplicated': '该文件夹已被选择或与主文件夹相同',
         'report_done': '报告生成完成',
         'start_dedup': '开始生成去重报告...',
         'dedup_done': '报告生成完成: {path}',
@@ -108,6 +154,26 @@ ALL_TRANSLATIONS = {
         'supp_img_report': '增补图片报告',
         'partial_move_failed_msg': '部分移动失败',
         'move_corrupt': '移动损坏文件',
+        'report_incomplete': '报告不完整（分析可能被中断）: {path}',
+        'use_trash': '移入回收目录（可恢复）',
+        'cancel': '取消',
+        'deleting': '正在后台删除 {count} 个文件...',
+        'op_cancelled': '操作已取消，已处理 {done} 个文件，其余文件保持不变',
+        'trash_location': '已删除的文件移入了回收目录（确认无误后可手动清空）: {dirs}',
+        'decode_check_videos': '移动前完整解码检查视频（较慢）',
+        'link_dups': '替换为链接',
+        'link_hard': '硬链接',
+        'link_reflink': 'reflink 克隆',
+        'no_files_to_link': '没有可替换的文件（每组需至少勾选一个保留文件）',
+        'confirm_link_msg': '确定把 {count} 个未勾选的重复文件替换为指向保留文件的{mode}？替换前会逐字节校验内容。',
+        'linking': '正在把 {count} 个重复文件替换为链接...',
+        'link_done': '链接替换完成：替换 {linked} 个，跳过 {skipped} 个，失败 {failed} 个，回收 {mb:.2f} MB',
+        'link_skipped': '跳过 {path}：{reason}',
+        'link_failed': '替换失败 {path}：{error}',
+        'link_reason_same_file': '已是同一文件',
+        'link_reason_cross_device': '与保留文件不在同一文件系统',
+        'link_reason_unsupported': '文件系统不支持该链接方式',
+        'link_reason_content_differs': '内容与保留文件不一致',
 
         # 后端处理相关（原 compare.py 中的内容）
                 'log_config': '日志配置',
@@ -159,6 +225,7 @@ ALL_TRANSLATIONS = {
         'images_found': '发现图片文件 {count} 张',
         'scanning_videos': '正在扫描视频文件...',
         'videos_found': '发现视频文件 {count} 个',
+        'capture_time_found': '读取到拍摄时间的文件：{count} / {total}',
         'analyzing_duplicates': '正在分析重复文件，共 {count} 组待处理...',
         'analysis_complete': '分析完成',
     },
@@ -175,6 +242,12 @@ ALL_TRANSLATIONS = {
         'keep_first': 'Keep First',
         'keep_newest': 'Keep Newest',
         'keep_largest': 'Keep Largest',
+        'keep_highest_res': 'Keep Highest Resolution',
+        'keep_preferred_folder': 'Keep Copy in Preferred Folder',
+        'keep_shallowest': 'Keep Shallowest Path',
+        'keep_earliest_taken': 'Keep Earliest Taken',
+        'select_preferred_folder': 'Select the preferred folder (copies in it will be kept)',
+        'preferred_folder_set': 'Preferred folder: {folder}',
         'img_tab': 'Image Groups',
         'vid_tab': 'Video Groups',
         'supp_tab': 'Supplement Result',
@@ -186,6 +259,7 @@ ALL_TRANSLATIONS = {
         'save_dedup_report_as': 'Save Deduplicate Report As',
         'save_supp_report_as': 'Save Supplement Report As',
         'text_files': 'Text Files (*.txt)',
+        'report_files': 'Report Files (*.jsonl *.txt)',
         'param_error': 'Parameter Error',
         'main_supp_same': 'Main and supplement folders cannot be the same. Please reselect!',
         'no_files_to_move': 'No supplement {label} to move.',
@@ -227,6 +301,45 @@ ALL_TRANSLATIONS = {
         'supp_vid_save': 'Space to supplement: {size:.2f} MB',
         'supp_vid_corrupt': 'Suspected corrupted videos: {count}',
         'elapsed': 'Elapsed: {sec:.1f} s',
+        'stage_header': 'Stage timings:',
+        'first_paint': 'First paint after {sec:.3f} s, background dependency check took {probe:.3f} s',
+        'first_paint_slow': 'First paint took {sec:.3f} s, over the {target:.1f} s target',
+        'dependency_missing': '⚠️ Failed to load {name}: {err}',
+        'stage_line': '  {name}: {wall:.2f} s (CPU {cpu:.2f} s), {files} files, {rate}, {mb:.1f} MB read ({mbps})',
+        'stage_hit_rate': ', cache hit rate {rate:.0%}',
+        'stage_rate': '{rate:.1f} files/s',
+        'stage_walk': 'Directory walk',
+        'stage_stat_probe': 'Stat and dimension probe',
+        'stage_group': 'Size/dimension grouping',
+        'stage_hash': 'Full hash',
+        'stage_validate': 'Image validation',
+        'stage_collision_check': 'Hash collision check',
+        'stage_video': 'Video scan',
+        'stage_report': 'Report write',
+        'stage_tuning': 'Tuning',
+        'stage_hash_validate': 'Hash and validation (parallel)',
+        'tuning_profile': 'Using device tuning profile: {mbps} MB/s (calibrated {when})',
+        'tuning_used': 'Concurrency and chunking: {jobs} processes, {io_threads} threads, {chunk} chunks',
+        'auto_tune': 'Auto-tune',
+        'payload_hash': 'Ignore metadata',
+        'external_mode': 'Out-of-core mode: memory limit {mb:.0f} MB, intermediate data spilled to a temporary directory',
+        'external_sort_done': 'External sort finished: {runs} run files spilled, {mb:.1f} MB in total',
+        'stage_shard_walk': 'Shard directory walk',
+        'stage_merge_read': 'Shard index read',
+        'stage_time_index': 'Capture-time index',
+        'shard_scanning': 'Shard {shard}/{shards}: {images} images and {videos} videos in this shard',
+        'shard_done': 'Shard {shard}/{shards} scanned: {images} images, {videos} videos, index written to {path}',
+        'shard_merging': 'Merging {count} shard indexes, root: {root}',
+        'shard_not_index': 'Not a shard index file: {path}',
+        'shard_incomplete': 'Incomplete shard index (scan still running or interrupted): {path}',
+        'shard_mismatch': 'Shard count or hash method differs from the other indexes: {path}',
+        'shard_duplicated': 'Indexes for these shards appear more than once: {shards}',
+        'shard_missing': 'Missing indexes for shards: {missing}',
+        'supp_source': 'Supplement folder {rank}: {folder} ({count} images)',
+        'supp_duplicates_header': 'Duplicate copies among supplement files (within one folder or across folders; only the highest-ranked copy is added), {count} files:',
+        'supp_duplicates': 'Duplicate copies among supplement files: {img} images, {vid} videos (within one folder or across folders; only the highest-ranked copy is added)',
+        'add_more_sources': 'Add another supplement folder?\nFolders chosen first rank higher; duplicated files are added only once.',
+        'source_duplicated': 'This folder is already selected or is the main folder',
         'report_done': 'Report generated',
         'start_dedup': 'Generating deduplication report...',
         'dedup_done': 'Report generated: {path}',
@@ -255,6 +368,26 @@ ALL_TRANSLATIONS = {
         'supp_img_report': 'Supplement Report',
         'partial_move_failed_msg': 'Partial move failed',
         'move_corrupt': 'Move corrupted',
+        'report_incomplete': 'Report is incomplete (analysis may have been interrupted): {path}',
+        'use_trash': 'Move to trash (recoverable)',
+        'cancel': 'Cancel',
+        'deleting': 'Deleting {count} files in the background...',
+        'op_cancelled': 'Operation cancelled after {done} files, remaining files are unchanged',
+        'trash_location': 'Deleted files were moved to the trash folder (empty it manually once verified): {dirs}',
+        'decode_check_videos': 'Fully decode videos to check them before moving (slow)',
+        'link_dups': 'Replace with links',
+        'link_hard': 'Hard link',
+        'link_reflink': 'Reflink clone',
+        'no_files_to_link': 'Nothing to replace (check at least one file to keep in each group)',
+        'confirm_link_msg': 'Replace {count} unchecked duplicates with a {mode} to the kept file? Contents are verified byte by byte first.',
+        'linking': 'Replacing {count} duplicates with links...',
+        'link_done': 'Link replacement done: {linked} replaced, {skipped} skipped, {failed} failed, {mb:.2f} MB reclaimed',
+        'link_skipped': 'Skipped {path}: {reason}',
+        'link_failed': 'Failed to replace {path}: {error}',
+        'link_reason_same_file': 'already the same file',
+        'link_reason_cross_device': 'not on the same filesystem as the kept file',
+        'link_reason_unsupported': 'link mode not supported by the filesystem',
+        'link_reason_content_differs': 'content differs from the kept file',
 
 
         # 后端处理相关
@@ -307,6 +440,7 @@ ALL_TRANSLATIONS = {
         'images_found': 'Found {count} image files',
         'scanning_videos': 'Scanning video files...',
         'videos_found': 'Found {count} video files',
+        'capture_time_found': 'Files with capture time: {count} / {total}',
         'analyzing_duplicates': 'Analyzing duplicates, {count} groups to process...',
         'analysis_complete': 'Analysis complete',
 
@@ -0,0 +1,189 @@
+# 并发与读块大小的调优
+# jobs：探测图片尺寸的进程数；io_threads：哈希与验证的线程数；chunk_size：哈希时每次读取的字节数。
+# 取值为 'auto' 时，先查找该设备上次保存的结果，没有则在运行开始时从目标目录抽样文件测量读吞吐量，
+# 选出读块大小和线程数，按设备（挂载点 + st_dev）保存到 ~/.photo_tool/tuning.json 供后续运行复用。
+
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from file_ops import TRASH_DIR_NAME, mount_point
+
+logger = logging.getLogger(__name__)
+
+TUNING_FILE = os.path.join(os.path.expanduser('~'), '.photo_tool', 'tuning.json')
+CHUNK_CANDIDATES = (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+THREAD_CANDIDATES = (1, 2, 4, 8, 16)
+FILES_PER_TRIAL = 8
+TRIAL_BYTES = 64 * 1024 * 1024  # 每次试读的字节上限，控制校准耗时
+MIN_SAMPLE = 4                  # 抽样文件少于此数时不校准，使用默认值
+GOOD_ENOUGH = 0.9               # 线程数取吞吐量达到最佳值 90% 的最小值
+_lock = threading.Lock()
+
+
+def device_key(folder):
+    """设备标识：挂载点与设备号，同一挂载点换盘后设备号不同，不会沿用旧结果"""
+    return f'{mount_point(folder)}|{os.stat(folder).st_dev}'
+
+
+def _load_all():
+    try:
+        with open(TUNING_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def load_profile(folder):
+    """返回该设备保存的调优结果，没有时返回 None"""
+    return _load_all().get(device_key(folder))
+
+
+def save_profile(folder, profile):
+    with _lock:
+        data = _load_all()
+        data[device_key(folder)] = profile
+        os.makedirs(os.path.dirname(TUNING_FILE), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(TUNING_FILE), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, TUNING_FILE)
+
+
+def sample_files(folder, limit, exts=None, seed=0):
+    """从目录中确定性地抽取至多 limit 个非空文件（遍历到 limit×4 个候选即停止）"""
+    candidates = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if d != TRASH_DIR_NAME)
+        for name in sorted(files):
+            if exts and os.path.splitext(name)[1].lower() not in exts:
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.path.getsize(path) > 0:
+                    candidates.append(path)
+            except OSError:
+                continue
+        if len(candidates) >= limit * 4:
+            break
+    random.Random(seed).shuffle(candidates)
+    return candidates[:limit]
+
+
+def _drop_cache(path):
+    """尽量把文件移出页缓存，使试读反映设备本身的速度（仅支持 posix_fadvise 的平台）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _read_file(path, chunk_size, budget):
+    n = 0
+    try:
+        with open(path, 'rb') as f:
+            while n < budget:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                n += len(chunk)
+    except OSError:
+        pass
+    return n
+
+
+def read_throughput(paths, chunk_size, threads):
+    """用 threads 个线程、每次 chunk_size 字节读取 paths，返回字节/秒"""
+    per_file = max(TRIAL_BYTES // max(len(paths), 1), chunk_size)
+    for p in paths:
+        _drop_cache(p)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda p: _read_file(p, chunk_size, per_file), paths))
+    elapsed = time.perf_counter() - t0
+    return total / elapsed if elapsed > 0 else 0.0
+
+
+def calibrate(folder, exts=None):
+    """
+    抽样测量并返回调优结果 dict，抽样文件太少时返回 None。
+    先用单线程比较各读块大小，再用选中的读块大小比较线程数；每次试读换一批文件，
+    在不支持丢弃页缓存的平台上也尽量避免读到缓存。
+    """
+    trials = len(CHUNK_CANDIDATES) + len(THREAD_CANDIDATES)
+    sample = sample_files(folder, FILES_PER_TRIAL * trials, exts)
+    if len(sample) < MIN_SAMPLE:
+        return None
+    per_trial = min(FILES_PER_TRIAL, len(sample))
+    batches = [[sample[(i * per_trial + k) % len(sample)] for k in range(per_trial)] for i in range(trials)]
+    t0 = time.perf_counter()
+    chunk_rates = {c: read_throughput(batches[i], c, 1) for i, c in enumerate(CHUNK_CANDIDATES)}
+    chunk_size = max(chunk_rates, key=chunk_rates.get)
+    offset = len(CHUNK_CANDIDATES)
+    thread_rates = {t: read_throughput(batches[offset + i], chunk_size, t) for i, t in enumerate(THREAD_CANDIDATES)}
+    best = max(thread_rates.values())
+    io_threads = min(t for t, r in thread_rates.items() if r >= best * GOOD_ENOUGH)
+    # 尺寸探测只读文件头，主要受打开文件的延迟限制，进程数随 I/O 并发度取值但不超过 CPU 数
+    jobs = max(1, min(os.cpu_count() or 1, max(2, io_threads)))
+    return {
+        'jobs': jobs,
+        'io_threads': io_threads,
+        'chunk_size': chunk_size,
+        'mb_per_s': round(best / 1024 / 1024, 1),
+        'calibration_seconds': round(time.perf_counter() - t0, 2),
+        'calibrated': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def resolve(folder, jobs=None, io_threads=None, chunk_size=None, exts=None, recalibrate=False, stats=None):
+    """
+    把各参数解析为具体数值：整数原样返回，None 表示沿用默认行为，
+    'auto' 取该设备保存的（或现场校准的）结果。返回 (dict, 调优结果或 None)。
+    stats 为 StageStats 时在 tuning 阶段记录一次缓存查找：沿用已保存的结果为命中，现场校准为未命中。
+    """
+    values = {'jobs': jobs, 'io_threads': io_threads, 'chunk_size': chunk_size}
+    if 'auto' not in values.values():
+        return values, None
+    profile = None if recalibrate else load_profile(folder)
+    if stats is not None:
+        stats.add('tuning', hits=int(profile is not None), misses=int(profile is None))
+    if profile is None:
+        profile = calibrate(folder, exts)
+        if profile is not None:
+            try:
+                save_profile(folder, profile)
+            except OSError as e:
+                logger.warning(f"保存调优结果失败: {e}")
+    for key, value in values.items():
+        if value == 'auto':
+            values[key] = profile.get(key) if profile else None
+    return values, profile
+
+
+def parse_knob(value, byte_size=False):
+    """解析命令行取值：'auto'、正整数，或带 K/M 后缀的字节数（byte_size 为 True 时）"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value == 'auto':
+        return 'auto'
+    scale = 1
+    if byte_size and value[-1:] in ('k', 'm'):
+        scale = 1024 if value[-1] == 'k' else 1024 * 1024
+        value = value[:-1]
+    number = int(value) * scale
+    if number <= 0:
+        raise ValueError(value)
+    return number